@@ -1,14 +1,9 @@
 import argparse  # Import argparse to handle command-line arguments
-import os  # Import os to work with file paths and directories
-from src.observability.logging_utils import init_logging  # Import function to set up logging
-from src.observability.metrics import Metrics  # Import Metrics class for simple counters
-from src.memory.memory_bank import MemoryBank  # Import MemoryBank for long-term JSON memory
-from src.memory.session_memory import SessionMemory  # Import SessionMemory for in-run storage
-from src.agents.reddit_data_agent import RedditDataAgent  # Import RedditDataAgent
-from src.agents.sentiment_agent import SentimentAnalysisAgent  # Import SentimentAnalysisAgent
-from src.agents.player_impact_agent import PlayerImpactAgent  # Import PlayerImpactAgent
-from src.agents.match_summary_agent import MatchSummaryAgent  # Import MatchSummaryAgent
-from src.agents.report_generator_agent import ReportGeneratorAgent  # Import ReportGeneratorAgent
+import json  # Import json to print history rows
+
+# Everything else (agents, tools, storage backends) is imported inside main(), once the
+# arguments say which of them this run needs; `--help` and history queries stay fast.
+STAGES = ["fetch", "sentiment", "impact", "summary", "report"]  # Pipeline stages, in order
 
 
 def parse_args() -> argparse.Namespace:
@@ -19,89 +14,438 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Run in offline demo mode using sample data.",
     )
-    return parser.parse_args()  # Return parsed arguments
+    parser.add_argument(  # Optional custom sentiment lexicon (.json or tab-separated .txt/.tsv)
+        "--lexicon",
+        default=None,
+        help="Path to a sentiment lexicon file (JSON or term<TAB>weight lines).",
+    )
+    parser.add_argument(  # Scoring implementation (numpy is optional)
+        "--backend",
+        choices=["auto", "python", "numpy"],
+        default="auto",
+        help="Scoring backend: vectorized numpy when installed (auto), or the pure-Python scorers.",
+    )
+    parser.add_argument(  # Optional ordering of the report's player table
+        "--rank-by",
+        choices=["impact", "goals", "sentiment"],
+        default=None,
+        help="Order the report's player table by this column and list per-team leaders.",
+    )
+    parser.add_argument(  # Extra report formats written next to the Markdown report
+        "--formats",
+        nargs="+",
+        choices=["md", "json", "csv", "html"],
+        default=[],
+        help="Also render the report as these formats (same base name, different extension).",
+    )
+    parser.add_argument(  # Paginated appendix listing every scored comment
+        "--appendix-page-size",
+        type=int,
+        default=0,
+        help="Append every scored comment to the report, this many per page (0 disables the appendix).",
+    )
+    parser.add_argument(  # Parallel sentiment scoring
+        "--sentiment-workers",
+        type=int,
+        default=1,
+        help="Score comments in chunks across this many worker processes (0 = one per CPU, 1 = serial).",
+    )
+    parser.add_argument(  # Comments per parallel scoring chunk
+        "--sentiment-chunk-size",
+        type=int,
+        default=4096,
+        help="Comments per chunk handed to a sentiment worker; smaller batches are scored serially.",
+    )
+    parser.add_argument(  # Comment thread input (.json with a "comments" array, or .jsonl)
+        "--thread",
+        default="data/sample_reddit_thread.json",
+        help="Path to the comment thread (JSON or JSON Lines).",
+    )
+    parser.add_argument(  # Match statistics input
+        "--stats",
+        default="data/sample_match_stats.json",
+        help="Path to the match statistics JSON file.",
+    )
+    parser.add_argument(  # Live thread URLs, fetched concurrently when not in demo mode
+        "--url",
+        action="append",
+        default=[],
+        help="Thread URL to fetch (repeatable; paginated via the 'after' cursor). Ignored with --demo.",
+    )
+    parser.add_argument(  # Stream comments lazily through the agents
+        "--stream",
+        action="store_true",
+        help="Stream comments through the agents so memory stays bounded for large threads.",
+    )
+    parser.add_argument(  # Long-running tool server
+        "--serve",
+        action="store_true",
+        help="Serve the fetch, scoring, player impact and report tools as a JSON-RPC (MCP) server on stdin/stdout, "
+        "keeping the lexicon, parsed threads, indexes and stores warm between calls.",
+    )
+    parser.add_argument(  # Tool server concurrency
+        "--max-concurrency",
+        type=int,
+        default=4,
+        help="Tool calls the --serve server runs at once.",
+    )
+    parser.add_argument(  # Tool server queue bound
+        "--max-pending",
+        type=int,
+        default=64,
+        help="Tool calls --serve accepts before rejecting new ones as busy.",
+    )
+    parser.add_argument(  # Process many matches at once
+        "--batch",
+        default=None,
+        help="Directory of match folders (thread.json[l] + stats.json) or a JSON manifest of matches.",
+    )
+    parser.add_argument(  # Number of worker processes for batch mode
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes for --batch (defaults to the CPU count).",
+    )
+    parser.add_argument(  # Where batch reports are written
+        "--output-dir",
+        default="outputs/reports",
+        help="Directory for per-match reports in --batch and --serve modes.",
+    )
+    parser.add_argument(  # Tail a growing JSON Lines thread during a live match
+        "--live",
+        action="store_true",
+        help="Tail --thread (JSON Lines) and update the report incrementally as new comments arrive.",
+    )
+    parser.add_argument(  # Seconds between live updates
+        "--interval",
+        type=float,
+        default=60.0,
+        help="Seconds between live updates in --live mode.",
+    )
+    parser.add_argument(  # Stop after this many live updates
+        "--ticks",
+        type=int,
+        default=0,
+        help="Number of live updates before exiting (0 runs until interrupted).",
+    )
+    parser.add_argument(  # Log file format
+        "--log-format",
+        choices=["text", "json"],
+        default="text",
+        help="Format of logs/app.log: plain text or one JSON object per line.",
+    )
+    parser.add_argument(  # Background logging
+        "--log-async",
+        action="store_true",
+        help="Hand log records to a background thread so logging never blocks on disk or terminal I/O.",
+    )
+    parser.add_argument(  # Log rotation
+        "--log-max-mb",
+        type=float,
+        default=0,
+        help="Rotate logs/app.log when it reaches this size in MB, keeping 5 old files (0 never rotates).",
+    )
+    parser.add_argument(  # Log rate limiting
+        "--log-rate-limit",
+        type=float,
+        default=None,
+        help="Max INFO/DEBUG records per second from each logging call site; warnings and errors are never dropped.",
+    )
+    parser.add_argument(  # Log sampling
+        "--log-sample",
+        type=float,
+        default=None,
+        help="Fraction (0-1] of each logger's INFO/DEBUG records to keep, evenly spaced.",
+    )
+    parser.add_argument(  # Per-stage wall/CPU/memory breakdown
+        "--profile",
+        action="store_true",
+        help="Trace each stage (wall time, CPU time, peak memory, items) and print a breakdown.",
+    )
+    parser.add_argument(  # Optional cProfile capture per stage
+        "--cprofile-dir",
+        default=None,
+        help="Write a cProfile .prof file per stage into this directory.",
+    )
+    parser.add_argument(  # Chrome trace / JSON timeline output
+        "--trace-out",
+        default=None,
+        help="Write a Chrome trace (chrome://tracing, Perfetto) JSON timeline of the run to this path.",
+    )
+    parser.add_argument(  # Where cached stage results live
+        "--cache-dir",
+        default="cache/stages",
+        help="Directory for the content-addressed stage cache.",
+    )
+    parser.add_argument(  # Disk budget for the stage cache
+        "--cache-max-mb",
+        type=int,
+        default=256,
+        help="Maximum stage cache size in MB; least recently used entries are evicted first.",
+    )
+    parser.add_argument(  # Force every stage to recompute
+        "--no-cache",
+        action="store_true",
+        help="Disable the stage cache and recompute every stage.",
+    )
+    parser.add_argument(  # Custom player impact formula
+        "--impact-formula",
+        default=None,
+        help="Python expression for each player's impact score, e.g. 'goals * 4 + assists * 2 - cards + "
+        "sentiment_score / 2' (impact_score holds the default). Runs in a resource-limited subprocess "
+        "(timeout, CPU and memory caps); this is not a sandbox, so only pass trusted formulas.",
+    )
+    parser.add_argument(  # Score every comment, even exact duplicates
+        "--no-dedup",
+        action="store_true",
+        help="Score every comment separately instead of scoring each distinct text once.",
+    )
+    parser.add_argument(  # Merge near-duplicate comments before scoring
+        "--near-duplicates",
+        type=float,
+        default=None,
+        metavar="THRESHOLD",
+        help="Also merge near-duplicate comments (word-pair Jaccard similarity >= THRESHOLD, e.g. 0.8, found "
+        "with MinHash/LSH; needs numpy). Near-duplicates share one score, so results are approximate.",
+    )
+    parser.add_argument(  # Columnar snapshot of the scored comments
+        "--snapshot-dir",
+        default="outputs/snapshots",
+        help="Directory for each match's memory-mapped snapshot of its scored comments (<match_id>.snap).",
+    )
+    parser.add_argument(  # Skip writing the snapshot
+        "--no-snapshot",
+        action="store_true",
+        help="Do not write the scored comment snapshot.",
+    )
+    parser.add_argument(  # Run only some pipeline stages
+        "--only",
+        nargs="+",
+        choices=STAGES,
+        default=None,
+        help="Run only these stages (single and batch runs); upstream results come from the stage cache "
+        "when available, and later stages are skipped.",
+    )
+    parser.add_argument(  # Resume the pipeline at a stage
+        "--from-stage",
+        choices=STAGES,
+        default=None,
+        help="Recompute this stage and every later one, reusing cached results for the earlier stages.",
+    )
+    parser.add_argument(  # Long-term memory storage
+        "--memory-backend",
+        choices=["jsonl", "sqlite"],
+        default="jsonl",
+        help="Long-term memory store: JSON Lines journal, or SQLite (WAL) with indexed history tables.",
+    )
+    parser.add_argument(  # Print a player's history across matches and exit
+        "--player-history",
+        default=None,
+        help="Print this player's impact over the most recent matches and exit.",
+    )
+    parser.add_argument(  # Print a team's history across matches and exit
+        "--team-history",
+        default=None,
+        help="Print this team's per-match totals over the most recent matches and exit.",
+    )
+    args = parser.parse_args()  # Parse the command line
+    if args.only and args.from_stage:  # The two stage selectors are alternatives
+        parser.error("--only and --from-stage cannot be combined")
+    return args  # Return parsed arguments
 
 
-def ensure_directories() -> None:
-    """Ensure that required directories exist."""  # Describe purpose of this function
-    for folder in ["logs", "outputs/reports", "memory_store", "metrics", "data"]:  # Iterate over needed folders
-        os.makedirs(folder, exist_ok=True)  # Create folder if it does not exist already
+def open_memory_bank(backend: str):  # type: ignore[no-untyped-def]
+    """Open the long-term memory store; each backend creates its own folder."""
+    if backend == "sqlite":  # Indexed store; imports the JSON Lines journal on first use
+        from src.memory.sqlite_memory_bank import SQLiteMemoryBank
+
+        return SQLiteMemoryBank(db_path="memory_store/long_term_memory.sqlite3")
+    from src.memory.memory_bank import MemoryBank
+
+    return MemoryBank(memory_path="memory_store/long_term_memory.jsonl")  # Journaled; read only when queried
 
 
 def main() -> None:
     """Main orchestration for all agents."""  # Describe main function
-    args = parse_args()  # Parse command-line arguments
-    ensure_directories()  # Make sure folders exist
-    logger = init_logging(log_file_path="logs/app.log")  # Set up logging and get a logger
-    metrics = Metrics(metrics_path="metrics/counters.json")  # Create a Metrics object
-    memory_bank = MemoryBank(memory_path="memory_store/long_term_memory.json")  # Create a MemoryBank
-    session_memory = SessionMemory()  # Create in-memory session object
+    args = parse_args()  # Parse command-line arguments before importing anything heavy
+    memory_bank = open_memory_bank(args.memory_backend)  # Long-term memory (opened lazily)
+
+    if args.player_history or args.team_history:  # History queries read memory only: no logging or metrics
+        if args.player_history:
+            rows = memory_bank.player_history(args.player_history)
+        else:
+            rows = memory_bank.team_history(args.team_history)
+        for row in rows:
+            print(json.dumps(row))
+        if not rows:
+            print("No history found.")
+        return
+
+    from src.observability.logging_utils import init_logging  # Import function to set up logging
+    from src.observability.metrics import Metrics  # Import Metrics class for simple counters
+
+    logger = init_logging(  # Set up logging and get a logger
+        log_file_path="logs/app.log",
+        log_format=args.log_format,
+        async_mode=args.log_async,
+        max_bytes=int(args.log_max_mb * 1024 * 1024),
+        rate_limit=args.log_rate_limit,
+        sample=args.log_sample,
+    )
+    metrics = Metrics(metrics_path="metrics/counters.json")  # Buffered Metrics; files are touched at the first flush
+    stages = None  # Every stage, reusing cached results where the cache allows
+    if args.only or args.from_stage:  # Stage subset
+        from src.pipeline.match_pipeline import select_stages
+
+        stages = list(select_stages(only=args.only, from_stage=args.from_stage))
 
     logger.info("Starting FootyPulse pipeline")  # Log start message
     metrics.increment("runs")  # Increment runs counter in metrics
+    cache_dir = None if args.no_cache else args.cache_dir  # Stage cache location (None disables caching)
+    cache_max_bytes = args.cache_max_mb * 1024 * 1024  # Stage cache size budget in bytes
+    snapshot_dir = None if args.no_snapshot else args.snapshot_dir  # Scored comment snapshots (None disables them)
 
-    # Set up agents with shared dependencies
-    reddit_agent = RedditDataAgent(  # Create RedditDataAgent instance
-        logger=logger,
-        metrics=metrics,
-        memory_bank=memory_bank,
-        session_memory=session_memory,
-        demo_mode=args.demo,
-        sample_path="data/sample_reddit_thread.json",
+    if args.serve:  # Answer tool calls until stdin closes; logs go to stderr and logs/app.log
+        import sys
+
+        from src.pipeline.stage_cache import StageCache  # Import content-addressed stage cache
+        from src.pipeline.tool_server import ToolServer  # Import the warm JSON-RPC tool server
+        from src.tools.sentiment_lexicon import SentimentLexicon  # Import compiled sentiment lexicon
+
+        server = ToolServer(
+            logger=logger,
+            metrics=metrics,
+            memory_bank=memory_bank,
+            lexicon=SentimentLexicon.from_file(args.lexicon) if args.lexicon else None,
+            cache=StageCache(cache_dir, cache_max_bytes, metrics=metrics) if cache_dir else None,
+            backend=args.backend,
+            max_concurrency=args.max_concurrency,
+            max_pending=args.max_pending,
+            output_dir=args.output_dir,
+        )
+        server.serve(sys.stdin, sys.stdout)
+        metrics.flush()  # Persist buffered counters, gauges and histograms
+        return
+
+    if args.batch:  # Fan every match out across a process pool
+        from src.pipeline.batch_runner import discover_matches, run_batch  # Import the multi-match batch runner
+
+        matches = discover_matches(args.batch, args.output_dir)  # Resolve per-match inputs and output paths
+        logger.info(f"Running batch of {len(matches)} matches")  # Log batch size
+        result = run_batch(  # Run all matches and merge their metrics and memory in this process
+            matches,
+            logger=logger,
+            metrics=metrics,
+            memory_bank=memory_bank,
+            workers=args.workers,
+            lexicon_path=args.lexicon,
+            stream=args.stream,
+            demo_mode=args.demo,
+            cache_dir=cache_dir,
+            cache_max_bytes=cache_max_bytes,
+            backend=args.backend,
+            rank_by=args.rank_by,
+            report_formats=args.formats,
+            appendix_page_size=args.appendix_page_size,
+            stages=stages,
+            impact_formula=args.impact_formula,
+            dedup=not args.no_dedup,
+            near_duplicate_threshold=args.near_duplicates,
+            snapshot_dir=snapshot_dir,
+        )
+        metrics.flush()  # Persist buffered counters, gauges and histograms
+        for failure in result.failures:  # Surface failed matches to the user
+            print(f"Match {failure['match_id']} failed: {failure['error']}")
+        print(f"Batch complete: {result.summary_line()}")  # Throughput summary
+        return
+
+    if args.live:  # Incremental mode: only comments added since the last tick are processed
+        from src.pipeline.live_session import LiveMatchSession, run_live  # Import incremental live-match mode
+        from src.pipeline.match_pipeline import MatchInputs  # Per-match input paths
+        from src.tools.sentiment_lexicon import SentimentLexicon  # Import compiled sentiment lexicon
+
+        session = LiveMatchSession(  # Agents keep running sentiment, player and top-N state
+            MatchInputs(
+                match_id="live",
+                thread_path=args.thread,
+                stats_path=args.stats,
+                output_path="outputs/reports/live_match_report.md",
+            ),
+            logger=logger,
+            metrics=metrics,
+            memory_bank=memory_bank,
+            lexicon=SentimentLexicon.from_file(args.lexicon) if args.lexicon else None,
+            backend=args.backend,
+            rank_by=args.rank_by,
+            report_formats=args.formats,
+            sentiment_workers=args.sentiment_workers,
+            sentiment_chunk_size=args.sentiment_chunk_size,
+            impact_formula=args.impact_formula,
+            dedup=not args.no_dedup,
+            near_duplicate_threshold=args.near_duplicates,
+        )
+        try:
+            run_live(session, interval=args.interval, max_ticks=args.ticks)  # Re-emit the report on every tick
+        except KeyboardInterrupt:  # Ctrl+C ends a live session cleanly
+            pass
+        metrics.flush()  # Persist buffered counters, gauges and histograms
+        print(f"Live session ended after {session.ticks} updates ({session.total_comments} comments)")
+        return
+
+    from src.observability.tracing import Tracer  # Import per-stage span tracing
+    from src.pipeline.match_pipeline import MatchInputs, run_match_pipeline  # Import the per-match agent pipeline
+    from src.pipeline.stage_cache import StageCache  # Import content-addressed stage cache
+    from src.tools.sentiment_lexicon import SentimentLexicon  # Import compiled sentiment lexicon
+
+    inputs = MatchInputs(  # Single match: the thread and stats given on the command line
+        match_id="demo",
+        thread_path=args.thread,
+        stats_path=args.stats,
+        output_path="outputs/reports/demo_match_report.md",
+        thread_urls=args.url,  # Used by the non-demo fetch mode
     )
-    sentiment_agent = SentimentAnalysisAgent(  # Create SentimentAnalysisAgent instance
-        logger=logger,
+    tracer = Tracer(  # Spans around each agent; memory tracing and cProfile only when asked for
         metrics=metrics,
-        memory_bank=memory_bank,
-        session_memory=session_memory,
+        trace_memory=args.profile,
+        profile_dir=args.cprofile_dir,
     )
-    player_impact_agent = PlayerImpactAgent(  # Create PlayerImpactAgent instance
+    result = run_match_pipeline(  # Run the five agents for this match
+        inputs,
         logger=logger,
         metrics=metrics,
         memory_bank=memory_bank,
-        session_memory=session_memory,
-        sample_stats_path="data/sample_match_stats.json",
+        lexicon=SentimentLexicon.from_file(args.lexicon) if args.lexicon else None,  # Custom lexicon if given
+        stream=args.stream,
         demo_mode=args.demo,
+        cache=StageCache(cache_dir, cache_max_bytes, metrics=metrics) if cache_dir else None,  # Skip unchanged stages
+        tracer=tracer,
+        backend=args.backend,  # Vectorized or pure-Python scoring
+        rank_by=args.rank_by,  # Optional ranked player table
+        report_formats=args.formats,  # Extra JSON/CSV/HTML renderings
+        appendix_page_size=args.appendix_page_size,  # Paginated all-comments appendix
+        sentiment_workers=args.sentiment_workers,  # Chunked parallel sentiment scoring
+        sentiment_chunk_size=args.sentiment_chunk_size,
+        stages=stages,  # Optional subset of stages
+        impact_formula=args.impact_formula,  # Optional custom impact score
+        dedup=not args.no_dedup,  # Score each distinct comment text once
+        near_duplicate_threshold=args.near_duplicates,  # Optional approximate near-duplicate merging
+        snapshot_dir=snapshot_dir,  # Memory-mapped columnar copy of the scored comments
     )
-    match_summary_agent = MatchSummaryAgent(  # Create MatchSummaryAgent instance
-        logger=logger,
-        metrics=metrics,
-        memory_bank=memory_bank,
-        session_memory=session_memory,
-    )
-    report_agent = ReportGeneratorAgent(  # Create ReportGeneratorAgent instance
-        logger=logger,
-        metrics=metrics,
-        memory_bank=memory_bank,
-        session_memory=session_memory,
-        output_path="outputs/reports/demo_match_report.md",
-    )
-
-    # Run agents sequentially
-    logger.info("Running Reddit Data Fetch Agent")  # Log stage
-    comments = reddit_agent.run()  # Fetch comments (list of dicts)
+    report_path = result["report_path"]  # Where the report was written (None if the report stage was skipped)
 
-    logger.info("Running Sentiment Analysis Agent")  # Log stage
-    comments_with_sentiment, sentiment_summary = sentiment_agent.run(comments)  # Analyze sentiment
-
-    logger.info("Running Player Impact Agent")  # Log stage
-    player_impacts = player_impact_agent.run(comments_with_sentiment)  # Compute player impacts
-
-    logger.info("Running Match Summary Agent")  # Log stage
-    match_summary = match_summary_agent.run(  # Create narrative summary
-        sentiment_summary=sentiment_summary,
-        player_impacts=player_impacts,
-    )
-
-    logger.info("Running Report Generator Agent")  # Log stage
-    report_path = report_agent.run(  # Generate report file
-        comments_with_sentiment=comments_with_sentiment,
-        sentiment_summary=sentiment_summary,
-        player_impacts=player_impacts,
-        match_summary=match_summary,
-    )
+    if args.profile:  # Per-stage breakdown for this run
+        print(tracer.breakdown())
+    if args.trace_out:  # Timeline for chrome://tracing or Perfetto
+        print(f"Trace written to: {tracer.export_chrome_trace(args.trace_out)}")
 
+    metrics.flush()  # Persist buffered counters, gauges and histograms
     logger.info("FootyPulse pipeline completed")  # Log completion
+    print(f"Critical path: {result['critical_path']}")  # Which chain of stages set the run time
+    if result["snapshot_path"]:  # Scored comments for season-wide analytics
+        print(f"Snapshot: {result['snapshot_path']}")
+    if report_path is None:  # A stage subset that stops before the report
+        print(f"Stages completed: {', '.join(result['stages'])}")
+        return
     logger.info(f"Report generated at: {report_path}")  # Log where report was saved
     print(f"Report generated at: {report_path}")  # Also print to console for the user
 
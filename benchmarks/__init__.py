@@ -0,0 +1 @@
+# Marks benchmarks as a Python package
\ No newline at end of file
@@ -0,0 +1,53 @@
+import argparse
+import time
+from src.tools.async_reddit_fetcher import AsyncRedditFetcher
+from src.tools.reddit_fetcher import RedditFetcher
+from benchmarks.stub_reddit_server import StubRedditServer
+
+
+def fetch_sequential(urls, pages_per_thread):
+    fetcher = RedditFetcher()
+    comments = []
+    for url in urls:
+        for page in range(pages_per_thread):
+            comments.extend(fetcher.fetch_from_url(url if page == 0 else f'{url}?after={page}'))
+    return comments
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Fetch throughput against a local stub Reddit server')
+    parser.add_argument('--threads', type=int, default=20)
+    parser.add_argument('--pages', type=int, default=5)
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.02, help='Simulated server latency per request (s)')
+    parser.add_argument('--fail-every', type=int, default=0, help='Return HTTP 503 on every Nth request')
+    parser.add_argument('--concurrency', type=int, default=16)
+    args = parser.parse_args()
+
+    expected = args.threads * args.pages * args.page_size
+    with StubRedditServer(args.pages, args.page_size, args.latency) as stub:
+        urls = stub.thread_urls(args.threads)
+        start = time.perf_counter()
+        comments = fetch_sequential(urls, args.pages)
+        elapsed = time.perf_counter() - start
+        assert len(comments) == expected, (len(comments), expected)
+        print(f'sequential urllib   {elapsed:7.2f}s  {args.threads * args.pages / elapsed:8.1f} pages/s  '
+              f'{len(comments) / elapsed:10,.0f} comments/s  connections={stub.connections}')
+
+    with StubRedditServer(args.pages, args.page_size, args.latency, args.fail_every) as stub:
+        fetcher = AsyncRedditFetcher(
+            max_concurrency=args.concurrency,
+            max_connections_per_host=args.concurrency,
+            backoff_base=0.01,
+        )
+        start = time.perf_counter()
+        comments = fetcher.fetch_all(stub.thread_urls(args.threads))
+        elapsed = time.perf_counter() - start
+        assert len(comments) == expected, (len(comments), expected)
+        print(f'async keep-alive    {elapsed:7.2f}s  {fetcher.stats["pages"] / elapsed:8.1f} pages/s  '
+              f'{len(comments) / elapsed:10,.0f} comments/s  connections={stub.connections} '
+              f'retries={fetcher.stats["retries"]}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Tuple
+from src.observability.logging_utils import init_logging, shutdown_logging
+
+CONFIGS: List[Tuple[str, Dict[str, Any]]] = [
+    ('sync text', {}),
+    ('sync json', {'log_format': 'json'}),
+    ('async text', {'async_mode': True}),
+    ('async json', {'async_mode': True, 'log_format': 'json'}),
+    ('async json rotating', {'async_mode': True, 'log_format': 'json', 'max_bytes': 1 << 20}),
+    ('async json sample 10%', {'async_mode': True, 'log_format': 'json', 'sample': 0.1}),
+    ('async json 1000/s', {'async_mode': True, 'log_format': 'json', 'rate_limit': 1000}),
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Per-call cost of logger.info with each logging setup')
+    parser.add_argument('--records', type=int, default=50000)
+    parser.add_argument('--console', choices=['devnull', 'stderr'], default='devnull')
+    args = parser.parse_args()
+
+    console = open(os.devnull, 'w') if args.console == 'devnull' else sys.stderr
+    print(f'{"setup":<24}{"per call":>12}{"drain":>10}{"file MB":>10}')
+    with tempfile.TemporaryDirectory(prefix='footypulse-logbench-') as tmp_dir:
+        for i, (label, options) in enumerate(CONFIGS):
+            log_path = os.path.join(tmp_dir, f'bench{i}.log')
+            logger = init_logging(log_path, name=f'footypulse.bench{i}', stream=console, **options)
+            logger.propagate = False
+            start = time.perf_counter()
+            for n in range(args.records):
+                logger.info('SentimentAnalysisAgent: scored comment %d as %s', n, 'positive')
+            elapsed = time.perf_counter() - start
+            # Time until every queued record is on disk; zero for synchronous handlers.
+            shutdown_logging()
+            drained = time.perf_counter() - start - elapsed
+            for handler in list(logger.handlers):
+                handler.close()
+                logger.removeHandler(handler)
+            size = sum(os.path.getsize(os.path.join(tmp_dir, f)) for f in os.listdir(tmp_dir) if f.startswith(f'bench{i}.'))
+            print(f'{label:<24}{elapsed / args.records * 1e6:9.2f} us{drained:9.2f}s{size / 1e6:10.2f}')
+    if console is not sys.stderr:
+        console.close()
+
+
+if __name__ == '__main__':
+    main()
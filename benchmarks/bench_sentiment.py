@@ -0,0 +1,58 @@
+import argparse
+import random
+import time
+from typing import Callable, List, Set
+from src.tools.sentiment_lexicon import SentimentLexicon
+
+POSITIVE = {'great', 'amazing', 'good', 'love', 'fantastic', 'brilliant', 'excellent', 'win'}
+NEGATIVE = {'bad', 'terrible', 'awful', 'hate', 'worst', 'poor', 'lose', 'loss'}
+FILLER = ['the', 'team', 'was', 'today', 'striker', 'keeper', 'referee', 'midfield', 'winger', 'really', 'not']
+
+
+def legacy_score(text: str, positive: Set[str], negative: Set[str]) -> int:
+    text_lower = text.lower()
+    score = 0
+    for w in positive:
+        if w in text_lower:
+            score += 1
+    for w in negative:
+        if w in text_lower:
+            score -= 1
+    return score
+
+
+def make_comments(count: int, vocab: List[str], seed: int) -> List[str]:
+    rng = random.Random(seed)
+    return [' '.join(rng.choice(vocab) for _ in range(rng.randint(6, 24))) for _ in range(count)]
+
+
+def time_scorer(name: str, scorer: Callable[[str], float], comments: List[str]) -> float:
+    start = time.perf_counter()
+    for text in comments:
+        scorer(text)
+    elapsed = time.perf_counter() - start
+    print(f'{name:<28} {elapsed:8.3f}s  {len(comments) / elapsed:12,.0f} comments/s')
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Legacy substring scorer vs compiled lexicon engine')
+    parser.add_argument('--comments', type=int, default=50000)
+    parser.add_argument('--lexicon-size', type=int, default=2000, help='Number of synthetic terms per polarity')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    positive = set(POSITIVE) | {f'pos{i}' for i in range(args.lexicon_size)}
+    negative = set(NEGATIVE) | {f'neg{i}' for i in range(args.lexicon_size)}
+    lexicon = SentimentLexicon.from_word_sets(positive, negative)
+    vocab = sorted(POSITIVE | NEGATIVE) + FILLER * 4 + [f'pos{i}' for i in range(50)] + [f'neg{i}' for i in range(50)]
+    comments = make_comments(args.comments, vocab, args.seed)
+
+    print(f'{args.comments} comments, {len(lexicon)} lexicon terms')
+    legacy = time_scorer('legacy substring scan', lambda t: legacy_score(t, positive, negative), comments)
+    engine = time_scorer('compiled lexicon engine', lexicon.score, comments)
+    print(f'speedup: {legacy / engine:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+import argparse
+import logging
+import os
+import tempfile
+import time
+from typing import Dict, List, Tuple
+from src.agents.player_impact_agent import PlayerImpactAgent
+from src.agents.reddit_data_agent import RedditDataAgent
+from src.agents.sentiment_agent import SentimentAnalysisAgent
+from src.memory.memory_bank import MemoryBank
+from src.memory.session_memory import SessionMemory
+from src.models.domain_models import CommentBatch
+from src.observability.metrics import Metrics
+from src.tools.player_index import PlayerMentionIndex
+from src.tools.snapshot import Snapshot, write_snapshot
+from src.tools.synthetic_data import write_match
+
+
+def score_match(thread_path: str, stats_path: str, work_dir: str) -> Tuple[CommentBatch, Dict[str, float]]:
+    logger = logging.getLogger('footypulse.bench')
+    metrics = Metrics(os.path.join(work_dir, 'counters.json'), flush_interval=float('inf'))
+    memory_bank = MemoryBank(os.path.join(work_dir, 'memory.jsonl'))
+    shared = dict(logger=logger, metrics=metrics, memory_bank=memory_bank, session_memory=SessionMemory())
+    index = PlayerMentionIndex.from_stats_file(stats_path)
+    comments = RedditDataAgent(**shared, demo_mode=True, sample_path=thread_path).run()
+    comments, _ = SentimentAnalysisAgent(**shared, mention_index=index).run(comments)
+    totals: Dict[str, float] = {}
+    impact = PlayerImpactAgent(**shared, sample_stats_path=stats_path, demo_mode=True, mention_index=index)
+    for _ in impact.accumulate([comments], totals):
+        pass
+    return comments, totals
+
+
+def snapshot_totals(path: str) -> Tuple[Dict[str, float], Dict[str, int]]:
+    with Snapshot(path) as snapshot:
+        return snapshot.player_totals(), snapshot.label_counts()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Season-wide player sentiment: re-parse and re-score vs snapshot scan')
+    parser.add_argument('--matches', type=int, default=5)
+    parser.add_argument('--comments', type=int, default=50000, help='Comments per match')
+    parser.add_argument('--players', type=int, default=40, help='Players per match')
+    args = parser.parse_args()
+
+    logging.getLogger('footypulse.bench').addHandler(logging.NullHandler())
+    logging.getLogger('footypulse.bench').propagate = False
+    with tempfile.TemporaryDirectory(prefix='footypulse-bench-') as work_dir:
+        matches: List[Tuple[str, str, str]] = []
+        for i in range(args.matches):
+            match_dir = os.path.join(work_dir, f'match{i:03d}')
+            thread_path, stats_path = write_match(match_dir, args.comments, args.players, seed=i)
+            matches.append((thread_path, stats_path, os.path.join(match_dir, 'scored.snap')))
+
+        # Without snapshots, every season query re-parses and re-scores every thread.
+        start = time.perf_counter()
+        expected = []
+        for thread, stats, _ in matches:
+            comments, totals = score_match(thread, stats, work_dir)
+            expected.append((totals, comments.label_counts()))
+        rescore = time.perf_counter() - start
+
+        for thread, stats, snap in matches:
+            write_snapshot(snap, score_match(thread, stats, work_dir)[0])
+        snapshot_bytes = sum(os.path.getsize(snap) for _, _, snap in matches)
+
+        start = time.perf_counter()
+        scanned = [snapshot_totals(snap) for _, _, snap in matches]
+        scan = time.perf_counter() - start
+        assert scanned == expected
+
+    total = args.matches * args.comments
+    print(f're-parse + re-score  {rescore:8.3f}s  {total / rescore:12,.0f} comments/s')
+    print(f'snapshot scan        {scan:8.3f}s  {total / scan:12,.0f} comments/s  '
+          f'({snapshot_bytes / 1e6:.1f} MB of snapshots, {rescore / scan:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
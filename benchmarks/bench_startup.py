@@ -0,0 +1,63 @@
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMMANDS = {
+    'help': ['agent_main.py', '--help'],
+    'import': ['-c', 'import agent_main'],
+}
+# Modules a plain `--help` must not pull in; each belongs to a stage or backend
+# that only some runs use.
+FORBIDDEN = ('numpy', 'urllib.request', 'asyncio', 'sqlite3', 'concurrent.futures', 'src.agents')
+
+
+def import_times(command: List[str]) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """Runs command under -X importtime; returns (self, cumulative) microseconds per module."""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', *command],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    own: Dict[str, int] = {}
+    cumulative: Dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        module = name.strip()
+        own[module] = int(self_us)
+        cumulative[module] = int(cumulative_us)
+    return own, cumulative
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='CLI import-time budget (python -X importtime)')
+    parser.add_argument('--command', choices=sorted(COMMANDS), default='help')
+    parser.add_argument('--budget-ms', type=float, default=60.0, help='Fail when total import time exceeds this')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs to take the best of (import time is noisy)')
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    runs = [import_times(COMMANDS[args.command]) for _ in range(max(args.repeat, 1))]
+    own, cumulative = min(runs, key=lambda run: sum(run[0].values()))
+    total_ms = sum(own.values()) / 1000
+    print(f'{args.command}: {len(own)} modules imported in {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)')
+    for module, us in sorted(cumulative.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f'  {us / 1000:7.1f} ms  {module}')
+
+    failures = [f'{module} is imported' for module in FORBIDDEN if module in own]
+    if total_ms > args.budget_ms:
+        failures.append(f'import time {total_ms:.1f} ms exceeds the {args.budget_ms:.0f} ms budget')
+    for failure in failures:
+        print(f'FAIL: {failure}')
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
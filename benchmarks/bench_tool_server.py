@@ -0,0 +1,59 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List
+from src.pipeline.tool_server import ToolClient
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentiles(samples: List[float]) -> str:
+    ordered = sorted(samples)
+
+    def rank(q: float) -> float:
+        return ordered[min(len(ordered) - 1, max(0, int(q * len(ordered) + 0.5) - 1))] * 1000
+
+    return f'p50 {rank(0.50):8.1f} ms  p99 {rank(0.99):8.1f} ms'
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Cold agent_main.py runs vs calls to a warm --serve tool server')
+    parser.add_argument('--thread', default='data/sample_reddit_thread.json')
+    parser.add_argument('--stats', default='data/sample_match_stats.json')
+    parser.add_argument('--calls', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='footypulse-bench-') as tmp_dir:
+        report = os.path.join(tmp_dir, 'report.md')
+        cold = []
+        for _ in range(args.calls):
+            start = time.perf_counter()
+            subprocess.run(
+                [sys.executable, 'agent_main.py', '--demo', '--thread', args.thread, '--stats', args.stats],
+                cwd=ROOT,
+                check=True,
+                capture_output=True,
+            )
+            cold.append(time.perf_counter() - start)
+        print(f'cold agent_main.py       {percentiles(cold)}')
+
+        with ToolClient() as client:
+            for tool, arguments in (
+                ('generate_report', {'output_path': report}),
+                ('player_impact', {}),
+                ('score_comments', {'limit': 0}),
+            ):
+                warm = []
+                for _ in range(args.calls):
+                    start = time.perf_counter()
+                    client.call(tool, thread_path=args.thread, stats_path=args.stats, match_id='bench', **arguments)
+                    warm.append(time.perf_counter() - start)
+                print(f'warm {tool:<19} {percentiles(warm)}')
+            print('server-side:', client.call('server_stats')['tools'])
+
+
+if __name__ == '__main__':
+    main()
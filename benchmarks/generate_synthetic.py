@@ -0,0 +1,32 @@
+import argparse
+import os
+from src.tools.synthetic_data import write_match
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Generate deterministic synthetic match threads and squads')
+    parser.add_argument('--out', default='data/synthetic', help='Output directory (one folder per match)')
+    parser.add_argument('--matches', type=int, default=1)
+    parser.add_argument('--comments', type=int, default=10000)
+    parser.add_argument('--players', type=int, default=40)
+    parser.add_argument('--mention-rate', type=float, default=0.2)
+    parser.add_argument('--duplicate-rate', type=float, default=0.0)
+    parser.add_argument('--json', action='store_true', help='Write thread.json instead of thread.jsonl')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    for i in range(args.matches):
+        thread_path, stats_path = write_match(
+            os.path.join(args.out, f'match{i + 1:03d}'),
+            num_comments=args.comments,
+            num_players=args.players,
+            seed=args.seed + i,
+            mention_rate=args.mention_rate,
+            duplicate_rate=args.duplicate_rate,
+            jsonl=not args.json,
+        )
+        print(f'{thread_path} ({args.comments} comments), {stats_path} ({args.players} players)')
+
+
+if __name__ == '__main__':
+    main()
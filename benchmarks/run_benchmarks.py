@@ -0,0 +1,228 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Tuple
+from src.tools.synthetic_data import write_match
+
+CASES = [
+    'reddit_data_agent',
+    'sentiment_agent',
+    'player_impact_agent',
+    'report_generator_agent',
+    'memory_bank',
+    'metrics',
+    'pipeline',
+]
+DEFAULT_SCALES = [1000, 10000, 100000]
+
+
+def _peak_rss_kb() -> int:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+
+def _run_case(
+    case: str, thread_path: str, stats_path: str, scale: int, work_dir: str, backend: str, sentiment_workers: int = 1
+) -> Tuple[float, int, Dict[str, float]]:
+    from src.observability.metrics import Metrics
+    from src.memory.memory_bank import MemoryBank
+    from src.memory.session_memory import SessionMemory
+    from src.agents.reddit_data_agent import RedditDataAgent
+    from src.agents.sentiment_agent import SentimentAnalysisAgent
+    from src.agents.player_impact_agent import PlayerImpactAgent
+    from src.agents.match_summary_agent import MatchSummaryAgent
+    from src.agents.report_generator_agent import ReportGeneratorAgent
+    from src.pipeline.match_pipeline import MatchInputs, run_match_pipeline
+    from src.models.domain_models import CommentBatch
+    from src.tools.player_index import PlayerMentionIndex
+
+    logger = logging.getLogger('footypulse.bench')
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+    metrics = Metrics(os.path.join(work_dir, 'counters.json'), flush_interval=float('inf'))
+    memory_bank = MemoryBank(os.path.join(work_dir, 'memory.jsonl'))
+    shared = dict(logger=logger, metrics=metrics, memory_bank=memory_bank, session_memory=SessionMemory())
+    index = PlayerMentionIndex.from_stats_file(stats_path)
+
+    def load() -> CommentBatch:
+        return RedditDataAgent(**shared, demo_mode=True, sample_path=thread_path).run()
+
+    def score(comments: CommentBatch) -> Any:
+        agent = SentimentAnalysisAgent(**shared, mention_index=index, backend=backend, workers=sentiment_workers)
+        try:
+            return agent.run(comments)
+        finally:
+            agent.close()
+
+    def impacts(comments: CommentBatch) -> Any:
+        return PlayerImpactAgent(
+            **shared, sample_stats_path=stats_path, demo_mode=True, mention_index=index, backend=backend
+        ).run(comments)
+
+    timed: Callable[[], Any]
+    if case == 'reddit_data_agent':
+        timed = load
+    elif case == 'sentiment_agent':
+        comments = load()
+        timed = lambda: score(comments)
+    elif case == 'player_impact_agent':
+        comments, _ = score(load())
+        timed = lambda: impacts(comments)
+    elif case == 'report_generator_agent':
+        comments, summary = score(load())
+        player_impacts = impacts(comments)
+        text = MatchSummaryAgent(**shared).run(summary, player_impacts)
+        report_agent = ReportGeneratorAgent(**shared, output_path=os.path.join(work_dir, 'report.md'))
+        timed = lambda: report_agent.run(comments, summary, player_impacts, text)
+    elif case == 'memory_bank':
+        timed = lambda: [memory_bank.append_entry({'type': 'bench', 'n': i}) for i in range(scale)]
+    elif case == 'metrics':
+        def timed() -> None:
+            for _ in range(scale):
+                metrics.increment('bench')
+            metrics.flush()
+    elif case == 'pipeline':
+        inputs = MatchInputs('bench', thread_path, stats_path, os.path.join(work_dir, 'pipeline.md'))
+        timed = lambda: run_match_pipeline(
+            inputs, logger, metrics, memory_bank, backend=backend, sentiment_workers=sentiment_workers
+        )
+    else:
+        raise ValueError(f'Unknown benchmark case: {case}')
+
+    start = time.perf_counter()
+    timed()
+    elapsed = time.perf_counter() - start
+    gauges = metrics.get_gauges()
+    metrics.close()
+    return elapsed, _peak_rss_kb(), gauges
+
+
+def _child_main(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory(prefix='footypulse-bench-') as work_dir:
+        elapsed, rss, gauges = _run_case(
+            args.case, args.thread, args.stats, args.scale, work_dir, args.backend, args.sentiment_workers
+        )
+    print(json.dumps({'seconds': elapsed, 'peak_rss_kb': rss, 'gauges': gauges}))
+
+
+def _ensure_data(data_dir: str, scale: int, players: int, mention_rate: float) -> Tuple[str, str]:
+    match_dir = os.path.join(data_dir, f'c{scale}_p{players}_m{mention_rate}')
+    thread_path = os.path.join(match_dir, 'thread.jsonl')
+    stats_path = os.path.join(match_dir, 'stats.json')
+    if not (os.path.exists(thread_path) and os.path.exists(stats_path)):
+        write_match(match_dir, scale, players, seed=scale, mention_rate=mention_rate)
+    return thread_path, stats_path
+
+
+def _compare(
+    results: List[Dict[str, Any]], baseline: Dict[str, Any], tolerance: float, min_seconds: float
+) -> List[str]:
+    previous = {(r['case'], r['scale']): r for r in baseline.get('results', [])}
+    regressions = []
+    for r in results:
+        old = previous.get((r['case'], r['scale']))
+        if old is None:
+            continue
+        # Sub-threshold timings are mostly scheduler noise; only their RSS is compared.
+        timed_long_enough = max(r['seconds'], old['seconds']) >= min_seconds
+        if timed_long_enough and r['items_per_sec'] < old['items_per_sec'] * (1 - tolerance):
+            regressions.append(
+                f"{r['case']}@{r['scale']}: throughput {r['items_per_sec']:,.0f}/s vs baseline "
+                f"{old['items_per_sec']:,.0f}/s"
+            )
+        if r['peak_rss_kb'] > old['peak_rss_kb'] * (1 + tolerance):
+            regressions.append(
+                f"{r['case']}@{r['scale']}: peak RSS {r['peak_rss_kb']} KB vs baseline {old['peak_rss_kb']} KB"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Agent and pipeline scaling benchmarks')
+    parser.add_argument('--cases', nargs='+', default=CASES, choices=CASES)
+    parser.add_argument('--scales', nargs='+', type=int, default=DEFAULT_SCALES)
+    parser.add_argument('--players', type=int, default=500)
+    parser.add_argument('--mention-rate', type=float, default=0.2)
+    parser.add_argument('--backend', choices=['auto', 'python', 'numpy'], default='python')
+    parser.add_argument(
+        '--sentiment-workers', type=int, default=1, help='Parallel sentiment workers (0 = one per CPU)'
+    )
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'footypulse-bench-data'))
+    parser.add_argument('--baseline', default='benchmarks/baseline.json')
+    parser.add_argument('--save-baseline', action='store_true', help='Overwrite the baseline with this run')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative slowdown / RSS growth')
+    parser.add_argument('--min-seconds', type=float, default=0.05, help='Ignore throughput of faster cases')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--case', help=argparse.SUPPRESS)
+    parser.add_argument('--scale', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--thread', help=argparse.SUPPRESS)
+    parser.add_argument('--stats', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child_main(args)
+        return
+
+    results: List[Dict[str, Any]] = []
+    print(f"{'case':<24}{'scale':>10}{'seconds':>10}{'items/s':>14}{'peak RSS MB':>13}")
+    for scale in args.scales:
+        thread_path, stats_path = _ensure_data(args.data_dir, scale, args.players, args.mention_rate)
+        for case in args.cases:
+            # One subprocess per case so peak RSS is not polluted by earlier cases.
+            out = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.run_benchmarks', '--child', '--case', case,
+                 '--scale', str(scale), '--thread', thread_path, '--stats', stats_path, '--backend', args.backend,
+                 '--sentiment-workers', str(args.sentiment_workers)],
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+            measured = json.loads(out.stdout.strip().splitlines()[-1])
+            row = {
+                'case': case,
+                'scale': scale,
+                'seconds': measured['seconds'],
+                'items_per_sec': scale / measured['seconds'] if measured['seconds'] else 0.0,
+                'peak_rss_kb': measured['peak_rss_kb'],
+            }
+            speedup = measured['gauges'].get('sentiment_parallel_speedup')
+            if speedup is not None:
+                row['sentiment_parallel_speedup'] = speedup
+            results.append(row)
+            print(f"{case:<24}{scale:>10}{row['seconds']:>10.3f}{row['items_per_sec']:>14,.0f}"
+                  f"{row['peak_rss_kb'] / 1024:>13.1f}" + (f"  (parallel speedup {speedup:.2f}x)" if speedup else ''))
+
+    run = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'players': args.players,
+        'mention_rate': args.mention_rate,
+        'backend': args.backend,
+        'sentiment_workers': args.sentiment_workers,
+        'results': results,
+    }
+    if args.save_baseline or not os.path.exists(args.baseline):
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(run, f, indent=2)
+        print(f'Baseline written to {args.baseline}')
+        return
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        regressions = _compare(results, json.load(f), args.tolerance, args.min_seconds)
+    if regressions:
+        print('Regressions against baseline:')
+        for line in regressions:
+            print(f'  {line}')
+        sys.exit(1)
+    print(f'No regressions against {args.baseline} (tolerance {args.tolerance:.0%})')
+
+
+if __name__ == '__main__':
+    main()
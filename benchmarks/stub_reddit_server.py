@@ -0,0 +1,120 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+
+class StubRedditServer:
+    """Local HTTP/1.1 keep-alive server serving paginated synthetic threads at /thread/<id>.json.
+
+    /moved/<id>.json redirects there and /empty/<id>.json answers 204 No
+    Content. With repeat_cursor the last page points back at page 1
+    instead of ending the thread.
+    """
+
+    def __init__(
+        self,
+        pages_per_thread: int = 5,
+        comments_per_page: int = 100,
+        latency: float = 0.01,
+        fail_every: int = 0,
+        fail_status: int = 503,
+        repeat_cursor: bool = False,
+    ) -> None:
+        self.pages_per_thread = pages_per_thread
+        self.comments_per_page = comments_per_page
+        self.latency = latency
+        self.fail_every = fail_every
+        self.fail_status = fail_status
+        self.repeat_cursor = repeat_cursor
+        self.requests = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        assert self._server is not None
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def thread_urls(self, count: int) -> List[str]:
+        return [f'{self.base_url}/thread/{i}.json' for i in range(count)]
+
+    def _page(self, thread_id: str, page: int) -> Dict[str, Any]:
+        start = page * self.comments_per_page
+        comments = [
+            {'author': f'user{n}', 'text': f'Thread {thread_id} comment {n}: great win', 'team': 'Red FC'}
+            for n in range(start, start + self.comments_per_page)
+        ]
+        if page + 1 < self.pages_per_thread:
+            after: Optional[str] = str(page + 1)
+        else:
+            after = '1' if self.repeat_cursor else None
+        return {'comments': comments, 'after': after}
+
+    def _respond(self, path: str) -> Tuple[int, Dict[str, str], bytes]:
+        with self._lock:
+            self.requests += 1
+            request_no = self.requests
+        if self.latency:
+            time.sleep(self.latency)
+        if self.fail_every and request_no % self.fail_every == 0:
+            return self.fail_status, {}, b'{"error": "try again"}'
+        parts = urlsplit(path)
+        if parts.path.startswith('/moved/'):
+            location = '/thread/' + parts.path[len('/moved/'):] + ('?' + parts.query if parts.query else '')
+            return 301, {'Location': location}, b''
+        if parts.path.startswith('/empty/'):
+            return 204, {}, b''
+        if not parts.path.startswith('/thread/'):
+            return 404, {}, b'{"error": "not found"}'
+        thread_id = parts.path[len('/thread/'):].rsplit('.', 1)[0]
+        page = int(parse_qs(parts.query).get('after', ['0'])[0])
+        return 200, {}, json.dumps(self._page(thread_id, page)).encode('utf-8')
+
+    def start(self) -> 'StubRedditServer':
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self) -> None:
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def do_GET(self) -> None:
+                status, headers, body = stub._respond(self.path)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                if status != 204:  # a 204 carries no body and no framing
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> 'StubRedditServer':
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
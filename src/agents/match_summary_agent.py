@@ -1,8 +1,10 @@
-from typing import List
+import heapq
+from typing import Dict, List, Optional, Tuple
 from src.models.domain_models import SentimentSummary, PlayerImpact
 from src.observability.metrics import Metrics
 from src.memory.memory_bank import MemoryBank
 from src.memory.session_memory import SessionMemory
+from src.tools.ranking import PlayerRanking
 import logging
 
 
@@ -18,8 +20,11 @@ class MatchSummaryAgent:
         self.metrics = metrics
         self.memory_bank = memory_bank
         self.session_memory = session_memory
+        self._live_players: Dict[str, PlayerImpact] = {}
+        self._live_order: Dict[str, int] = {}
+        self._live_heap: List[Tuple[float, int, str]] = []
 
-    def run(self, sentiment_summary: SentimentSummary, player_impacts: List[PlayerImpact]) -> str:
+    def _compose(self, sentiment_summary: SentimentSummary, top_player: Optional[PlayerImpact]) -> str:
         total = sentiment_summary.positive + sentiment_summary.negative + sentiment_summary.neutral
         if total == 0:
             mood_line = 'Fans did not share many thoughts about this match.'
@@ -32,9 +37,7 @@ class MatchSummaryAgent:
                 mood = 'mixed'
             mood_line = f'Fan mood was {mood}, based on {total} comments.'
 
-        if player_impacts:
-            sorted_players = sorted(player_impacts, key=lambda p: p.impact_score, reverse=True)
-            top_player = sorted_players[0]
+        if top_player is not None:
             top_line = (
                 f'The standout player was {top_player.player_name} for {top_player.team}, '
                 f'with an impact score of {top_player.impact_score}.'
@@ -42,7 +45,17 @@ class MatchSummaryAgent:
         else:
             top_line = 'Player impact data was limited for this match.'
 
-        summary = f'{mood_line} {top_line}'
+        return f'{mood_line} {top_line}'
+
+    def run(
+        self,
+        sentiment_summary: SentimentSummary,
+        player_impacts: List[PlayerImpact],
+        ranking: Optional[PlayerRanking] = None,
+    ) -> str:
+        if ranking is None:
+            ranking = PlayerRanking(player_impacts)
+        summary = self._compose(sentiment_summary, ranking.leader())
 
         self.metrics.increment('summaries_created', 1)
         self.logger.info('MatchSummaryAgent: created summary')
@@ -50,3 +63,41 @@ class MatchSummaryAgent:
         self.memory_bank.append_entry({'type': 'match_summary', 'summary': summary})
         self.session_memory.set('match_summary', summary)
         return summary
+
+    def start_live(self, player_impacts: List[PlayerImpact]) -> None:
+        self._live_players = {p.player_name: p for p in player_impacts}
+        self._live_order = {p.player_name: i for i, p in enumerate(player_impacts)}
+        self._live_heap = [(-p.impact_score, self._live_order[p.player_name], p.player_name) for p in player_impacts]
+        heapq.heapify(self._live_heap)
+
+    def live_top(self, n: int) -> List[PlayerImpact]:
+        # Lazy-deletion heap: entries whose score no longer matches the player are stale.
+        top: List[PlayerImpact] = []
+        kept: List[Tuple[float, int, str]] = []
+        seen = set()
+        while self._live_heap and len(top) < n:
+            entry = heapq.heappop(self._live_heap)
+            player = self._live_players.get(entry[2])
+            if player is None or -entry[0] != player.impact_score or entry[2] in seen:
+                continue
+            seen.add(entry[2])
+            top.append(player)
+            kept.append(entry)
+        for entry in kept:
+            heapq.heappush(self._live_heap, entry)
+        return top
+
+    def update_live(self, sentiment_summary: SentimentSummary, changed: List[PlayerImpact]) -> str:
+        for p in changed:
+            if p.player_name not in self._live_order:
+                self._live_order[p.player_name] = len(self._live_order)
+            self._live_players[p.player_name] = p
+            heapq.heappush(self._live_heap, (-p.impact_score, self._live_order[p.player_name], p.player_name))
+        if len(self._live_heap) > 4 * max(len(self._live_players), 16):
+            self.start_live(list(self._live_players.values()))
+
+        top = self.live_top(1)
+        summary = self._compose(sentiment_summary, top[0] if top else None)
+        self.metrics.increment('summaries_created', 1)
+        self.session_memory.set('match_summary', summary)
+        return summary
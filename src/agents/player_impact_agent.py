@@ -1,12 +1,24 @@
 import json
-from typing import List, Dict, Any
+from array import array
+from dataclasses import asdict
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Iterable, Iterator, Set, Tuple
 import os
 from src.observability.metrics import Metrics
 from src.memory.memory_bank import MemoryBank
 from src.memory.session_memory import SessionMemory
-from src.models.domain_models import PlayerImpact
+from src.models.domain_models import CommentBatch, PlayerImpact, StringTable
+from src.tools.player_index import PlayerMentionIndex
+from src.tools.ranking import PlayerRanking
+from src.tools.vector_scoring import impact_scores, resolve_backend, stats_matrix
 import logging
 
+if TYPE_CHECKING:
+    from src.tools.code_execution_helper import SnippetPool
+
+
+def compute_impact_score(goals: int, assists: int, cards: int, sentiment_score: float) -> float:
+    return goals * 3 + assists * 2 - cards + sentiment_score
+
 
 class PlayerImpactAgent:
     def __init__(
@@ -17,6 +29,10 @@ class PlayerImpactAgent:
         session_memory: SessionMemory,
         sample_stats_path: str,
         demo_mode: bool,
+        mention_index: Optional[PlayerMentionIndex] = None,
+        backend: str = 'python',
+        impact_formula: Optional[str] = None,
+        snippet_pool: Optional['SnippetPool'] = None,
     ) -> None:
         self.logger = logger
         self.metrics = metrics
@@ -24,53 +40,187 @@ class PlayerImpactAgent:
         self.session_memory = session_memory
         self.sample_stats_path = sample_stats_path
         self.demo_mode = demo_mode
+        self.mention_index = mention_index
+        self.backend = resolve_backend(backend)
+        self.impact_formula = impact_formula
+        self._snippet_pool = snippet_pool
+        self._owns_pool = snippet_pool is None
+        self._stats: Optional[Dict[str, Any]] = None
+        self._stats_mtime: Optional[float] = None
+        self._player_data: Optional[Tuple[Dict[str, Any], List[str], Any]] = None
+        self._live_sentiment: Dict[str, int] = {}
+        self._live_impacts: Dict[str, PlayerImpact] = {}
 
     def _load_stats(self) -> Dict[str, Any]:
+        if self._stats is not None:
+            return self._stats
         if not os.path.exists(self.sample_stats_path):
             raise FileNotFoundError(f'Stats file not found: {self.sample_stats_path}')
         with open(self.sample_stats_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+            self._stats = json.load(f)
+        return self._stats
 
-    def run(self, comments_with_sentiment: List[Dict[str, Any]]) -> List[PlayerImpact]:
+    def _players(self) -> List[Dict[str, Any]]:
+        return self._load_stats().get('players', [])
+
+    def prepare(self) -> Tuple[List[str], Any]:
+        """Loads the stats file and builds the per-player data (names and, off
+        the python backend, the goals/assists/cards matrix).
+
+        Needs only the stats file, so the pipeline runs it alongside fetch and
+        sentiment scoring; rebuilt whenever the stats are reloaded.
+        """
         stats = self._load_stats()
-        players_raw = stats.get('players', [])
+        if self._player_data is None or self._player_data[0] is not stats:
+            players = self._players()
+            names = [player.get('name', 'unknown') for player in players]
+            matrix = None if self.backend == 'python' else stats_matrix(players)
+            self._player_data = (stats, names, matrix)
+        return self._player_data[1], self._player_data[2]
 
-        sentiment_by_player: Dict[str, int] = {}
-        for c in comments_with_sentiment:
-            text = c.get('text', '').lower()
-            score = c.get('score', 0)
-            for player in players_raw:
-                name_lower = player.get('name', '').lower()
-                if name_lower and name_lower in text:
-                    sentiment_by_player[name_lower] = sentiment_by_player.get(name_lower, 0) + score
-
-        player_impacts: List[PlayerImpact] = []
-        for player in players_raw:
-            name = player.get('name', 'unknown')
-            team = player.get('team', 'unknown')
-            goals = int(player.get('goals', 0))
-            assists = int(player.get('assists', 0))
-            cards = int(player.get('cards', 0))
-            sentiment_score = sentiment_by_player.get(name.lower(), 0)
-            impact_score = goals * 3 + assists * 2 - cards + sentiment_score
-
-            player_impacts.append(
-                PlayerImpact(
-                    player_name=name,
-                    team=team,
-                    goals=goals,
-                    assists=assists,
-                    cards=cards,
-                    sentiment_score=sentiment_score,
-                    impact_score=impact_score,
-                )
+    def _resolve_mentions(self, batch: CommentBatch) -> None:
+        if self.mention_index is None:
+            self.mention_index = PlayerMentionIndex(self._players())
+        find_mentions = self.mention_index.find_mentions
+        rows = array('I')
+        player_ids = array('I')
+        players = StringTable()
+        for i, text in enumerate(batch.texts):
+            for name in find_mentions(text):
+                rows.append(i)
+                player_ids.append(players.intern(name))
+        batch.set_mentions(rows, player_ids, players)
+
+    def accumulate(
+        self, batches: Iterable[CommentBatch], sentiment_by_player: Dict[str, int]
+    ) -> Iterator[CommentBatch]:
+        # Only (comment, player) mention pairs are visited, not every comment.
+        for batch in batches:
+            if not batch.has_mentions:
+                self._resolve_mentions(batch)
+            names = batch.players.values
+            scores = batch.scores
+            for row, player_id in zip(batch.mention_rows, batch.mention_players):
+                name = names[player_id]
+                sentiment_by_player[name] = sentiment_by_player.get(name, 0) + scores[row]
+            yield batch
+
+    def _build_impact(self, player: Dict[str, Any], sentiment_by_player: Dict[str, int]) -> PlayerImpact:
+        name = player.get('name', 'unknown')
+        goals = int(player.get('goals', 0))
+        assists = int(player.get('assists', 0))
+        cards = int(player.get('cards', 0))
+        sentiment_score = sentiment_by_player.get(name, 0)
+        return PlayerImpact(
+            player_name=name,
+            team=player.get('team', 'unknown'),
+            goals=goals,
+            assists=assists,
+            cards=cards,
+            sentiment_score=sentiment_score,
+            impact_score=compute_impact_score(goals, assists, cards, sentiment_score),
+        )
+
+    def _apply_formula(self, impacts: List[PlayerImpact]) -> List[PlayerImpact]:
+        # A custom formula sees each player's fields (impact_score holds the
+        # default score) and runs in limited worker processes, one round trip
+        # per batch of players rather than one per player.
+        if self.impact_formula is None or not impacts:
+            return impacts
+        if self._snippet_pool is None:
+            from src.tools.code_execution_helper import SnippetPool
+
+            self._snippet_pool = SnippetPool(metrics=self.metrics)
+        for impact, score in zip(impacts, self._snippet_pool.evaluate(self.impact_formula, impacts)):
+            impact.impact_score = score
+        return impacts
+
+    def _build_impacts(self, sentiment_by_player: Dict[str, int]) -> List[PlayerImpact]:
+        return self._apply_formula(self._default_impacts(sentiment_by_player))
+
+    def _default_impacts(self, sentiment_by_player: Dict[str, int]) -> List[PlayerImpact]:
+        names, stats = self.prepare()
+        players = self._players()
+        if stats is None:
+            return [self._build_impact(player, sentiment_by_player) for player in players]
+        sentiment = [sentiment_by_player.get(name, 0) for name in names]
+        return [
+            PlayerImpact(
+                player_name=name,
+                team=player.get('team', 'unknown'),
+                goals=goals,
+                assists=assists,
+                cards=cards,
+                sentiment_score=sentiment_score,
+                impact_score=impact_score,
+            )
+            for name, player, (goals, assists, cards), sentiment_score, impact_score in zip(
+                names, players, stats.tolist(), sentiment, impact_scores(stats, sentiment)
             )
+        ]
+
+    def finalize(self, sentiment_by_player: Dict[str, int]) -> List[PlayerImpact]:
+        player_impacts = self._build_impacts(sentiment_by_player)
 
         self.metrics.increment('players_scored', len(player_impacts))
         self.logger.info(f'PlayerImpactAgent: computed impact for {len(player_impacts)} players')
 
-        top_sorted = sorted(player_impacts, key=lambda p: p.impact_score, reverse=True)
-        top_names = [p.player_name for p in top_sorted[:3]]
-        self.memory_bank.append_entry({'type': 'player_impact', 'top_players': top_names})
-        self.session_memory.set('player_impacts', [p.__dict__ for p in player_impacts])
+        ranking = PlayerRanking(player_impacts)
+        top_names = [p.player_name for p in ranking.top(3)]
+        self.memory_bank.append_entry(
+            {'type': 'player_impact', 'top_players': top_names, 'players': [asdict(p) for p in player_impacts]}
+        )
+        self.session_memory.set('player_impacts', player_impacts)
+        self.session_memory.set('player_ranking', ranking)
         return player_impacts
+
+    def run(self, comments_with_sentiment: CommentBatch) -> List[PlayerImpact]:
+        sentiment_by_player: Dict[str, int] = {}
+        for _ in self.accumulate([comments_with_sentiment], sentiment_by_player):
+            pass
+        return self.finalize(sentiment_by_player)
+
+    def start_live(self) -> List[PlayerImpact]:
+        self._stats = None
+        self._stats_mtime = os.path.getmtime(self.sample_stats_path)
+        self._live_sentiment = {}
+        self._live_impacts = {impact.player_name: impact for impact in self._build_impacts(self._live_sentiment)}
+        return list(self._live_impacts.values())
+
+    def update_live(self, new_comments: CommentBatch) -> Tuple[List[PlayerImpact], List[PlayerImpact]]:
+        # Returns (all impacts, impacts that changed this tick). Only players mentioned
+        # in the new comments are touched unless the stats file itself was updated.
+        touched: Set[str] = set()
+        for batch in self.accumulate([new_comments], self._live_sentiment):
+            touched.update(batch.players.values[p] for p in batch.mention_players)
+
+        # A stats update rebuilds every impact, from sentiment that already includes this tick.
+        mtime = os.path.getmtime(self.sample_stats_path)
+        stats_changed = mtime != self._stats_mtime
+        if stats_changed:
+            self._stats = None
+            self._stats_mtime = mtime
+            self._live_impacts = {
+                impact.player_name: impact for impact in self._build_impacts(self._live_sentiment)
+            }
+            changed = list(self._live_impacts.values())
+        else:
+            changed = []
+            for name in touched:
+                impact = self._live_impacts.get(name)
+                if impact is None:
+                    continue
+                impact.sentiment_score = self._live_sentiment.get(name, 0)
+                impact.impact_score = compute_impact_score(
+                    impact.goals, impact.assists, impact.cards, impact.sentiment_score
+                )
+                changed.append(impact)
+            self._apply_formula(changed)
+
+        self.metrics.increment('players_scored', len(changed))
+        return list(self._live_impacts.values()), changed
+
+    def close(self) -> None:
+        if self._snippet_pool is not None and self._owns_pool:
+            self._snippet_pool.close()
+            self._snippet_pool = None
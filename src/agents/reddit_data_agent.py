@@ -1,11 +1,14 @@
-from typing import List, Dict, Any
+from typing import TYPE_CHECKING, List, Dict, Any, Iterator, Optional
+from src.models.domain_models import DEFAULT_BATCH_SIZE, CommentBatch, iter_batches
 from src.tools.reddit_fetcher import RedditFetcher
-from src.models.domain_models import map_comments_from_raw
 from src.observability.metrics import Metrics
 from src.memory.memory_bank import MemoryBank
 from src.memory.session_memory import SessionMemory
 import logging
 
+if TYPE_CHECKING:
+    from src.tools.async_reddit_fetcher import AsyncRedditFetcher
+
 
 class RedditDataAgent:
     def __init__(
@@ -16,6 +19,8 @@ class RedditDataAgent:
         session_memory: SessionMemory,
         demo_mode: bool,
         sample_path: str,
+        thread_urls: Optional[List[str]] = None,
+        async_fetcher: Optional['AsyncRedditFetcher'] = None,
     ) -> None:
         self.logger = logger
         self.metrics = metrics
@@ -24,32 +29,68 @@ class RedditDataAgent:
         self.demo_mode = demo_mode
         self.sample_path = sample_path
         self.fetcher = RedditFetcher()
+        self.thread_urls = thread_urls or []
+        self._async_fetcher = async_fetcher
+        self.live_offset = 0
+        self.live_restarted = False  # the last poll started the thread file over (truncated or replaced)
+
+    @property
+    def async_fetcher(self) -> 'AsyncRedditFetcher':
+        # asyncio and ssl are only imported by runs that fetch URLs.
+        if self._async_fetcher is None:
+            from src.tools.async_reddit_fetcher import AsyncRedditFetcher
+
+            self._async_fetcher = AsyncRedditFetcher()
+        return self._async_fetcher
+
+    def _fetch_urls(self) -> List[Dict[str, Any]]:
+        self.logger.info(f'RedditDataAgent: fetching {len(self.thread_urls)} threads concurrently')
+        before = dict(self.async_fetcher.stats)
+        raw_comments = self.async_fetcher.fetch_all(self.thread_urls)
+        for key, value in self.async_fetcher.stats.items():
+            self.metrics.increment(f'fetch_{key}', value - before.get(key, 0))
+        return raw_comments
 
-    def run(self) -> List[Dict[str, Any]]:
+    def _raw_comments(self) -> Iterator[Dict[str, Any]]:
         if self.demo_mode:
-            self.logger.info('RedditDataAgent: loading sample data from file')
-            raw_comments = self.fetcher.load_from_file(self.sample_path)
+            self.logger.info('RedditDataAgent: streaming sample data from file')
+        elif self.thread_urls:
+            return iter(self._fetch_urls())
         else:
-            self.logger.info('RedditDataAgent: demo_mode is False, using sample file for now')
-            raw_comments = self.fetcher.load_from_file(self.sample_path)
-
-        self.metrics.increment('comments_loaded', len(raw_comments))
-        self.logger.info(f'RedditDataAgent: loaded {len(raw_comments)} comments')
-
-        comments = map_comments_from_raw(raw_comments)
-        self.session_memory.set('raw_comments', raw_comments)
-
-        self.memory_bank.append_entry({'type': 'reddit_fetch', 'num_comments': len(raw_comments)})
-
-        comments_dicts = []
-        for c in comments:
-            comments_dicts.append(
-                {
-                    'author': c.author,
-                    'text': c.text,
-                    'team': c.team,
-                    'sentiment': c.sentiment,
-                    'score': c.score,
-                }
-            )
-        return comments_dicts
+            self.logger.info('RedditDataAgent: no thread URLs given, using sample file')
+        return self.fetcher.iter_from_file(self.sample_path)
+
+    def _record_loaded(self, count: int) -> None:
+        self.metrics.increment('comments_loaded', count)
+        self.logger.info(f'RedditDataAgent: loaded {count} comments')
+        self.session_memory.set('num_comments', count)
+        self.memory_bank.append_entry({'type': 'reddit_fetch', 'num_comments': count})
+
+    def iter_batches(self, batch_size: int = DEFAULT_BATCH_SIZE, record: bool = True) -> Iterator[CommentBatch]:
+        # record=False re-reads the source (e.g. for a report appendix) without
+        # counting the comments again.
+        count = 0
+        for batch in iter_batches(self._raw_comments(), batch_size):
+            count += len(batch)
+            yield batch
+        if record:
+            self._record_loaded(count)
+
+    def run(self) -> CommentBatch:
+        comments = CommentBatch.from_dicts(self._raw_comments())
+        self._record_loaded(len(comments))
+        self.session_memory.set('raw_comments', comments)
+        return comments
+
+    def poll_new_comments(self) -> CommentBatch:
+        previous = self.live_offset
+        raw_comments, self.live_offset = self.fetcher.read_new_lines(self.sample_path, self.live_offset)
+        # Offsets only grow while the file is appended to; a smaller one means it was read from the start.
+        self.live_restarted = self.live_offset < previous
+        if self.live_restarted:
+            self.logger.warning(f'RedditDataAgent: {self.sample_path} was truncated, reading it from the start')
+        comments = CommentBatch.from_dicts(raw_comments)
+        if comments:
+            self.metrics.increment('comments_loaded', len(comments))
+            self.logger.info(f'RedditDataAgent: {len(comments)} new comments (offset {self.live_offset})')
+        return comments
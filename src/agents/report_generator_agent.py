@@ -1,8 +1,11 @@
-from typing import List, Dict, Any
+from typing import Callable, Iterable, List, Optional
 from src.observability.metrics import Metrics
 from src.memory.memory_bank import MemoryBank
 from src.memory.session_memory import SessionMemory
-from src.models.domain_models import PlayerImpact, SentimentSummary
+from src.models.domain_models import Comment, PlayerImpact, SentimentSummary
+from src.tools.ranking import PlayerRanking
+from src.tools.report_writers import ReportContent, format_for_path, renderer, write_report
+import itertools
 import logging
 import os
 
@@ -15,58 +18,54 @@ class ReportGeneratorAgent:
         memory_bank: MemoryBank,
         session_memory: SessionMemory,
         output_path: str,
+        rank_by: Optional[str] = None,
+        formats: Optional[List[str]] = None,
+        appendix_page_size: int = 0,
     ) -> None:
         self.logger = logger
         self.metrics = metrics
         self.memory_bank = memory_bank
         self.session_memory = session_memory
         self.output_path = output_path
+        self.rank_by = rank_by
+        self.formats = [f for f in (formats or []) if f != format_for_path(output_path)]
+        self.appendix_page_size = appendix_page_size
+        for fmt in self.formats:
+            renderer(fmt)  # fail fast on unknown formats, before any agent runs
 
     def run(
         self,
-        comments_with_sentiment: List[Dict[str, Any]],
+        comments_with_sentiment: Iterable[Comment],
         sentiment_summary: SentimentSummary,
         player_impacts: List[PlayerImpact],
         match_summary: str,
+        ranking: Optional[PlayerRanking] = None,
+        all_comments: Optional[Callable[[], Iterable[Comment]]] = None,
     ) -> str:
-        os.makedirs(os.path.dirname(self.output_path), exist_ok=True)
-
-        lines: List[str] = []
-        lines.append('# FootyPulse Match Intelligence Report\n')
-        lines.append('## 1. High-level Summary\n')
-        lines.append(match_summary + '\n')
-
-        lines.append('## 2. Crowd Sentiment Overview\n')
-        lines.append(
-            f'- Positive: {sentiment_summary.positive}\n'
-            f'- Negative: {sentiment_summary.negative}\n'
-            f'- Neutral: {sentiment_summary.neutral}\n'
+        content = ReportContent(
+            match_summary=match_summary,
+            sentiment_summary=sentiment_summary,
+            players=player_impacts,
+            sample_comments=list(itertools.islice(comments_with_sentiment, 10)),
         )
+        if self.rank_by is not None:
+            ranking = ranking if ranking is not None else PlayerRanking(player_impacts)
+            content.rank_by = self.rank_by
+            content.players = ranking.ranked(self.rank_by)
+            content.team_leaders = ranking.team_leaders(self.rank_by)
+        if all_comments is not None and self.appendix_page_size > 0:
+            content.all_comments = all_comments
+            content.page_size = self.appendix_page_size
 
-        lines.append('## 3. Player Impact Scores\n')
-        if player_impacts:
-            lines.append('| Player | Team | Goals | Assists | Cards | Sentiment | Impact |\n')
-            lines.append('|--------|------|-------|---------|-------|-----------|--------|\n')
-            for p in player_impacts:
-                lines.append(
-                    f'| {p.player_name} | {p.team} | {p.goals} | {p.assists} | {p.cards} | '
-                    f'{p.sentiment_score} | {p.impact_score} |\n'
-                )
-        else:
-            lines.append('Player impact data not available.\n')
-
-        lines.append('## 4. Sample Fan Comments\n')
-        for c in comments_with_sentiment[:10]:
-            author = c.get('author', 'unknown')
-            sentiment = c.get('sentiment', 'unknown')
-            text = c.get('text', '').replace('\n', ' ')
-            lines.append(f'- **{author}** ({sentiment}): {text}\n')
-
-        with open(self.output_path, 'w', encoding='utf-8') as f:
-            f.writelines(lines)
+        write_report(self.output_path, content)
+        base = os.path.splitext(self.output_path)[0]
+        for fmt in self.formats:
+            write_report(f'{base}.{fmt}', content, fmt)
 
         self.metrics.increment('reports_created', 1)
         self.logger.info(f'ReportGeneratorAgent: report written to {self.output_path}')
+        if self.formats:
+            self.logger.info(f"ReportGeneratorAgent: also rendered {', '.join(self.formats)}")
         self.memory_bank.append_entry({'type': 'report_created', 'path': self.output_path})
         self.session_memory.set('last_report_path', self.output_path)
         return self.output_path
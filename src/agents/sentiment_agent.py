@@ -1,10 +1,23 @@
-from typing import List, Dict, Any, Tuple
+from dataclasses import asdict
+from typing import Tuple, Optional, Iterable, Iterator
 from src.observability.metrics import Metrics
 from src.memory.memory_bank import MemoryBank
 from src.memory.session_memory import SessionMemory
-from src.models.domain_models import SentimentSummary
+from src.models.domain_models import DEFAULT_BATCH_SIZE, CommentBatch, SentimentSummary
+from src.tools.sentiment_lexicon import SentimentLexicon
+from src.tools.player_index import PlayerMentionIndex
+from src.tools.parallel_scoring import DEFAULT_PARALLEL_CHUNK, ChunkScorer, ParallelScorer
+from src.tools.vector_scoring import resolve_backend
+from src.tools.dedup import CommentDeduper, ScoreMemo
 import logging
 
+POSITIVE_WORDS = frozenset({'great','amazing','good','love','fantastic','brilliant','excellent','win'})
+NEGATIVE_WORDS = frozenset({'bad','terrible','awful','hate','worst','poor','lose','loss'})
+
+
+def default_lexicon() -> SentimentLexicon:
+    return SentimentLexicon.from_word_sets(POSITIVE_WORDS, NEGATIVE_WORDS)
+
 
 class SentimentAnalysisAgent:
     def __init__(
@@ -13,57 +26,122 @@ class SentimentAnalysisAgent:
         metrics: Metrics,
         memory_bank: MemoryBank,
         session_memory: SessionMemory,
+        lexicon: Optional[SentimentLexicon] = None,
+        mention_index: Optional[PlayerMentionIndex] = None,
+        backend: str = 'python',
+        chunk_size: int = DEFAULT_BATCH_SIZE,
+        workers: int = 1,
+        parallel_chunk_size: int = DEFAULT_PARALLEL_CHUNK,
+        dedup: bool = False,
+        near_duplicate_threshold: Optional[float] = None,
+        score_memo: Optional[ScoreMemo] = None,
     ) -> None:
         self.logger = logger
         self.metrics = metrics
         self.memory_bank = memory_bank
         self.session_memory = session_memory
+        self.mention_index = mention_index
+
+        self.lexicon = lexicon if lexicon is not None else default_lexicon()
+        self.live_summary = SentimentSummary(positive=0, negative=0, neutral=0)
+        self.backend = resolve_backend(backend)
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.parallel_chunk_size = parallel_chunk_size
+        self.dedup = dedup
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self._parallel: Optional[ParallelScorer] = None
+        self._deduper: Optional[CommentDeduper] = None
+        self._build_scorers(score_memo)
+
+    def _build_scorers(self, score_memo: Optional[ScoreMemo] = None) -> None:
+        # workers=1 scores in this process; 0 means one worker per CPU.
+        if self.workers != 1:
+            self._parallel = ParallelScorer(
+                self.lexicon,
+                self.mention_index,
+                self.backend,
+                workers=self.workers or None,
+                chunk_size=self.parallel_chunk_size,
+                metrics=self.metrics,
+            )
+        if self._parallel is not None:
+            self._scorer = self._parallel.serial
+        else:
+            self._scorer = ChunkScorer(self.lexicon, self.mention_index, self.backend)
+        # Duplicate comments are scored once; the memo carries scores across batches and runs.
+        if self.dedup:
+            index = self.mention_index
+            fingerprint = f"{self.lexicon.fingerprint()}:{index.fingerprint() if index else '-'}"
+            self._deduper = CommentDeduper(
+                fingerprint, memo=score_memo, near_threshold=self.near_duplicate_threshold, metrics=self.metrics
+            )
+
+    def set_mention_index(self, mention_index: Optional[PlayerMentionIndex]) -> None:
+        """Resolves mentions against a new player list from the next batch on
+        (e.g. when a live match's stats file gains players)."""
+        self.close()
+        memo = self._deduper.memo if self._deduper is not None else None
+        self.mention_index = mention_index
+        self._build_scorers(memo)  # the memo is keyed by the player list, so it starts over
+
+    def _score(self, batch: CommentBatch) -> CommentBatch:
+        if self._parallel is not None:
+            return self._parallel.score_batch(batch)
+        return self._scorer.score_into(batch, self.chunk_size)
 
-        self.positive_words = {'great','amazing','good','love','fantastic','brilliant','excellent','win'}
-        self.negative_words = {'bad','terrible','awful','hate','worst','poor','lose','loss'}
-
-    def _score_comment(self, text: str) -> int:
-        text_lower = text.lower()
-        score = 0
-        for w in self.positive_words:
-            if w in text_lower:
-                score += 1
-        for w in self.negative_words:
-            if w in text_lower:
-                score -= 1
-        return score
-
-    def _label_from_score(self, score: int) -> str:
-        if score > 0:
-            return 'positive'
-        if score < 0:
-            return 'negative'
-        return 'neutral'
-
-    def run(self, comments: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], SentimentSummary]:
-        positive = 0
-        negative = 0
-        neutral = 0
-
-        for c in comments:
-            score = self._score_comment(c.get('text', ''))
-            label = self._label_from_score(score)
-            c['score'] = score
-            c['sentiment'] = label
-
-            if label == 'positive':
-                positive += 1
-            elif label == 'negative':
-                negative += 1
-            else:
-                neutral += 1
-
-        self.metrics.increment('comments_scored', len(comments))
-        self.logger.info(f'SentimentAnalysisAgent: scored {len(comments)} comments')
-
-        summary = SentimentSummary(positive=positive, negative=negative, neutral=neutral)
-        self.session_memory.set('sentiment_summary', summary.__dict__)
+    def score_batch(self, batch: CommentBatch, summary: SentimentSummary) -> CommentBatch:
+        if self._deduper is not None:
+            self._deduper.score_batch(batch, self._score, with_mentions=self.mention_index is not None)
+        else:
+            self._score(batch)
+        counts = batch.label_counts()
+        summary.positive += counts['positive']
+        summary.negative += counts['negative']
+        summary.neutral += counts['neutral']
+        return batch
+
+    def score_stream(self, batches: Iterable[CommentBatch], summary: SentimentSummary) -> Iterator[CommentBatch]:
+        for batch in batches:
+            yield self.score_batch(batch, summary)
+
+    def finalize(self, summary: SentimentSummary) -> SentimentSummary:
+        total = summary.positive + summary.negative + summary.neutral
+        self.metrics.increment('comments_scored', total)
+        self.logger.info(f'SentimentAnalysisAgent: scored {total} comments')
+        if self._deduper is not None:
+            self.logger.info(
+                f'SentimentAnalysisAgent: {self._deduper.scored} distinct texts scored, '
+                f'dedup ratio {self._deduper.ratio:.1%}, about {self._deduper.seconds_saved:.3f}s saved'
+            )
+
+        self.session_memory.set('sentiment_summary', asdict(summary))
         self.memory_bank.append_entry(
-            {'type': 'sentiment_summary', 'positive': positive, 'negative': negative, 'neutral': neutral}
+            {
+                'type': 'sentiment_summary',
+                'positive': summary.positive,
+                'negative': summary.negative,
+                'neutral': summary.neutral,
+            }
         )
-        return comments, summary
+        return summary
+
+    def run(self, comments: CommentBatch) -> Tuple[CommentBatch, SentimentSummary]:
+        summary = SentimentSummary(positive=0, negative=0, neutral=0)
+        self.score_batch(comments, summary)
+        return comments, self.finalize(summary)
+
+    def close(self) -> None:
+        if self._parallel is not None:
+            self._parallel.close()
+            self._parallel = None
+
+    def start_live(self) -> SentimentSummary:
+        self.live_summary = SentimentSummary(positive=0, negative=0, neutral=0)
+        return self.live_summary
+
+    def update_live(self, new_comments: CommentBatch) -> SentimentSummary:
+        self.score_batch(new_comments, self.live_summary)
+        self.metrics.increment('comments_scored', len(new_comments))
+        self.session_memory.set('sentiment_summary', asdict(self.live_summary))
+        return self.live_summary
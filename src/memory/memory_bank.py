@@ -1,27 +1,244 @@
 import json
 import os
-from typing import Any, List, Dict
+import time
+from typing import Any, Iterable, List, Dict, Optional, Sequence
+from src.tools.file_utils import atomic_write_lines, file_lock
+
+HISTORY_LIMIT = 20
+TEAM_TOTAL_COLUMNS = ('goals', 'assists', 'cards', 'sentiment_score', 'impact_score')
+
+
+def player_rows(entry: Dict[str, Any]) -> List[Dict[str, Any]]:
+    # Per-player impact rows of a 'player_impact' entry, stamped with the entry's match and time.
+    return [
+        dict(player, match_id=entry.get('match_id'), ts=entry.get('ts', 0)) for player in entry.get('players', [])
+    ]
+
+
+def team_totals(rows: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    totals: Dict[str, Any] = dict.fromkeys(('players',) + TEAM_TOTAL_COLUMNS, 0)
+    for row in rows:
+        totals['players'] += 1
+        for key in TEAM_TOTAL_COLUMNS:
+            totals[key] += row.get(key, 0)
+    return totals
+
+
+class BoundMemoryBank:
+    """A memory bank view that stamps fixed fields (e.g. match_id) onto every entry."""
+
+    def __init__(self, bank: Any, **fields: Any) -> None:
+        self.bank = bank
+        self.fields = fields
+
+    def append_entry(self, entry: Dict[str, Any]) -> None:
+        self.bank.append_entry({**self.fields, **entry})
+
+    def append_entries(self, entries: Iterable[Dict[str, Any]]) -> None:
+        self.bank.append_entries({**self.fields, **entry} for entry in entries)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.bank, name)
 
 
 class MemoryBank:
-    def __init__(self, memory_path: str) -> None:
+    def __init__(
+        self,
+        memory_path: str,
+        compact_every: int = 1000,
+        max_entries: Optional[int] = None,
+        fsync: bool = False,
+    ) -> None:
         self.memory_path = memory_path
-        os.makedirs(os.path.dirname(memory_path), exist_ok=True)
-        if not os.path.exists(memory_path):
-            self._write_memory([])
+        self.compact_every = compact_every
+        self.max_entries = max_entries
+        self.fsync = fsync
+        self._entries: List[Dict[str, Any]] = []
+        self._by_type: Dict[str, List[int]] = {}
+        self._appends_since_compaction = 0
+        # The journal is read on the first query or compaction, not at startup:
+        # runs that only append never parse it.
+        self._loaded = False
+        self._journal_checked = False
+
+        directory = os.path.dirname(memory_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        if self._read():
+            self.compact()
+
+    def _read(self) -> bool:
+        self._loaded = True
+        self._entries = []
+        self._by_type = {}
+        if os.path.exists(self.memory_path):
+            return self._load_journal()
+        return self._import_legacy_json()
 
-    def _read_memory(self) -> List[Dict[str, Any]]:
+    def _check_journal(self) -> None:
+        # Before the first append: import a legacy file, or repair a torn last
+        # line that the new entry would otherwise be glued onto.
+        self._journal_checked = True
+        if not os.path.exists(self.memory_path):
+            if self.legacy_path != self.memory_path and os.path.exists(self.legacy_path):
+                self._load()
+            return
+        with open(self.memory_path, 'rb') as f:
+            size = f.seek(0, os.SEEK_END)
+            if not size:
+                return
+            f.seek(size - 1)
+            torn = f.read(1) != b'\n'
+        if torn:
+            self._load()
+
+    @property
+    def legacy_path(self) -> str:
+        return os.path.splitext(self.memory_path)[0] + '.json'
+
+    def _index(self, entry: Dict[str, Any]) -> None:
+        self._by_type.setdefault(entry.get('type', 'unknown'), []).append(len(self._entries))
+        self._entries.append(entry)
+
+    def _load_journal(self) -> bool:
+        needs_repair = False
         with open(self.memory_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+            for line in f:
+                if not line.endswith('\n'):
+                    # Torn final write from a crash: drop it and rewrite the journal.
+                    needs_repair = True
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    needs_repair = True
+                    continue
+                self._index(entry)
+        return needs_repair
+
+    def _import_legacy_json(self) -> bool:
+        if self.legacy_path == self.memory_path or not os.path.exists(self.legacy_path):
+            open(self.memory_path, 'a', encoding='utf-8').close()
+            return False
+        with open(self.legacy_path, 'r', encoding='utf-8') as f:
+            for entry in json.load(f):
+                self._index(entry)
+        return True
 
-    def _write_memory(self, data: List[Dict[str, Any]]) -> None:
-        with open(self.memory_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2)
+    def compact(self) -> None:
+        # Other processes may have appended since this one loaded the journal,
+        # so the rewrite starts from the file as it is now, with appends held off.
+        with file_lock(self.memory_path):
+            self._read()
+            self._rewrite()
+
+    def _rewrite(self) -> None:
+        if self.max_entries is not None and len(self._entries) > self.max_entries:
+            kept = self._entries[-self.max_entries:]
+            self._entries = []
+            self._by_type = {}
+            for entry in kept:
+                self._index(entry)
+        atomic_write_lines(
+            self.memory_path,
+            (json.dumps(entry, separators=(',', ':')) + '\n' for entry in self._entries),
+            fsync=True,
+        )
+        self._appends_since_compaction = 0
 
     def append_entry(self, entry: Dict[str, Any]) -> None:
-        data = self._read_memory()
-        data.append(entry)
-        self._write_memory(data)
+        self.append_entries([entry])
+
+    def append_entries(self, entries: Iterable[Dict[str, Any]]) -> None:
+        if not self._journal_checked:
+            self._check_journal()
+        stamped = []
+        for entry in entries:
+            entry = dict(entry)
+            entry.setdefault('ts', time.time())
+            stamped.append(entry)
+        if not stamped:
+            return
+        # Appenders share the lock; only compaction, which replaces the file, takes it exclusively.
+        with file_lock(self.memory_path, shared=True):
+            with open(self.memory_path, 'a', encoding='utf-8') as f:
+                f.writelines(json.dumps(entry, separators=(',', ':')) + '\n' for entry in stamped)
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+        if self._loaded:
+            for entry in stamped:
+                self._index(entry)
+
+        # Without a retention limit a rewrite would only reproduce the journal.
+        self._appends_since_compaction += len(stamped)
+        if self.max_entries is not None and self._appends_since_compaction >= self.compact_every:
+            self.compact()
+
+    def bind(self, **fields: Any) -> BoundMemoryBank:
+        return BoundMemoryBank(self, **fields)
+
+    def close(self) -> None:
+        pass
 
     def get_all(self) -> List[Dict[str, Any]]:
-        return self._read_memory()
+        self._load()
+        return list(self._entries)
+
+    def query(
+        self,
+        type: Optional[str] = None,
+        since: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        self._load()
+        if type is None:
+            candidates = self._entries
+        else:
+            candidates = [self._entries[i] for i in self._by_type.get(type, [])]
+        if since is not None:
+            candidates = [e for e in candidates if e.get('ts', 0) >= since]
+        if limit is not None:
+            candidates = candidates[-limit:]
+        return list(candidates)
+
+    # History queries scan the journal; the SQLite backend answers them from indexes.
+    def player_history(self, player_name: str, limit: int = HISTORY_LIMIT) -> List[Dict[str, Any]]:
+        rows = [
+            row
+            for entry in self.query('player_impact')
+            for row in player_rows(entry)
+            if row.get('player_name') == player_name
+        ]
+        return rows[-limit:]
+
+    def team_history(self, team: str, limit: int = HISTORY_LIMIT) -> List[Dict[str, Any]]:
+        history = []
+        for entry in self.query('player_impact'):
+            rows = [row for row in player_rows(entry) if row.get('team') == team]
+            if rows:
+                totals = team_totals(rows)
+                history.append(dict(totals, team=team, match_id=entry.get('match_id'), ts=entry.get('ts', 0)))
+        return history[-limit:]
+
+    def _match_history(
+        self, type: str, keys: Sequence[str], match_id: Optional[str], limit: int
+    ) -> List[Dict[str, Any]]:
+        entries = self.query(type)
+        if match_id is not None:
+            entries = [e for e in entries if e.get('match_id') == match_id]
+        return [{key: e.get(key, 0 if key != 'match_id' else None) for key in keys} for e in entries[-limit:]]
+
+    def sentiment_history(self, match_id: Optional[str] = None, limit: int = HISTORY_LIMIT) -> List[Dict[str, Any]]:
+        return self._match_history(
+            'sentiment_summary', ('match_id', 'ts', 'positive', 'negative', 'neutral'), match_id, limit
+        )
+
+    def match_summaries(self, match_id: Optional[str] = None, limit: int = HISTORY_LIMIT) -> List[Dict[str, Any]]:
+        return self._match_history('match_summary', ('match_id', 'ts', 'summary'), match_id, limit)
@@ -0,0 +1,275 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+from src.memory.memory_bank import HISTORY_LIMIT, TEAM_TOTAL_COLUMNS, BoundMemoryBank
+
+SCHEMA_VERSION = 1
+PLAYER_COLUMNS = ('player_name', 'team', 'goals', 'assists', 'cards', 'sentiment_score', 'impact_score')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    type TEXT NOT NULL,
+    match_id TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_type_ts ON entries (type, ts);
+CREATE TABLE IF NOT EXISTS match_summaries (
+    entry_id INTEGER PRIMARY KEY REFERENCES entries (id) ON DELETE CASCADE,
+    match_id TEXT,
+    ts REAL NOT NULL,
+    summary TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS match_summaries_match_ts ON match_summaries (match_id, ts);
+CREATE TABLE IF NOT EXISTS sentiment_snapshots (
+    entry_id INTEGER PRIMARY KEY REFERENCES entries (id) ON DELETE CASCADE,
+    match_id TEXT,
+    ts REAL NOT NULL,
+    positive INTEGER NOT NULL,
+    negative INTEGER NOT NULL,
+    neutral INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sentiment_snapshots_match_ts ON sentiment_snapshots (match_id, ts);
+CREATE TABLE IF NOT EXISTS player_impacts (
+    entry_id INTEGER NOT NULL REFERENCES entries (id) ON DELETE CASCADE,
+    match_id TEXT,
+    ts REAL NOT NULL,
+    player_name TEXT NOT NULL,
+    team TEXT NOT NULL,
+    goals INTEGER NOT NULL,
+    assists INTEGER NOT NULL,
+    cards INTEGER NOT NULL,
+    sentiment_score NUMERIC NOT NULL,
+    impact_score NUMERIC NOT NULL,
+    PRIMARY KEY (entry_id, player_name)
+);
+CREATE INDEX IF NOT EXISTS player_impacts_player_ts ON player_impacts (player_name, ts);
+CREATE INDEX IF NOT EXISTS player_impacts_team_ts ON player_impacts (team, ts);
+"""
+
+
+class SQLiteMemoryBank:
+    """Long-term memory in SQLite, with the same interface as MemoryBank.
+
+    Every entry is kept as JSON in the entries table; match summaries,
+    sentiment snapshots and per-player impacts are also written to indexed
+    tables, so history queries read a few rows instead of the whole journal.
+    The database runs in WAL mode and each write is one IMMEDIATE transaction,
+    so several processes (e.g. concurrent batch runs) can append to it at once;
+    writers wait up to busy_timeout seconds for the lock.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_entries: Optional[int] = None,
+        legacy_paths: Optional[Sequence[str]] = None,
+        busy_timeout: float = 30.0,
+    ) -> None:
+        self.db_path = db_path
+        self.memory_path = db_path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=busy_timeout, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('PRAGMA foreign_keys=ON')
+        # Statement by statement: executescript() would commit outside our transaction.
+        with self._transaction() as cur:
+            for statement in _SCHEMA.split(';'):
+                if statement.strip():
+                    cur.execute(statement)
+            cur.execute("INSERT OR IGNORE INTO meta VALUES ('schema_version', ?)", (str(SCHEMA_VERSION),))
+
+        if legacy_paths is None:
+            base = os.path.splitext(db_path)[0]
+            legacy_paths = (base + '.jsonl', base + '.json')
+        # Import the old journal once, when the database is first created.
+        if self._get_meta('migrated_from') is None:
+            source = next((path for path in legacy_paths if os.path.exists(path)), None)
+            entries = self._read_legacy(source) if source is not None else []
+            with self._transaction() as cur:
+                # Another process opening the new database may have imported it meanwhile.
+                if self._get_meta('migrated_from', cur) is None:
+                    self._import(cur, entries, source)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Cursor]:
+        # BEGIN IMMEDIATE takes the write lock up front, so concurrent writers
+        # queue on busy_timeout instead of failing on a read-to-write upgrade.
+        with self._lock:
+            cur = self._conn.cursor()
+            cur.execute('BEGIN IMMEDIATE')
+            try:
+                yield cur
+            except BaseException:
+                cur.execute('ROLLBACK')
+                raise
+            cur.execute('COMMIT')
+
+    def _get_meta(self, key: str, cur: Optional[sqlite3.Cursor] = None) -> Optional[str]:
+        row = (cur or self._conn).execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row['value'] if row else None
+
+    def _insert(self, cur: sqlite3.Cursor, entry: Dict[str, Any], stamp: bool = True) -> None:
+        # Imported entries keep their own time; legacy ones without any sort first, as in the journal.
+        entry = dict(entry)
+        if stamp:
+            entry.setdefault('ts', time.time())
+        kind = entry.get('type', 'unknown')
+        match_id = entry.get('match_id')
+        ts = entry.get('ts', 0)
+        cur.execute(
+            'INSERT INTO entries (ts, type, match_id, data) VALUES (?, ?, ?, ?)',
+            (ts, kind, match_id, json.dumps(entry, separators=(',', ':'))),
+        )
+        entry_id = cur.lastrowid
+        if kind == 'match_summary':
+            cur.execute(
+                'INSERT INTO match_summaries VALUES (?, ?, ?, ?)', (entry_id, match_id, ts, entry.get('summary', ''))
+            )
+        elif kind == 'sentiment_summary':
+            cur.execute(
+                'INSERT INTO sentiment_snapshots VALUES (?, ?, ?, ?, ?, ?)',
+                (entry_id, match_id, ts, entry.get('positive', 0), entry.get('negative', 0), entry.get('neutral', 0)),
+            )
+        elif kind == 'player_impact':
+            cur.executemany(
+                'INSERT OR REPLACE INTO player_impacts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (
+                    (entry_id, match_id, ts, row.get('player_name', 'unknown'), row.get('team', 'unknown'))
+                    + tuple(row.get(key, 0) for key in PLAYER_COLUMNS[2:])
+                    for row in entry.get('players', [])
+                ),
+            )
+
+    def _prune(self, cur: sqlite3.Cursor) -> None:
+        if self.max_entries is not None:
+            cur.execute(
+                'DELETE FROM entries WHERE id <= (SELECT id FROM entries ORDER BY id DESC LIMIT 1 OFFSET ?)',
+                (self.max_entries,),
+            )
+
+    def append_entry(self, entry: Dict[str, Any]) -> None:
+        self.append_entries([entry])
+
+    def append_entries(self, entries: Iterable[Dict[str, Any]]) -> None:
+        # One transaction for the whole group: a batch merge costs one commit.
+        with self._transaction() as cur:
+            for entry in entries:
+                self._insert(cur, entry)
+            self._prune(cur)
+
+    def bind(self, **fields: Any) -> BoundMemoryBank:
+        return BoundMemoryBank(self, **fields)
+
+    def migrate_from_json(self, path: str) -> int:
+        """Imports a legacy JSON list or a JSON Lines journal; returns the entry count."""
+        entries = self._read_legacy(path)
+        with self._transaction() as cur:
+            self._import(cur, entries, path)
+        return len(entries)
+
+    def _read_legacy(self, path: str) -> List[Dict[str, Any]]:
+        entries: List[Dict[str, Any]] = []
+        with open(path, 'r', encoding='utf-8') as f:
+            if path.endswith('.jsonl'):
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except json.JSONDecodeError:  # blank or torn journal line
+                        continue
+            else:
+                entries = json.load(f)
+        return entries
+
+    def _import(self, cur: sqlite3.Cursor, entries: List[Dict[str, Any]], path: Optional[str]) -> None:
+        for entry in entries:
+            self._insert(cur, entry, stamp=False)
+        self._prune(cur)
+        cur.execute(
+            "INSERT OR REPLACE INTO meta VALUES ('migrated_from', ?)", (os.path.abspath(path) if path else '',)
+        )
+
+    def compact(self) -> None:
+        with self._transaction() as cur:
+            self._prune(cur)
+        with self._lock:
+            self._conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _rows(self, sql: str, params: Sequence[Any] = ()) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def get_all(self) -> List[Dict[str, Any]]:
+        return [json.loads(row['data']) for row in self._rows('SELECT data FROM entries ORDER BY id')]
+
+    def query(
+        self,
+        type: Optional[str] = None,
+        since: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        clauses = []
+        params: List[Any] = []
+        if type is not None:
+            clauses.append('type = ?')
+            params.append(type)
+        if since is not None:
+            clauses.append('ts >= ?')
+            params.append(since)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        # Newest `limit` entries, returned oldest first like MemoryBank.query.
+        sql = f'SELECT id, data FROM entries {where} ORDER BY id DESC'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        return [json.loads(row['data']) for row in reversed(self._rows(sql, params))]
+
+    def _history(self, table: str, columns: str, where: str, params: Sequence[Any], limit: int) -> List[Dict[str, Any]]:
+        rows = self._rows(
+            f'SELECT {columns} FROM {table} {where} ORDER BY ts DESC, entry_id DESC LIMIT ?', (*params, limit)
+        )
+        rows.reverse()
+        return rows
+
+    def player_history(self, player_name: str, limit: int = HISTORY_LIMIT) -> List[Dict[str, Any]]:
+        return self._history(
+            'player_impacts', ', '.join(PLAYER_COLUMNS + ('match_id', 'ts')), 'WHERE player_name = ?',
+            (player_name,), limit,
+        )
+
+    def team_history(self, team: str, limit: int = HISTORY_LIMIT) -> List[Dict[str, Any]]:
+        totals = ', '.join(f'SUM({key}) AS {key}' for key in TEAM_TOTAL_COLUMNS)
+        return self._history(
+            'player_impacts',
+            f'team, match_id, ts, COUNT(*) AS players, {totals}',
+            'WHERE team = ? GROUP BY entry_id',
+            (team,),
+            limit,
+        )
+
+    def sentiment_history(self, match_id: Optional[str] = None, limit: int = HISTORY_LIMIT) -> List[Dict[str, Any]]:
+        where, params = ('WHERE match_id = ?', (match_id,)) if match_id is not None else ('', ())
+        return self._history(
+            'sentiment_snapshots', 'match_id, ts, positive, negative, neutral', where, params, limit
+        )
+
+    def match_summaries(self, match_id: Optional[str] = None, limit: int = HISTORY_LIMIT) -> List[Dict[str, Any]]:
+        where, params = ('WHERE match_id = ?', (match_id,)) if match_id is not None else ('', ())
+        return self._history('match_summaries', 'match_id, ts, summary', where, params, limit)
@@ -1,24 +1,31 @@
-from dataclasses import dataclass
-from typing import List, Dict, Any
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Iterable, Iterator, Sequence, Union, overload
 
+LABELS = ('unknown', 'positive', 'negative', 'neutral')
+LABEL_CODES = {label: code for code, label in enumerate(LABELS)}
+DEFAULT_BATCH_SIZE = 16384
 
-@dataclass
+
+@dataclass(slots=True)
 class Comment:
     author: str
     text: str
     team: str
     sentiment: str = 'unknown'
     score: int = 0
+    mentions: List[str] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class SentimentSummary:
     positive: int
     negative: int
     neutral: int
 
 
-@dataclass
+@dataclass(slots=True)
 class PlayerImpact:
     player_name: str
     team: str
@@ -29,6 +36,166 @@ class PlayerImpact:
     impact_score: int
 
 
+class StringTable:
+    """Interns repeated strings (authors, teams, player names) as small integer ids."""
+
+    __slots__ = ('values', '_ids')
+
+    def __init__(self, values: Iterable[str] = ()) -> None:
+        self.values: List[str] = []
+        self._ids: Dict[str, int] = {}
+        for value in values:
+            self.intern(value)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getitem__(self, index: int) -> str:
+        return self.values[index]
+
+    def intern(self, value: str) -> int:
+        index = self._ids.get(value)
+        if index is None:
+            index = self._ids[value] = len(self.values)
+            self.values.append(value)
+        return index
+
+    def __getstate__(self) -> List[str]:
+        return self.values
+
+    def __setstate__(self, values: List[str]) -> None:
+        self.values = values
+        self._ids = {value: i for i, value in enumerate(values)}
+
+
+class CommentBatch:
+    """Columnar comments: texts plus fixed-width arrays and interned string tables.
+
+    Agents fill scores, labels and mentions in place, so one batch flows from
+    fetch to report without per-comment dicts. Mentions are stored as parallel
+    (comment row, player id) arrays in row order.
+    """
+
+    __slots__ = (
+        'texts',
+        'authors',
+        'teams',
+        'author_ids',
+        'team_ids',
+        'scores',
+        'labels',
+        'players',
+        'mention_rows',
+        'mention_players',
+        'has_mentions',
+    )
+
+    def __init__(self) -> None:
+        self.texts: List[str] = []
+        self.authors = StringTable()
+        self.teams = StringTable()
+        self.author_ids = array('I')
+        self.team_ids = array('I')
+        self.scores: array = array('q')
+        self.labels = bytearray()
+        self.players = StringTable()
+        self.mention_rows = array('I')
+        self.mention_players = array('I')
+        self.has_mentions = False
+
+    @classmethod
+    def from_dicts(cls, items: Iterable[Dict[str, Any]]) -> 'CommentBatch':
+        batch = cls()
+        for item in items:
+            batch.append(item.get('author', 'unknown'), item.get('text', ''), item.get('team', 'unknown'))
+        return batch
+
+    @classmethod
+    def from_comments(cls, comments: Iterable[Comment]) -> 'CommentBatch':
+        batch = cls()
+        for c in comments:
+            row = len(batch)
+            batch.append(c.author, c.text, c.team, c.score, c.sentiment)
+            for name in c.mentions:
+                batch.mention_rows.append(row)
+                batch.mention_players.append(batch.players.intern(name))
+        batch.has_mentions = True
+        return batch
+
+    def append(
+        self, author: str, text: str, team: str, score: Union[int, float] = 0, sentiment: str = 'unknown'
+    ) -> None:
+        self.texts.append(text)
+        self.author_ids.append(self.authors.intern(author))
+        self.team_ids.append(self.teams.intern(team))
+        if isinstance(score, float) and self.scores.typecode == 'q':
+            self.scores = array('d', self.scores)
+        self.scores.append(score)
+        self.labels.append(LABEL_CODES[sentiment])
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def author(self, i: int) -> str:
+        return self.authors.values[self.author_ids[i]]
+
+    def team(self, i: int) -> str:
+        return self.teams.values[self.team_ids[i]]
+
+    def sentiment(self, i: int) -> str:
+        return LABELS[self.labels[i]]
+
+    def mentions(self, i: int) -> List[str]:
+        lo = bisect_left(self.mention_rows, i)
+        hi = bisect_right(self.mention_rows, i, lo)
+        names = self.players.values
+        return [names[p] for p in self.mention_players[lo:hi]]
+
+    def set_scores(self, scores: Sequence[Union[int, float]]) -> None:
+        typecode = 'q' if all(isinstance(s, int) for s in scores) else 'd'
+        self.scores = array(typecode, scores)
+
+    def set_mentions(self, rows: array, player_ids: array, players: StringTable) -> None:
+        self.mention_rows = rows
+        self.mention_players = player_ids
+        self.players = players
+        self.has_mentions = True
+
+    def label_counts(self) -> Dict[str, int]:
+        return {label: self.labels.count(code) for code, label in enumerate(LABELS)}
+
+    def comment(self, i: int) -> Comment:
+        return Comment(
+            author=self.author(i),
+            text=self.texts[i],
+            team=self.team(i),
+            sentiment=self.sentiment(i),
+            score=self.scores[i],
+            mentions=self.mentions(i),
+        )
+
+    @overload
+    def __getitem__(self, index: int) -> Comment: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> 'CommentBatch': ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Comment, 'CommentBatch']:
+        if isinstance(index, slice):
+            # Slices get their own string tables, so a small sample never drags
+            # the full author table along when it is cached or pickled.
+            return CommentBatch.from_comments(self.comment(i) for i in range(*index.indices(len(self))))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('CommentBatch index out of range')
+        return self.comment(index)
+
+    def __iter__(self) -> Iterator[Comment]:
+        for i in range(len(self)):
+            yield self.comment(i)
+
+
 def map_comments_from_raw(raw_comments: List[Dict[str, Any]]) -> List[Comment]:
     mapped: List[Comment] = []
     for item in raw_comments:
@@ -40,3 +207,14 @@ def map_comments_from_raw(raw_comments: List[Dict[str, Any]]) -> List[Comment]:
             )
         )
     return mapped
+
+
+def iter_batches(items: Iterable[Dict[str, Any]], batch_size: int) -> Iterator[CommentBatch]:
+    batch = CommentBatch()
+    for item in items:
+        batch.append(item.get('author', 'unknown'), item.get('text', ''), item.get('team', 'unknown'))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = CommentBatch()
+    if len(batch):
+        yield batch
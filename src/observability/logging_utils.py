@@ -1,23 +1,222 @@
+import abc
+import atexit
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional, TextIO, Tuple
 
+LOG_FORMATS = ('text', 'json')
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+# Attributes every LogRecord has; anything else was passed with extra= and goes into the JSON line.
+_RECORD_FIELDS = frozenset(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
 
-def init_logging(log_file_path: str) -> logging.Logger:
-    os.makedirs(os.path.dirname(log_file_path), exist_ok=True)
+_listeners: List[logging.handlers.QueueListener] = []
+# (logger, its queue handler, the listener draining it) for every async logger.
+_queued_loggers: List[Tuple[logging.Logger, logging.Handler, logging.handlers.QueueListener]] = []
 
-    logger = logging.getLogger('footypulse')
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per record: ts, level, logger, message, extra= fields and any traceback."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            'ts': round(record.created, 6),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _PerRecordFilter(logging.Filter, abc.ABC):
+    # Shared by the file and console handlers, so the decision is made once
+    # per record and remembered on it; warnings and errors always pass.
+    def __init__(self) -> None:
+        super().__init__()
+        self._lock = threading.Lock()
+        self._key = f'_keep_{id(self)}'
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        keep = record.__dict__.get(self._key)
+        if keep is None:
+            with self._lock:
+                keep = self.keep(record)
+            setattr(record, self._key, keep)
+        return keep
+
+    @abc.abstractmethod
+    def keep(self, record: logging.LogRecord) -> bool:
+        """Whether to keep a DEBUG/INFO record; called once per record, under the filter's lock."""
+
+
+class RateLimitFilter(_PerRecordFilter):
+    """Token bucket per call site: at most `rate` records/s with bursts of `burst`.
+
+    A call site is the logger plus the file and line of the logging call, so
+    one chatty loop is throttled without silencing the other messages of a
+    logger that every agent shares. The next record let through after a
+    drop carries a `suppressed` count, so the log shows what was skipped.
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None) -> None:
+        super().__init__()
+        if rate <= 0:
+            raise ValueError('Rate limit must be positive')
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(rate))
+        # (logger, file, line) -> [tokens, last refill, suppressed]
+        self._buckets: Dict[Tuple[str, str, int], List[float]] = {}
+
+    def keep(self, record: logging.LogRecord) -> bool:
+        now = time.monotonic()
+        site = (record.name, record.pathname, record.lineno)
+        bucket = self._buckets.get(site)
+        if bucket is None:
+            bucket = self._buckets[site] = [float(self.burst), now, 0]
+        bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if bucket[0] < 1:
+            bucket[2] += 1
+            return False
+        bucket[0] -= 1
+        if bucket[2]:
+            record.suppressed = int(bucket[2])
+            bucket[2] = 0
+        return True
+
+
+class SamplingFilter(_PerRecordFilter):
+    """Keeps a fixed fraction of each logger's DEBUG/INFO records, evenly spaced."""
+
+    def __init__(self, ratio: float) -> None:
+        super().__init__()
+        if not 0 < ratio <= 1:
+            raise ValueError('Sampling ratio must be in (0, 1]')
+        self.ratio = ratio
+        self._credit: Dict[str, float] = {}
+
+    def keep(self, record: logging.LogRecord) -> bool:
+        # Deterministic: every record earns `ratio` credit and one whole credit buys a record.
+        credit = self._credit.get(record.name, 1.0 - self.ratio) + self.ratio
+        if credit >= 1:
+            self._credit[record.name] = credit - 1
+            return True
+        self._credit[record.name] = credit
+        return False
+
+
+class _LocalQueueHandler(logging.handlers.QueueHandler):
+    # The queue never leaves the process, so records are handed over as they
+    # are: formatting (and its copy of the record) happens on the listener thread.
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def _file_handler(log_file_path: str, max_bytes: int, backup_count: int) -> logging.Handler:
+    if max_bytes > 0:
+        return logging.handlers.RotatingFileHandler(
+            log_file_path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8', delay=True
+        )
+    return logging.FileHandler(log_file_path, encoding='utf-8', delay=True)  # opened on the first record
+
+
+def init_logging(
+    log_file_path: str,
+    log_format: str = 'text',
+    async_mode: bool = False,
+    max_bytes: int = 0,
+    backup_count: int = 5,
+    rate_limit: Optional[float] = None,
+    sample: Optional[float] = None,
+    name: str = 'footypulse',
+    stream: Optional[TextIO] = None,
+) -> logging.Logger:
+    """Sets up the file and console handlers for `name` (once per process).
+
+    log_format 'json' writes JSON lines to the file (the console stays text).
+    max_bytes > 0 rotates the file, keeping backup_count old files. With
+    async_mode, records are put on a queue and a QueueListener thread does
+    the formatting and I/O, so logging calls never wait on disk or terminal.
+    rate_limit (records/s) and sample (fraction kept) drop DEBUG/INFO records
+    per logger before they are queued or formatted.
+    """
+    if log_format not in LOG_FORMATS:
+        raise ValueError(f'Unknown log format: {log_format} (expected one of {", ".join(LOG_FORMATS)})')
+    directory = os.path.dirname(log_file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    logger = logging.getLogger(name)
     logger.setLevel(logging.INFO)
 
     if not logger.handlers:
-        file_handler = logging.FileHandler(log_file_path)
-        console_handler = logging.StreamHandler()
+        file_handler = _file_handler(log_file_path, max_bytes, backup_count)
+        console_handler = logging.StreamHandler(stream)
 
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        file_handler.setFormatter(formatter)
-        console_handler.setFormatter(formatter)
+        text_formatter = logging.Formatter(TEXT_FORMAT)
+        file_handler.setFormatter(JsonLinesFormatter() if log_format == 'json' else text_formatter)
+        console_handler.setFormatter(text_formatter)
+        handlers: List[logging.Handler] = [file_handler, console_handler]
 
-        logger.addHandler(file_handler)
-        logger.addHandler(console_handler)
+        if async_mode:
+            # Unbounded SimpleQueue: put() never blocks the caller; the listener drains it.
+            log_queue: 'queue.SimpleQueue[logging.LogRecord]' = queue.SimpleQueue()
+            listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+            listener.start()
+            _listeners.append(listener)
+            handlers = [_LocalQueueHandler(log_queue)]
+            _queued_loggers.append((logger, handlers[0], listener))
+
+        filters: List[logging.Filter] = []
+        if rate_limit is not None:
+            filters.append(RateLimitFilter(rate_limit))
+        if sample is not None:
+            filters.append(SamplingFilter(sample))
+        for handler in handlers:
+            for record_filter in filters:
+                handler.addFilter(record_filter)
+            logger.addHandler(handler)
 
     logger.info('Logging initialized')
     return logger
+
+
+def shutdown_logging() -> None:
+    """Flushes queued records and stops the listener threads (also run at exit)."""
+    while _listeners:
+        _listeners.pop().stop()
+    _queued_loggers.clear()
+
+
+def _log_synchronously_after_fork() -> None:
+    # A forked child (e.g. a batch worker) inherits the queue handlers but not
+    # the listener threads that drain them, so its records would never be
+    # written. The child writes through the listener's handlers directly.
+    for logger, queue_handler, listener in _queued_loggers:
+        logger.removeHandler(queue_handler)
+        for handler in listener.handlers:
+            for record_filter in queue_handler.filters:
+                if isinstance(record_filter, _PerRecordFilter):
+                    record_filter._lock = threading.Lock()  # may have been held by a parent thread
+                handler.addFilter(record_filter)
+            logger.addHandler(handler)
+    _queued_loggers.clear()
+    _listeners.clear()
+
+
+atexit.register(shutdown_logging)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_log_synchronously_after_fork)
@@ -1,27 +1,214 @@
+import atexit
+import bisect
 import json
 import os
-from typing import Dict
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+from src.tools.file_utils import atomic_write_text, file_lock
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0)
+
+
+class Histogram:
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.bounds: List[float] = sorted(float(b) for b in bounds)
+        self.bucket_counts: List[int] = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def observe(self, value: float) -> None:
+        self.bucket_counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other: 'Histogram') -> None:
+        if other.bounds != self.bounds:
+            raise ValueError('Cannot merge histograms with different bucket bounds')
+        self.bucket_counts = [a + b for a, b in zip(self.bucket_counts, other.bucket_counts)]
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'min': self.min,
+            'max': self.max,
+            'mean': self.total / self.count if self.count else None,
+            'buckets': {
+                **{str(bound): n for bound, n in zip(self.bounds, self.bucket_counts)},
+                '+Inf': self.bucket_counts[-1],
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Histogram':
+        buckets = data.get('buckets', {})
+        # Counts follow their own keys, which files written before bounds were
+        # stored as floats spell as '1' rather than '1.0'.
+        finite = sorted((float(b), int(n)) for b, n in buckets.items() if b != '+Inf')
+        hist = cls([b for b, _ in finite] or DEFAULT_BUCKETS)
+        if finite:
+            hist.bucket_counts = [n for _, n in finite] + [int(buckets.get('+Inf', 0))]
+        else:
+            hist.bucket_counts[-1] = int(buckets.get('+Inf', 0))
+        hist.count = int(data.get('count', 0))
+        hist.total = float(data.get('sum', 0.0))
+        hist.min = data.get('min')
+        hist.max = data.get('max')
+        return hist
 
 
 class Metrics:
-    def __init__(self, metrics_path: str) -> None:
+    def __init__(self, metrics_path: str, flush_interval: float = 5.0) -> None:
         self.metrics_path = metrics_path
-        os.makedirs(os.path.dirname(metrics_path), exist_ok=True)
-        if not os.path.exists(metrics_path):
-            self._write_metrics({})
+        self.observations_path = os.path.splitext(metrics_path)[0] + '.observations.json'
+        self.flush_interval = flush_interval
+        self._lock = threading.RLock()
+        self._pending: Dict[str, int] = {}
+        self._gauges: Dict[str, float] = {}
+        self._pending_histograms: Dict[str, Histogram] = {}
+        self._dirty = False
+        self._last_flush = time.monotonic()
+        # Totals including other runs are read from disk on first get_all() or
+        # flush, so short runs never touch the metrics files before they have news.
+        self._counters: Optional[Dict[str, int]] = None
+        atexit.register(self.flush)
 
     def _read_metrics(self) -> Dict[str, int]:
+        if not os.path.exists(self.metrics_path):
+            return {}
         with open(self.metrics_path, 'r', encoding='utf-8') as f:
             return json.load(f)
 
     def _write_metrics(self, data: Dict[str, int]) -> None:
-        with open(self.metrics_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2)
+        atomic_write_text(self.metrics_path, json.dumps(data, indent=2), fsync=False)
+
+    def _read_observations(self) -> Dict[str, Any]:
+        if not os.path.exists(self.observations_path):
+            return {'gauges': {}, 'histograms': {}}
+        with open(self.observations_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        with file_lock(self.metrics_path):
+            yield
+
+    def _maybe_flush(self) -> None:
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
 
     def increment(self, key: str, amount: int = 1) -> None:
-        data = self._read_metrics()
-        data[key] = data.get(key, 0) + amount
-        self._write_metrics(data)
+        with self._lock:
+            self._pending[key] = self._pending.get(key, 0) + amount
+            if self._counters is not None:
+                self._counters[key] = self._counters.get(key, 0) + amount
+            self._dirty = True
+            self._maybe_flush()
+
+    def set_gauge(self, key: str, value: float) -> None:
+        with self._lock:
+            self._gauges[key] = value
+            self._dirty = True
+            self._maybe_flush()
+
+    def observe(self, key: str, value: float) -> None:
+        with self._lock:
+            if key not in self._pending_histograms:
+                self._pending_histograms[key] = Histogram()
+            self._pending_histograms[key].observe(value)
+            self._dirty = True
+            self._maybe_flush()
+
+    def merge_histogram(self, key: str, histogram: Histogram) -> None:
+        with self._lock:
+            if key not in self._pending_histograms:
+                self._pending_histograms[key] = Histogram(histogram.bounds)
+            self._pending_histograms[key].merge(histogram)
+            self._dirty = True
+            self._maybe_flush()
+
+    @contextmanager
+    def timer(self, key: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(key, time.perf_counter() - start)
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            # Merge our deltas into whatever is on disk so concurrent processes
+            # sharing the same file do not overwrite each other's increments.
+            directory = os.path.dirname(self.metrics_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with self._file_lock():
+                self._flush_locked()
+            self._pending = {}
+            self._pending_histograms = {}
+            self._dirty = False
+            self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        self.flush()
+        atexit.unregister(self.flush)
+
+    def _flush_locked(self) -> None:
+        counters = self._read_metrics()
+        for key, amount in self._pending.items():
+            counters[key] = counters.get(key, 0) + amount
+        self._write_metrics(counters)
+        self._counters = counters
+
+        if self._gauges or self._pending_histograms:
+            observations = self._read_observations()
+            observations.setdefault('gauges', {}).update(self._gauges)
+            histograms = observations.setdefault('histograms', {})
+            for key, pending in self._pending_histograms.items():
+                merged = Histogram.from_dict(histograms[key]) if key in histograms else Histogram(pending.bounds)
+                merged.merge(pending)
+                histograms[key] = merged.to_dict()
+            atomic_write_text(self.observations_path, json.dumps(observations, indent=2), fsync=False)
 
     def get_all(self) -> Dict[str, int]:
-        return self._read_metrics()
+        with self._lock:
+            if self._counters is None:
+                self._counters = self._read_metrics()
+                for key, amount in self._pending.items():
+                    self._counters[key] = self._counters.get(key, 0) + amount
+            return dict(self._counters)
+
+    def get_gauges(self) -> Dict[str, float]:
+        with self._lock:
+            gauges = dict(self._read_observations().get('gauges', {}))
+            gauges.update(self._gauges)
+            return gauges
+
+    def get_histograms(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            histograms = {
+                key: Histogram.from_dict(data)
+                for key, data in self._read_observations().get('histograms', {}).items()
+            }
+            for key, pending in self._pending_histograms.items():
+                if key in histograms:
+                    histograms[key].merge(pending)
+                else:
+                    merged = Histogram(pending.bounds)
+                    merged.merge(pending)
+                    histograms[key] = merged
+            return {key: hist.to_dict() for key, hist in histograms.items()}
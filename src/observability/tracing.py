@@ -0,0 +1,148 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+from src.observability.metrics import Metrics
+
+
+@dataclass
+class Span:
+    name: str
+    start: float
+    wall: float = 0.0
+    cpu: float = 0.0
+    peak_memory: Optional[int] = None
+    items: Optional[int] = None
+    profile_path: Optional[str] = None
+    error: Optional[str] = None
+    pid: int = 0
+    tid: int = 0
+
+
+class Tracer:
+    def __init__(
+        self,
+        metrics: Optional[Metrics] = None,
+        trace_memory: bool = False,
+        profile_dir: Optional[str] = None,
+    ) -> None:
+        self.metrics = metrics
+        self.trace_memory = trace_memory
+        self.profile_dir = profile_dir
+        self.spans: List[Span] = []
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+
+    @property
+    def needs_serial(self) -> bool:
+        # tracemalloc and its peak are process-wide, and a span's cProfile only
+        # sees its own thread: spans that overlap would measure each other.
+        return self.trace_memory or bool(self.profile_dir)
+
+    @contextmanager
+    def span(self, name: str, items: Optional[int] = None) -> Iterator[Span]:
+        span = Span(
+            name=name,
+            start=time.perf_counter() - self._origin,
+            items=items,
+            pid=os.getpid(),
+            tid=threading.get_ident(),
+        )
+        started_tracemalloc = False
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracemalloc = True
+            # Peak tracking is process-wide, so nested spans report the peak of
+            # their own window and reset the outer span's running peak.
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        profiler = cProfile.Profile() if self.profile_dir else None
+
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()  # a stage runs on one thread; others may run alongside
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield span
+        except BaseException as exc:
+            span.error = f'{type(exc).__name__}: {exc}'
+            raise
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            span.wall = time.perf_counter() - wall_start
+            span.cpu = time.thread_time() - cpu_start
+            if self.trace_memory:
+                span.peak_memory = max(0, tracemalloc.get_traced_memory()[1] - baseline)
+                if started_tracemalloc:
+                    tracemalloc.stop()
+            if profiler is not None and self.profile_dir:
+                span.profile_path = os.path.join(self.profile_dir, f'{name}.prof')
+                profiler.dump_stats(span.profile_path)
+            with self._lock:
+                self.spans.append(span)
+            if self.metrics is not None:
+                self.metrics.observe(f'latency.{name}', span.wall)
+
+    def breakdown(self) -> str:
+        total = sum(s.wall for s in self.spans) or 1.0
+        rows = [f"{'stage':<26}{'wall ms':>10}{'cpu ms':>10}{'% wall':>8}{'peak MB':>9}{'items':>10}{'items/s':>12}"]
+        for s in self.spans:
+            peak = f'{s.peak_memory / 1e6:.1f}' if s.peak_memory is not None else '-'
+            items = str(s.items) if s.items is not None else '-'
+            rate = f'{s.items / s.wall:,.0f}' if s.items and s.wall else '-'
+            rows.append(
+                f'{s.name:<26}{s.wall * 1000:>10.1f}{s.cpu * 1000:>10.1f}{100 * s.wall / total:>7.1f}%'
+                f'{peak:>9}{items:>10}{rate:>12}'
+            )
+        rows.append(f"{'total':<26}{total * 1000:>10.1f}")
+        return '\n'.join(rows)
+
+    def profile_summary(self, span: Span, limit: int = 15) -> str:
+        if not span.profile_path:
+            return ''
+        out = io.StringIO()
+        pstats.Stats(span.profile_path, stream=out).sort_stats('cumulative').print_stats(limit)
+        return out.getvalue()
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        events = []
+        for s in self.spans:
+            args: Dict[str, Any] = {'cpu_ms': round(s.cpu * 1000, 3)}
+            if s.peak_memory is not None:
+                args['peak_memory_bytes'] = s.peak_memory
+            if s.items is not None:
+                args['items'] = s.items
+            if s.error:
+                args['error'] = s.error
+            events.append(
+                {
+                    'name': s.name,
+                    'cat': 'stage',
+                    'ph': 'X',
+                    'ts': round(s.start * 1e6, 1),
+                    'dur': round(s.wall * 1e6, 1),
+                    'pid': s.pid,
+                    'tid': s.tid,
+                    'args': args,
+                }
+            )
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export_chrome_trace(self, path: str) -> str:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome_trace(), f, indent=1)
+        return path
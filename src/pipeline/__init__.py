@@ -0,0 +1 @@
+# Marks pipeline as a Python package
\ No newline at end of file
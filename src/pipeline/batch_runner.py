@@ -0,0 +1,219 @@
+import json
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+from src.observability.metrics import Histogram, Metrics
+from src.memory.memory_bank import MemoryBank
+from src.pipeline.match_pipeline import MatchInputs, run_match_pipeline
+from src.pipeline.stage_cache import StageCache
+from src.tools.sentiment_lexicon import SentimentLexicon
+
+THREAD_FILE_NAMES = ('thread.jsonl', 'thread.json')
+STATS_FILE_NAME = 'stats.json'
+
+
+@dataclass
+class BatchResult:
+    matches: List[Dict[str, Any]] = field(default_factory=list)
+    failures: List[Dict[str, Any]] = field(default_factory=list)
+    wall_seconds: float = 0.0
+    total_comments: int = 0
+
+    @property
+    def matches_per_sec(self) -> float:
+        return len(self.matches) / self.wall_seconds if self.wall_seconds else 0.0
+
+    @property
+    def comments_per_sec(self) -> float:
+        return self.total_comments / self.wall_seconds if self.wall_seconds else 0.0
+
+    def summary_line(self) -> str:
+        return (
+            f'{len(self.matches)} matches ({len(self.failures)} failed), {self.total_comments} comments '
+            f'in {self.wall_seconds:.2f}s: {self.matches_per_sec:.2f} matches/sec, '
+            f'{self.comments_per_sec:.0f} comments/sec'
+        )
+
+
+def discover_matches(source: str, output_dir: str) -> List[MatchInputs]:
+    if os.path.isdir(source):
+        matches: List[MatchInputs] = []
+        for match_id in sorted(os.listdir(source)):
+            match_dir = os.path.join(source, match_id)
+            if not os.path.isdir(match_dir):
+                continue
+            thread_path = next(
+                (os.path.join(match_dir, n) for n in THREAD_FILE_NAMES if os.path.exists(os.path.join(match_dir, n))),
+                None,
+            )
+            stats_path = os.path.join(match_dir, STATS_FILE_NAME)
+            if thread_path is None or not os.path.exists(stats_path):
+                continue
+            matches.append(
+                MatchInputs(
+                    match_id=match_id,
+                    thread_path=thread_path,
+                    stats_path=stats_path,
+                    output_path=os.path.join(output_dir, f'{match_id}.md'),
+                )
+            )
+        return matches
+
+    if not os.path.exists(source):
+        raise FileNotFoundError(f'Batch source not found: {source}')
+    with open(source, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    base_dir = os.path.dirname(os.path.abspath(source))
+    matches = []
+    for item in manifest.get('matches', []):
+        match_id = item['match_id']
+        matches.append(
+            MatchInputs(
+                match_id=match_id,
+                thread_path=os.path.join(base_dir, item.get('thread', '')),
+                stats_path=os.path.join(base_dir, item['stats']),
+                output_path=item.get('output') or os.path.join(output_dir, f'{match_id}.md'),
+                thread_urls=list(item.get('urls', [])),
+            )
+        )
+    return matches
+
+
+@lru_cache(maxsize=8)
+def _load_lexicon(path: str) -> SentimentLexicon:
+    return SentimentLexicon.from_file(path)
+
+
+def _run_match_worker(
+    inputs: MatchInputs,
+    lexicon_path: Optional[str],
+    stream: bool,
+    demo_mode: bool,
+    cache_dir: Optional[str],
+    cache_max_bytes: int,
+    backend: str,
+    rank_by: Optional[str],
+    report_formats: Optional[List[str]],
+    appendix_page_size: int,
+    stages: Optional[List[str]] = None,
+    impact_formula: Optional[str] = None,
+    dedup: bool = True,
+    near_duplicate_threshold: Optional[float] = None,
+    snapshot_dir: Optional[str] = None,
+) -> Dict[str, Any]:
+    # Each worker records into private, throwaway stores; the parent merges the
+    # results so workers never contend on the shared metrics/memory files.
+    logger = logging.getLogger('footypulse.batch')
+    lexicon = _load_lexicon(lexicon_path) if lexicon_path else None
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix='footypulse-') as tmp_dir:
+        metrics = Metrics(os.path.join(tmp_dir, 'counters.json'), flush_interval=float('inf'))
+        memory_bank = MemoryBank(os.path.join(tmp_dir, 'memory.jsonl'), compact_every=1 << 30)
+        cache = StageCache(cache_dir, cache_max_bytes, metrics=metrics) if cache_dir else None
+        try:
+            result = run_match_pipeline(
+                inputs,
+                logger,
+                metrics,
+                memory_bank,
+                lexicon=lexicon,
+                stream=stream,
+                demo_mode=demo_mode,
+                cache=cache,
+                backend=backend,
+                rank_by=rank_by,
+                report_formats=report_formats,
+                appendix_page_size=appendix_page_size,
+                stages=stages,
+                impact_formula=impact_formula,
+                dedup=dedup,
+                near_duplicate_threshold=near_duplicate_threshold,
+                snapshot_dir=snapshot_dir,
+            )
+        finally:
+            metrics.close()
+        result['elapsed'] = time.perf_counter() - start
+        result['counters'] = metrics.get_all()
+        result['histograms'] = metrics.get_histograms()
+        result['memory_entries'] = memory_bank.get_all()
+    return result
+
+
+def run_batch(
+    matches: List[MatchInputs],
+    logger: logging.Logger,
+    metrics: Metrics,
+    memory_bank: MemoryBank,
+    workers: Optional[int] = None,
+    lexicon_path: Optional[str] = None,
+    stream: bool = False,
+    demo_mode: bool = True,
+    cache_dir: Optional[str] = None,
+    cache_max_bytes: int = 256 * 1024 * 1024,
+    backend: str = 'python',
+    rank_by: Optional[str] = None,
+    report_formats: Optional[List[str]] = None,
+    appendix_page_size: int = 0,
+    stages: Optional[List[str]] = None,
+    impact_formula: Optional[str] = None,
+    dedup: bool = True,
+    near_duplicate_threshold: Optional[float] = None,
+    snapshot_dir: Optional[str] = None,
+) -> BatchResult:
+    result = BatchResult()
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(
+                _run_match_worker,
+                m,
+                lexicon_path,
+                stream,
+                demo_mode,
+                cache_dir,
+                cache_max_bytes,
+                backend,
+                rank_by,
+                report_formats,
+                appendix_page_size,
+                stages,
+                impact_formula,
+                dedup,
+                near_duplicate_threshold,
+                snapshot_dir,
+            ): m
+            for m in matches
+        }
+        for future in as_completed(futures):
+            match = futures[future]
+            try:
+                outcome = future.result()
+            except Exception as exc:
+                logger.error(f'Batch: match {match.match_id} failed: {exc}')
+                metrics.increment('batch_matches_failed')
+                result.failures.append({'match_id': match.match_id, 'error': str(exc)})
+                continue
+
+            for key, amount in outcome.pop('counters').items():
+                metrics.increment(key, amount)
+            for key, data in outcome.pop('histograms').items():
+                metrics.merge_histogram(key, Histogram.from_dict(data))
+            memory_bank.bind(match_id=match.match_id).append_entries(outcome.pop('memory_entries'))
+
+            metrics.observe('latency.match_pipeline', outcome['elapsed'])
+            result.total_comments += outcome['num_comments']
+            result.matches.append(outcome)
+            logger.info(f"Batch: match {match.match_id} done in {outcome['elapsed']:.2f}s")
+
+    result.wall_seconds = time.perf_counter() - start
+    result.matches.sort(key=lambda m: m['match_id'])
+    metrics.increment('batch_matches_processed', len(result.matches))
+    metrics.set_gauge('batch_matches_per_sec', result.matches_per_sec)
+    metrics.set_gauge('batch_comments_per_sec', result.comments_per_sec)
+    logger.info(f'Batch: {result.summary_line()}')
+    return result
@@ -0,0 +1,152 @@
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+from src.models.domain_models import Comment
+from src.observability.metrics import Metrics
+from src.memory.memory_bank import MemoryBank
+from src.memory.session_memory import SessionMemory
+from src.agents.reddit_data_agent import RedditDataAgent
+from src.agents.sentiment_agent import SentimentAnalysisAgent
+from src.agents.player_impact_agent import PlayerImpactAgent
+from src.agents.match_summary_agent import MatchSummaryAgent
+from src.agents.report_generator_agent import ReportGeneratorAgent
+from src.pipeline.match_pipeline import REPORT_SAMPLE_SIZE, MatchInputs
+from src.tools.parallel_scoring import DEFAULT_PARALLEL_CHUNK
+from src.tools.player_index import PlayerMentionIndex
+from src.tools.sentiment_lexicon import SentimentLexicon
+
+
+class LiveMatchSession:
+    def __init__(
+        self,
+        inputs: MatchInputs,
+        logger: logging.Logger,
+        metrics: Metrics,
+        memory_bank: MemoryBank,
+        lexicon: Optional[SentimentLexicon] = None,
+        backend: str = 'python',
+        rank_by: Optional[str] = None,
+        report_formats: Optional[List[str]] = None,
+        sentiment_workers: int = 1,
+        sentiment_chunk_size: int = DEFAULT_PARALLEL_CHUNK,
+        impact_formula: Optional[str] = None,
+        dedup: bool = True,
+        near_duplicate_threshold: Optional[float] = None,
+    ) -> None:
+        self.inputs = inputs
+        self.logger = logger
+        self.metrics = metrics
+        self.memory_bank = memory_bank.bind(match_id=inputs.match_id)
+        self.session_memory = SessionMemory()
+        self.session_memory.set('match_id', inputs.match_id)
+        self.ticks = 0
+        self.total_comments = 0
+        self.recent_comments: Deque[Comment] = deque(maxlen=REPORT_SAMPLE_SIZE)
+
+        self._stats_mtime = os.path.getmtime(inputs.stats_path)
+        mention_index = PlayerMentionIndex.from_stats_file(inputs.stats_path)
+        shared = dict(logger=logger, metrics=metrics, memory_bank=self.memory_bank, session_memory=self.session_memory)
+        self.reddit_agent = RedditDataAgent(**shared, demo_mode=True, sample_path=inputs.thread_path)
+        self.sentiment_agent = SentimentAnalysisAgent(
+            **shared,
+            lexicon=lexicon,
+            mention_index=mention_index,
+            backend=backend,
+            workers=sentiment_workers,
+            parallel_chunk_size=sentiment_chunk_size,
+            dedup=dedup,
+            near_duplicate_threshold=near_duplicate_threshold,
+        )
+        self.player_impact_agent = PlayerImpactAgent(
+            **shared,
+            sample_stats_path=inputs.stats_path,
+            demo_mode=True,
+            mention_index=mention_index,
+            backend=backend,
+            impact_formula=impact_formula,
+        )
+        self.match_summary_agent = MatchSummaryAgent(**shared)
+        self.report_agent = ReportGeneratorAgent(
+            **shared, output_path=inputs.output_path, rank_by=rank_by, formats=report_formats
+        )
+
+        self._start()
+
+    def _start(self) -> None:
+        self.total_comments = 0
+        self.recent_comments.clear()
+        self.sentiment_agent.start_live()
+        self.match_summary_agent.start_live(self.player_impact_agent.start_live())
+
+    def _refresh_players(self) -> None:
+        # Players added to the stats file must be matched in comments from now on.
+        mtime = os.path.getmtime(self.inputs.stats_path)
+        if mtime == self._stats_mtime:
+            return
+        self._stats_mtime = mtime
+        mention_index = PlayerMentionIndex.from_stats_file(self.inputs.stats_path)
+        self.sentiment_agent.set_mention_index(mention_index)
+        self.player_impact_agent.mention_index = mention_index
+
+    def tick(self) -> Dict[str, Any]:
+        start = time.perf_counter()
+        self._refresh_players()
+        new_comments = self.reddit_agent.poll_new_comments()
+        if self.reddit_agent.live_restarted:
+            # The new comments are the whole file again: drop totals built from the old one.
+            self._start()
+        sentiment_summary = self.sentiment_agent.update_live(new_comments)
+        player_impacts, changed = self.player_impact_agent.update_live(new_comments)
+        match_summary = self.match_summary_agent.update_live(sentiment_summary, changed)
+
+        self.recent_comments.extend(new_comments)
+        self.total_comments += len(new_comments)
+        self.ticks += 1
+
+        report_path = self.report_agent.run(
+            comments_with_sentiment=self.recent_comments,
+            sentiment_summary=sentiment_summary,
+            player_impacts=player_impacts,
+            match_summary=match_summary,
+        )
+        elapsed = time.perf_counter() - start
+        self.metrics.observe('latency.live_tick', elapsed)
+        self.memory_bank.append_entry(
+            {
+                'type': 'live_tick',
+                'match_id': self.inputs.match_id,
+                'tick': self.ticks,
+                'new_comments': len(new_comments),
+                'total_comments': self.total_comments,
+            }
+        )
+        self.logger.info(
+            f'Live tick {self.ticks}: {len(new_comments)} new comments, '
+            f'{len(changed)} players updated in {elapsed * 1000:.1f} ms'
+        )
+        return {
+            'tick': self.ticks,
+            'new_comments': len(new_comments),
+            'total_comments': self.total_comments,
+            'report_path': report_path,
+            'match_summary': match_summary,
+            'elapsed': elapsed,
+        }
+
+    def close(self) -> None:
+        self.sentiment_agent.close()
+        self.player_impact_agent.close()
+
+
+def run_live(session: LiveMatchSession, interval: float, max_ticks: int = 0) -> None:
+    try:
+        while True:
+            session.tick()
+            session.metrics.flush()
+            if max_ticks and session.ticks >= max_ticks:
+                return
+            time.sleep(interval)
+    finally:
+        session.close()
@@ -0,0 +1,451 @@
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from src.observability.metrics import Metrics
+from src.observability.tracing import Tracer
+from src.memory.memory_bank import MemoryBank
+from src.memory.session_memory import SessionMemory
+from src.models.domain_models import Comment, CommentBatch, SentimentSummary
+from src.tools.sentiment_lexicon import SentimentLexicon
+from src.tools.parallel_scoring import DEFAULT_PARALLEL_CHUNK
+from src.tools.dedup import ScoreMemo
+from src.tools.player_index import PlayerMentionIndex
+from src.pipeline.stage_cache import StageCache, stage_key
+from src.pipeline.stage_graph import StageCancelled, StageGraph
+from src.tools.ranking import PlayerRanking
+
+REPORT_SAMPLE_SIZE = 10
+# Kept next to the stage cache entries, but not a .pkl, so cache eviction leaves it alone.
+SCORE_MEMO_FILE = 'score_memo.pickle'
+SNAPSHOT_SUFFIX = '.snap'
+STAGES = ('fetch', 'sentiment', 'impact', 'summary', 'report')
+
+
+@dataclass
+class MatchInputs:
+    match_id: str
+    thread_path: str
+    stats_path: str
+    output_path: str
+    thread_urls: List[str] = field(default_factory=list)
+
+
+def select_stages(only: Optional[Sequence[str]] = None, from_stage: Optional[str] = None) -> Tuple[str, ...]:
+    if only and from_stage:
+        raise ValueError('Choose either only or from_stage, not both')
+    for name in [*(only or []), *([from_stage] if from_stage else [])]:
+        if name not in STAGES:
+            raise ValueError(f'Unknown stage: {name} (expected one of {", ".join(STAGES)})')
+    if only:
+        return tuple(stage for stage in STAGES if stage in only)
+    if from_stage:
+        return STAGES[STAGES.index(from_stage):]
+    return STAGES
+
+
+def run_match_pipeline(
+    inputs: MatchInputs,
+    logger: logging.Logger,
+    metrics: Metrics,
+    memory_bank: MemoryBank,
+    lexicon: Optional[SentimentLexicon] = None,
+    stream: bool = False,
+    demo_mode: bool = True,
+    cache: Optional[StageCache] = None,
+    tracer: Optional[Tracer] = None,
+    backend: str = 'python',
+    rank_by: Optional[str] = None,
+    report_formats: Optional[List[str]] = None,
+    appendix_page_size: int = 0,
+    sentiment_workers: int = 1,
+    sentiment_chunk_size: int = DEFAULT_PARALLEL_CHUNK,
+    stages: Optional[Sequence[str]] = None,
+    impact_formula: Optional[str] = None,
+    mention_index: Optional[PlayerMentionIndex] = None,
+    dedup: bool = True,
+    near_duplicate_threshold: Optional[float] = None,
+    score_memo: Optional[ScoreMemo] = None,
+    snapshot_dir: Optional[str] = None,
+) -> Dict[str, Any]:
+    tracer = tracer or Tracer(metrics=metrics)
+    session_memory = SessionMemory()
+    session_memory.set('match_id', inputs.match_id)
+    memory_bank = memory_bank.bind(match_id=inputs.match_id)  # history queries group entries by match
+    if mention_index is None:  # long-running callers pass a warm index
+        mention_index = PlayerMentionIndex.from_stats_file(inputs.stats_path)
+
+    # Stages after the last selected one are skipped. Selected stages are
+    # recomputed; unselected upstream stages come from the cache when they can.
+    selected = tuple(stages) if stages else STAGES
+    needed = STAGES[:max(STAGES.index(stage) for stage in selected) + 1]
+    refresh = set(selected) if stages else set()
+
+    # Scores of distinct comment texts persist next to the stage cache unless the
+    # caller keeps a warm memo; they are loaded only if comments get scored.
+    memo_path = None
+    if dedup and score_memo is None and cache is not None:
+        memo_path = os.path.join(cache.cache_dir, SCORE_MEMO_FILE)
+
+    # Scored comments also go to a memory-mapped columnar snapshot for season-wide analytics.
+    snapshot_file = None
+    if snapshot_dir and 'sentiment' in needed:
+        snapshot_file = os.path.join(snapshot_dir, f'{inputs.match_id}{SNAPSHOT_SUFFIX}')
+
+    def snapshot_writer(sentiment_key: Optional[str] = None) -> Any:
+        from src.tools.snapshot import SnapshotWriter
+
+        meta = {'match_id': inputs.match_id, 'thread_path': inputs.thread_path, 'sentiment_key': sentiment_key}
+        return SnapshotWriter(snapshot_file, meta, mention_index)
+
+    shared = dict(logger=logger, metrics=metrics, memory_bank=memory_bank, session_memory=session_memory)
+    agents: Dict[str, Any] = {}
+    agents_lock = threading.Lock()
+
+    def agent(stage: str) -> Any:
+        # Agents, and the modules behind them, are built on first use, so
+        # skipped or cached stages cost nothing at startup.
+        with agents_lock:
+            if stage not in agents:
+                agents[stage] = build_agent(stage)
+            return agents[stage]
+
+    def build_agent(stage: str) -> Any:
+        if stage == 'fetch':
+            from src.agents.reddit_data_agent import RedditDataAgent
+
+            return RedditDataAgent(
+                **shared, demo_mode=demo_mode, sample_path=inputs.thread_path, thread_urls=inputs.thread_urls
+            )
+        if stage == 'sentiment':
+            from src.agents.sentiment_agent import SentimentAnalysisAgent
+
+            nonlocal score_memo
+            if memo_path is not None:
+                score_memo = ScoreMemo.load(memo_path)
+            return SentimentAnalysisAgent(
+                **shared,
+                lexicon=lexicon,
+                mention_index=mention_index,
+                backend=backend,
+                workers=sentiment_workers,
+                parallel_chunk_size=sentiment_chunk_size,
+                dedup=dedup,
+                near_duplicate_threshold=near_duplicate_threshold,
+                score_memo=score_memo,
+            )
+        if stage == 'impact':
+            from src.agents.player_impact_agent import PlayerImpactAgent
+
+            return PlayerImpactAgent(
+                **shared,
+                sample_stats_path=inputs.stats_path,
+                demo_mode=demo_mode,
+                mention_index=mention_index,
+                backend=backend,
+                impact_formula=impact_formula,
+            )
+        if stage == 'summary':
+            from src.agents.match_summary_agent import MatchSummaryAgent
+
+            return MatchSummaryAgent(**shared)
+        from src.agents.report_generator_agent import ReportGeneratorAgent
+
+        return ReportGeneratorAgent(
+            **shared,
+            output_path=inputs.output_path,
+            rank_by=rank_by,
+            formats=report_formats,
+            appendix_page_size=appendix_page_size,
+        )
+
+    if 'report' in needed:
+        agent('report')  # validates report options before any work is done
+
+    # Each stage declares the values it reads and writes; the graph starts it as
+    # soon as its inputs exist, so loading the stats file and building the player
+    # data overlap with fetching and scoring the thread. Profiled runs go one
+    # stage at a time so each span measures only its own stage.
+    graph = StageGraph(max_workers=1) if tracer.needs_serial else StageGraph()
+    all_comments: Callable[[], Iterator[Comment]]
+    computes_impact = 'impact' in needed
+
+    if stream:
+
+        def ingest() -> Tuple[Any, SentimentSummary, Dict[str, int]]:
+            logger.info('Streaming comments through fetch, sentiment and player impact agents')
+            sample: Any = CommentBatch()
+            summary = SentimentSummary(positive=0, negative=0, neutral=0)
+            sentiment_by_player: Dict[str, int] = {}
+            with tracer.span('streaming_ingest') as span:
+                batches = agent('fetch').iter_batches()
+                if 'sentiment' in needed:
+                    batches = agent('sentiment').score_stream(batches, summary)
+                if 'impact' in needed:
+                    batches = agent('impact').accumulate(batches, sentiment_by_player)
+                writer = snapshot_writer() if snapshot_file else None
+                if writer is not None:
+                    batches = writer.write_batches(batches)
+                try:
+                    for i, batch in enumerate(batches):
+                        if graph.cancelled.is_set():  # another stage failed; stop reading the source
+                            raise StageCancelled('ingest')
+                        if i == 0:
+                            sample = batch[:REPORT_SAMPLE_SIZE]
+                except BaseException:
+                    if writer is not None:
+                        writer.abort()
+                    raise
+                span.items = summary.positive + summary.negative + summary.neutral
+            if writer is not None:
+                with tracer.span('snapshot_writer', items=len(writer)):
+                    writer.close()
+            if 'sentiment' in needed:
+                agent('sentiment').finalize(summary)
+            return sample, summary, sentiment_by_player
+
+        def impacts(sentiment_by_player: Dict[str, int], player_data: Any) -> Any:
+            return agent('impact').finalize(sentiment_by_player)
+
+        graph.add(
+            'ingest', ingest, outputs=('comments_with_sentiment', 'sentiment_summary', 'sentiment_by_player')
+        )
+        if 'impact' in needed:
+            graph.add('impact', impacts, inputs=('sentiment_by_player', 'player_data'), outputs=('player_impacts',))
+
+        def all_comments() -> Iterator[Comment]:
+            # A second streaming pass over the source keeps the appendix in bounded memory.
+            discard = SentimentSummary(positive=0, negative=0, neutral=0)
+            for batch in agent('sentiment').score_stream(agent('fetch').iter_batches(record=False), discard):
+                yield from batch
+    else:
+        if inputs.thread_urls and not demo_mode:
+            cache = None
+        if cache is not None:
+            from src.agents.sentiment_agent import default_lexicon
+
+            # Merkle-style keys: each stage hashes its upstream key plus its own config,
+            # so changing the lexicon invalidates sentiment and everything after it.
+            fetch_key = stage_key('fetch', cache.file_digest(inputs.thread_path))
+            # Near-duplicate merging shares scores between different texts, so it changes the output.
+            sentiment_key = stage_key(
+                'sentiment',
+                fetch_key,
+                (lexicon if lexicon is not None else default_lexicon()).fingerprint(),
+                mention_index.fingerprint(),
+                *([near_duplicate_threshold] if dedup and near_duplicate_threshold is not None else []),
+            )
+            impact_key = stage_key(
+                'impact', sentiment_key, cache.file_digest(inputs.stats_path), *([impact_formula] if impact_formula else [])
+            )
+            summary_key = stage_key('summary', impact_key)
+            # Entries are stored by key alone, so the report sample needs a key of its own.
+            sample_key = stage_key('sentiment_sample', sentiment_key)
+        else:
+            fetch_key = sentiment_key = sample_key = impact_key = summary_key = None
+
+        def cached(stage: str, key: Optional[str], compute: Any, group: Optional[str] = None) -> Any:
+            if cache is None:
+                return compute()
+            if (group or stage) in refresh:
+                value = compute()
+                cache.put(stage, key, value)
+                return value
+            return cache.cached(stage, key, compute)
+
+        memo: Dict[str, Any] = {}
+        memo_lock = threading.RLock()
+
+        def once(name: str, compute: Callable[[], Any]) -> Any:
+            # The thread and its scores are loaded at most once, whichever stage asks first.
+            with memo_lock:
+                if name not in memo:
+                    memo[name] = compute()
+                return memo[name]
+
+        def fetch() -> Any:
+            logger.info('Running Reddit Data Fetch Agent')
+            with tracer.span('reddit_data_agent') as span:
+                comments = agent('fetch').run()
+                span.items = len(comments)
+            return comments
+
+        def record_count(count: int) -> None:
+            # The fetch agent records the comment count, but cached runs skip it.
+            if session_memory.get('num_comments') is None:
+                session_memory.set('num_comments', count)
+
+        def fetched_comments() -> Any:
+            def load() -> Any:
+                comments = cached('fetch', fetch_key, fetch)
+                record_count(len(comments))
+                return comments
+
+            return once('comments', load)
+
+        def score() -> Any:
+            logger.info('Running Sentiment Analysis Agent')
+            comments = fetched_comments()
+            with tracer.span('sentiment_agent', items=len(comments)):
+                return agent('sentiment').run(comments)
+
+        def scored_comments() -> Any:
+            return once('scored', lambda: cached('sentiment', sentiment_key, score))
+
+        def sample() -> Any:
+            comments, summary = scored_comments()
+            return comments[:REPORT_SAMPLE_SIZE], summary, len(comments)
+
+        def report_sample(scored: Any = None) -> Any:
+            comments, summary, count = cached('sentiment_sample', sample_key, sample, group='sentiment')
+            record_count(count)
+            return comments, summary
+
+        def impacts(player_data: Any = None, scored: Any = None) -> Any:
+            def compute() -> Any:
+                logger.info('Running Player Impact Agent')
+                comments = scored_comments()[0]
+                with tracer.span('player_impact_agent', items=len(comments)):
+                    return agent('impact').run(comments)
+
+            return cached('impact', impact_key, compute)
+
+        snapshot_current = False
+
+        def fresh(key: Optional[str], group: str) -> bool:
+            return cache is None or group in refresh or not cache.has(key)
+
+        # Fetch and scoring get their own stages only when the cache cannot serve
+        # what comes after them. The report only needs a small sample, so a fully
+        # cached run never unpickles the whole scored thread.
+        if needed == ('fetch',):
+            graph.add('fetch', fetched_comments, outputs=('comments',))
+        else:
+            if snapshot_file and not fresh(sentiment_key, 'sentiment'):
+                # A snapshot written from the same scores is still current.
+                from src.tools.snapshot import read_meta
+
+                meta = read_meta(snapshot_file)
+                if meta is not None and meta.get('sentiment_key') == sentiment_key:
+                    logger.info(f'Snapshot up to date: {snapshot_file}')
+                    snapshot_current = True
+            # Cached impacts need neither the scored thread nor the stats file.
+            computes_impact = 'impact' in needed and fresh(impact_key, 'impact')
+            needs_scores = (
+                fresh(sentiment_key, 'sentiment')
+                or computes_impact
+                or (snapshot_file is not None and not snapshot_current)
+            )
+            if needs_scores:
+                if fresh(sentiment_key, 'sentiment'):
+                    graph.add('fetch', fetched_comments, outputs=('comments',))
+                    graph.add('sentiment', lambda comments: scored_comments(), inputs=('comments',), outputs=('scored',))
+                else:
+                    graph.add('sentiment', scored_comments, outputs=('scored',))
+            graph.add(
+                'sample',
+                report_sample,
+                inputs=('scored',) if needs_scores else (),
+                outputs=('comments_with_sentiment', 'sentiment_summary'),
+            )
+            if 'impact' in needed:
+                graph.add(
+                    'impact',
+                    impacts,
+                    inputs=('player_data', 'scored') if computes_impact else (),
+                    outputs=('player_impacts',),
+                )
+            if snapshot_file and not snapshot_current:
+
+                def snapshot(scored: Any) -> str:
+                    writer = snapshot_writer(sentiment_key)
+                    with tracer.span('snapshot_writer', items=len(scored[0])):
+                        writer.add(scored[0])
+                        return writer.close()
+
+                graph.add('snapshot', snapshot, inputs=('scored',), outputs=('snapshot_path',))
+
+        def all_comments() -> Iterator[Comment]:
+            return iter(scored_comments()[0])
+
+    if computes_impact:
+        graph.add('stats', lambda: agent('impact').prepare(), outputs=('player_data',))
+
+    if 'summary' in needed:
+
+        def rank(player_impacts: Any) -> PlayerRanking:
+            # One ranking serves the impact agent's top 3, the summary's leader and the
+            # report's ranked views; cached impacts get a fresh one.
+            ranking = session_memory.get('player_ranking')
+            if ranking is None or ranking.players is not player_impacts:
+                ranking = PlayerRanking(player_impacts)
+            return ranking
+
+        def summarize(sentiment_summary: SentimentSummary, player_impacts: Any, ranking: PlayerRanking) -> str:
+            def compute() -> str:
+                logger.info('Running Match Summary Agent')
+                with tracer.span('match_summary_agent', items=len(player_impacts)):
+                    return agent('summary').run(
+                        sentiment_summary=sentiment_summary,
+                        player_impacts=player_impacts,
+                        ranking=ranking,
+                    )
+
+            return compute() if stream else cached('summary', summary_key, compute)
+
+        graph.add('ranking', rank, inputs=('player_impacts',))
+        graph.add(
+            'summary', summarize, inputs=('sentiment_summary', 'player_impacts', 'ranking'), outputs=('match_summary',)
+        )
+
+    if 'report' in needed:
+
+        def report(
+            comments_with_sentiment: Any,
+            sentiment_summary: SentimentSummary,
+            player_impacts: Any,
+            match_summary: str,
+            ranking: PlayerRanking,
+        ) -> str:
+            logger.info('Running Report Generator Agent')
+            with tracer.span('report_generator_agent', items=len(player_impacts)):
+                return agent('report').run(
+                    comments_with_sentiment=comments_with_sentiment,
+                    sentiment_summary=sentiment_summary,
+                    player_impacts=player_impacts,
+                    match_summary=match_summary,
+                    ranking=ranking,
+                    all_comments=all_comments if appendix_page_size > 0 else None,
+                )
+
+        graph.add(
+            'report',
+            report,
+            inputs=('comments_with_sentiment', 'sentiment_summary', 'player_impacts', 'match_summary', 'ranking'),
+            outputs=('report_path',),
+        )
+
+    try:
+        run = graph.run()
+    finally:
+        for stage in ('sentiment', 'impact'):
+            if stage in agents:  # worker pools
+                agents[stage].close()
+        if memo_path is not None and score_memo is not None:
+            score_memo.save(memo_path)
+    metrics.set_gauge('pipeline_wall_seconds', run.wall)
+    metrics.set_gauge('pipeline_critical_path_seconds', run.critical_seconds)
+    metrics.set_gauge('pipeline_stage_seconds', run.stage_seconds)
+    logger.info(f'Pipeline critical path: {run.summary_line()}')
+
+    return {
+        'match_id': inputs.match_id,
+        'report_path': run.values.get('report_path'),
+        'num_comments': session_memory.get('num_comments', 0),
+        'match_summary': run.values.get('match_summary'),
+        'player_impacts': run.values.get('player_impacts', []),
+        'stages': needed,
+        'critical_path': run.summary_line(),
+        'snapshot_path': snapshot_file,
+    }
@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import pickle
+from typing import Any, Callable, Dict, Optional, Tuple
+from src.observability.metrics import Metrics
+from src.tools.file_utils import atomic_write_bytes
+
+# Bump when an agent's output format or scoring logic changes so stale entries are never reused.
+CACHE_FORMAT_VERSION = 4
+
+
+def stage_key(stage: str, *parts: Any) -> str:
+    payload = json.dumps([CACHE_FORMAT_VERSION, stage, list(parts)], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class StageCache:
+    def __init__(self, cache_dir: str, max_bytes: int = 256 * 1024 * 1024, metrics: Optional[Metrics] = None) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.metrics = metrics
+        self._digests_path = os.path.join(cache_dir, 'file_digests.json')
+        self._digests: Optional[Dict[str, Any]] = None
+        # Bytes of .pkl entries, counted by one walk on the first put() and kept
+        # up to date by later puts, so eviction only walks the tree when over budget.
+        self._total_bytes: Optional[int] = None
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + '.pkl')
+
+    def _count(self, outcome: str, stage: str) -> None:
+        if self.metrics is not None:
+            self.metrics.increment(f'cache_{outcome}')
+            self.metrics.increment(f'cache_{outcome}.{stage}')
+
+    def file_digest(self, path: str) -> str:
+        # Re-hash only when size or mtime changed, so unchanged inputs cost one stat().
+        if self._digests is None:
+            self._digests = {}
+            if os.path.exists(self._digests_path):
+                with open(self._digests_path, 'r', encoding='utf-8') as f:
+                    self._digests = json.load(f)
+        abs_path = os.path.abspath(path)
+        st = os.stat(abs_path)
+        known = self._digests.get(abs_path)
+        if known and known[0] == st.st_size and known[1] == st.st_mtime_ns:
+            return known[2]
+
+        sha = hashlib.sha256()
+        with open(abs_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                sha.update(block)
+        digest = sha.hexdigest()
+        self._digests[abs_path] = [st.st_size, st.st_mtime_ns, digest]
+        atomic_write_bytes(self._digests_path, json.dumps(self._digests).encode('utf-8'))
+        return digest
+
+    def has(self, key: Optional[str]) -> bool:
+        return key is not None and os.path.exists(self._entry_path(key))
+
+    def get(self, stage: str, key: str) -> Tuple[bool, Any]:
+        path = self._entry_path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            self._count('misses', stage)
+            return False, None
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # Truncated, or pickled against classes that have since moved or
+            # been renamed: drop the entry so the recomputed value replaces it.
+            self._count('misses', stage)
+            self._remove(path)
+            return False, None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self._count('hits', stage)
+        return True, value
+
+    def put(self, stage: str, key: str, value: Any) -> None:
+        path = self._entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if self._total_bytes is not None:
+            self._total_bytes -= self._file_size(path)
+        atomic_write_bytes(path, data)
+        if self._total_bytes is None:
+            self.evict()
+            return
+        self._total_bytes += len(data)
+        if self._total_bytes > self.max_bytes:
+            self.evict()
+
+    @staticmethod
+    def _file_size(path: str) -> int:
+        try:
+            return os.stat(path).st_size
+        except FileNotFoundError:
+            return 0
+
+    def _remove(self, path: str) -> None:
+        size = self._file_size(path)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return
+        if self._total_bytes is not None:
+            self._total_bytes -= size
+
+    def evict(self) -> None:
+        # Walks every entry; other processes sharing the directory may have added
+        # or removed files, so this also resets the running total.
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith('.pkl'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+        self._total_bytes = total
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            if self.metrics is not None:
+                self.metrics.increment('cache_evictions')
+        self._total_bytes = total
+
+    def cached(self, stage: str, key: Optional[str], compute: Callable[[], Any]) -> Any:
+        if key is None:
+            return compute()
+        hit, value = self.get(stage, key)
+        if hit:
+            return value
+        value = compute()
+        self.put(stage, key, value)
+        return value
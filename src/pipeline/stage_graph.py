@@ -0,0 +1,172 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+
+class StageCancelled(Exception):
+    pass
+
+
+@dataclass
+class GraphStage:
+    name: str
+    fn: Callable[..., Any]
+    inputs: Tuple[str, ...]
+    outputs: Tuple[str, ...]
+
+
+@dataclass
+class StageTiming:
+    name: str
+    start: float  # seconds since the run started
+    end: float
+    thread: str = ''
+
+    @property
+    def seconds(self) -> float:
+        return self.end - self.start
+
+
+@dataclass
+class GraphRun:
+    values: Dict[str, Any]
+    timings: Dict[str, StageTiming] = field(default_factory=dict)
+    wall: float = 0.0
+    critical_path: List[StageTiming] = field(default_factory=list)
+
+    @property
+    def stage_seconds(self) -> float:
+        return sum(t.seconds for t in self.timings.values())
+
+    @property
+    def critical_seconds(self) -> float:
+        return sum(t.seconds for t in self.critical_path)
+
+    def summary_line(self) -> str:
+        path = ' -> '.join(f'{t.name} {t.seconds * 1000:.1f} ms' for t in self.critical_path)
+        return (
+            f'{path or "(no stages)"} = {self.critical_seconds * 1000:.1f} ms '
+            f'(wall {self.wall * 1000:.1f} ms, all stages {self.stage_seconds * 1000:.1f} ms)'
+        )
+
+
+class StageGraph:
+    """Runs stages as soon as the values they declare as inputs exist.
+
+    Each stage names its inputs and outputs; a stage function receives its
+    inputs as keyword arguments and returns its single output, or a tuple
+    for several. Independent stages run concurrently on a thread pool. When a
+    stage fails, no new stages start, cancelled is set (long stages may poll
+    it), running stages are waited for and the original exception is raised.
+    The run records per-stage timings and the critical path: the chain of
+    stages, each waiting on the last of its inputs, that ended the run.
+    """
+
+    def __init__(self, max_workers: int = 4) -> None:
+        self.max_workers = max_workers
+        self.stages: Dict[str, GraphStage] = {}
+        self.cancelled = threading.Event()
+        self._producers: Dict[str, str] = {}
+
+    def add(
+        self,
+        name: str,
+        fn: Callable[..., Any],
+        inputs: Sequence[str] = (),
+        outputs: Optional[Sequence[str]] = None,
+    ) -> None:
+        if name in self.stages:
+            raise ValueError(f'Duplicate stage: {name}')
+        outputs = tuple(outputs) if outputs is not None else (name,)
+        for output in outputs:
+            if output in self._producers:
+                raise ValueError(f'{output} is produced by both {self._producers[output]} and {name}')
+            self._producers[output] = name
+        self.stages[name] = GraphStage(name, fn, tuple(inputs), outputs)
+
+    def _check(self, provided: Iterable[str]) -> None:
+        available = set(provided)
+        for stage in self.stages.values():
+            for value in stage.inputs:
+                if value not in self._producers and value not in available:
+                    raise ValueError(f'Stage {stage.name} needs {value}, which no stage produces')
+        # Kahn's algorithm: every stage must become runnable, otherwise there is a cycle.
+        done = set(available)
+        remaining = dict(self.stages)
+        while remaining:
+            ready = [s for s in remaining.values() if all(v in done for v in s.inputs)]
+            if not ready:
+                raise ValueError(f'Stage graph has a cycle through: {", ".join(sorted(remaining))}')
+            for stage in ready:
+                done.update(stage.outputs)
+                del remaining[stage.name]
+
+    def _run_stage(self, stage: GraphStage, values: Dict[str, Any], origin: float) -> Tuple[Any, StageTiming]:
+        if self.cancelled.is_set():
+            raise StageCancelled(stage.name)
+        start = time.perf_counter() - origin
+        result = stage.fn(**{name: values[name] for name in stage.inputs})
+        timing = StageTiming(stage.name, start, time.perf_counter() - origin, threading.current_thread().name)
+        return result, timing
+
+    def run(self, values: Optional[Dict[str, Any]] = None) -> GraphRun:
+        values = dict(values or {})
+        self._check(values)
+        run = GraphRun(values=values)
+        origin = time.perf_counter()
+        pending = dict(self.stages)
+        running: Dict[Future, GraphStage] = {}
+        failure: Optional[BaseException] = None
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='stage')
+        try:
+            while pending or running:
+                if failure is None:
+                    for stage in [s for s in pending.values() if all(v in values for v in s.inputs)]:
+                        del pending[stage.name]
+                        running[pool.submit(self._run_stage, stage, values, origin)] = stage
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    try:
+                        result, timing = future.result()
+                    except BaseException as exc:
+                        if failure is None:
+                            failure = exc
+                            self.cancelled.set()
+                        continue
+                    outputs = result if len(stage.outputs) > 1 else (result,)
+                    values.update(zip(stage.outputs, outputs))
+                    run.timings[stage.name] = timing
+        except BaseException:  # e.g. KeyboardInterrupt while waiting
+            self.cancelled.set()
+            pool.shutdown(wait=True, cancel_futures=True)
+            raise
+        pool.shutdown(wait=True)
+        run.wall = time.perf_counter() - origin
+        if failure is not None:
+            raise failure
+        run.critical_path = self._critical_path(run.timings)
+        return run
+
+    def _critical_path(self, timings: Dict[str, StageTiming]) -> List[StageTiming]:
+        # Walk back from the stage that finished last through the input that arrived last.
+        if not timings:
+            return []
+        path = []
+        current: Optional[StageTiming] = max(timings.values(), key=lambda t: t.end)
+        seen: Set[str] = set()
+        while current is not None and current.name not in seen:
+            seen.add(current.name)
+            path.append(current)
+            upstream = [
+                timings[self._producers[v]]
+                for v in self.stages[current.name].inputs
+                if v in self._producers and self._producers[v] in timings
+            ]
+            current = max(upstream, key=lambda t: t.end) if upstream else None
+        path.reverse()
+        return path
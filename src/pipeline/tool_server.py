@@ -0,0 +1,498 @@
+import copy
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict
+from typing import Any, Callable, Deque, Dict, IO, List, Optional, Tuple
+from src.memory.memory_bank import MemoryBank
+from src.models.domain_models import CommentBatch
+from src.observability.metrics import Metrics
+from src.pipeline.match_pipeline import SCORE_MEMO_FILE, MatchInputs, run_match_pipeline
+from src.pipeline.stage_cache import StageCache
+from src.tools.dedup import ScoreMemo
+from src.tools.mcp_tools import get_mcp_tools
+from src.tools.parallel_scoring import ChunkScorer
+from src.tools.player_index import PlayerMentionIndex
+from src.tools.ranking import PlayerRanking
+from src.tools.reddit_fetcher import RedditFetcher
+from src.tools.sentiment_lexicon import SentimentLexicon
+from src.tools.vector_scoring import resolve_backend
+
+PROTOCOL_VERSION = '2024-11-05'
+SERVER_NAME = 'footypulse'
+# JSON-RPC 2.0 error codes; SERVER_BUSY is in the implementation-defined range.
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+SERVER_BUSY = -32000
+WARM_ENTRIES = 8  # threads and stats files kept warm
+LATENCY_WINDOW = 4096  # recent calls per tool used for percentiles
+
+
+class ToolError(Exception):
+    pass
+
+
+class LatencyStats:
+    """Per-tool call counts and p50/p99 over a window of recent calls."""
+
+    def __init__(self, window: int = LATENCY_WINDOW) -> None:
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Deque[float]] = {}
+        self._calls: Dict[str, int] = {}
+        self._errors: Dict[str, int] = {}
+
+    def record(self, name: str, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self._samples.setdefault(name, deque(maxlen=self.window)).append(seconds)
+            self._calls[name] = self._calls.get(name, 0) + 1
+            if not ok:
+                self._errors[name] = self._errors.get(name, 0) + 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            samples = {name: sorted(values) for name, values in self._samples.items()}
+            calls = dict(self._calls)
+            errors = dict(self._errors)
+
+        def percentile(values: List[float], q: float) -> float:
+            # Nearest rank, so p99 of few samples is the slowest call rather than an interpolation.
+            return values[min(len(values) - 1, max(0, int(q * len(values) + 0.5) - 1))]
+
+        return {
+            name: {
+                'calls': calls[name],
+                'errors': errors.get(name, 0),
+                'p50_ms': round(percentile(values, 0.50) * 1000, 3),
+                'p99_ms': round(percentile(values, 0.99) * 1000, 3),
+                'max_ms': round(values[-1] * 1000, 3),
+            }
+            for name, values in samples.items()
+        }
+
+
+class _WarmCache:
+    # Small LRU of values derived from a file, rebuilt when the file changes.
+    def __init__(self, size: int = WARM_ENTRIES) -> None:
+        self.size = size
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, Tuple[Tuple[int, int], Any]]' = OrderedDict()
+
+    def get(self, path: str, build: Callable[[str], Any]) -> Any:
+        st = os.stat(path)
+        version = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(path)
+                return entry[1]
+        value = build(path)
+        with self._lock:
+            self._entries[path] = (version, value)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return value
+
+
+class ToolServer:
+    """MCP-style tool server that keeps the pipeline warm between calls.
+
+    Requests are JSON-RPC 2.0 messages, one per line (the MCP stdio transport).
+    The lexicon, parsed threads, player mention indexes, the stage cache, the
+    score memo and the metrics and memory stores are loaded once and reused by every call, so
+    a call costs only its own work. Up to max_concurrency calls run at once
+    and at most max_pending may be queued; beyond that a call is rejected with
+    a "server busy" error instead of piling up. Pipeline tools share the stage
+    cache and memory store, so they run one at a time.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        metrics: Metrics,
+        memory_bank: MemoryBank,
+        lexicon: Optional[SentimentLexicon] = None,
+        cache: Optional[StageCache] = None,
+        backend: str = 'python',
+        max_concurrency: int = 4,
+        max_pending: int = 64,
+        output_dir: str = 'outputs/reports',
+    ) -> None:
+        if max_concurrency < 1 or max_pending < max_concurrency:
+            raise ValueError('max_concurrency must be at least 1 and max_pending at least max_concurrency')
+        if lexicon is None:
+            from src.agents.sentiment_agent import default_lexicon
+
+            lexicon = default_lexicon()
+        self.logger = logger
+        self.metrics = metrics
+        self.memory_bank = memory_bank
+        self.lexicon = lexicon
+        self.cache = cache
+        self.backend = resolve_backend(backend)
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+        self.output_dir = output_dir
+        self.stats = LatencyStats()
+        self.started = time.monotonic()
+        self.rejected = 0
+        self._threads = _WarmCache()
+        self._indexes = _WarmCache()
+        self._memo_path = os.path.join(cache.cache_dir, SCORE_MEMO_FILE) if cache is not None else None
+        self.score_memo = ScoreMemo.load(self._memo_path) if self._memo_path else ScoreMemo()
+        self._scorers = threading.local()
+        self._pipeline_lock = threading.Lock()
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._tools: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+            'reddit_fetch': self.reddit_fetch,
+            'score_comments': self.score_comments,
+            'player_impact': self.player_impact,
+            'generate_report': self.generate_report,
+            'server_stats': self.server_stats,
+        }
+
+    # Warm state
+
+    def _thread(self, path: str) -> CommentBatch:
+        return self._threads.get(path, lambda path: CommentBatch.from_dicts(RedditFetcher().iter_from_file(path)))
+
+    def _mention_index(self, stats_path: Optional[str]) -> Optional[PlayerMentionIndex]:
+        return self._indexes.get(stats_path, PlayerMentionIndex.from_stats_file) if stats_path else None
+
+    def _scorer(self, mention_index: Optional[PlayerMentionIndex]) -> ChunkScorer:
+        # One scorer per worker thread: the numpy backend's vocabulary is not thread-safe.
+        scorers = getattr(self._scorers, 'by_index', None)
+        if scorers is None:
+            scorers = self._scorers.by_index = {}
+        scorer = scorers.get(id(mention_index))
+        if scorer is None or scorer.mention_index is not mention_index:
+            scorer = scorers[id(mention_index)] = ChunkScorer(self.lexicon, mention_index, self.backend)
+        return scorer
+
+    def _inputs(self, arguments: Dict[str, Any], output_path: Optional[str] = None) -> MatchInputs:
+        thread_path = _required(arguments, 'thread_path')
+        match_id = arguments.get('match_id') or os.path.splitext(os.path.basename(thread_path))[0]
+        return MatchInputs(
+            match_id=match_id,
+            thread_path=thread_path,
+            stats_path=_required(arguments, 'stats_path'),
+            output_path=output_path or os.path.join(self.output_dir, f'{match_id}.md'),
+        )
+
+    # Tools
+
+    def reddit_fetch(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        source = _required(arguments, 'source')
+        path = _required(arguments, 'path')
+        limit = int(arguments.get('limit', 20))
+        if source == 'file':
+            batch = self._thread(path)
+        elif source == 'url':
+            batch = CommentBatch.from_dicts(RedditFetcher().fetch_from_url(path))
+        else:
+            raise ToolError(f'Unknown source: {source} (expected file or url)')
+        return {
+            'num_comments': len(batch),
+            'comments': [
+                {'author': c.author, 'team': c.team, 'text': c.text} for c in batch[:max(limit, 0)]
+            ],
+        }
+
+    def score_comments(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        if 'texts' in arguments:
+            batch = CommentBatch()
+            for text in arguments['texts']:
+                batch.append('unknown', str(text), 'unknown')
+        elif 'thread_path' in arguments:
+            # Scorers replace the score, label and mention columns rather than
+            # mutating them, so a shallow copy leaves the warm thread untouched.
+            batch = copy.copy(self._thread(arguments['thread_path']))
+        else:
+            raise ToolError('score_comments needs texts or thread_path')
+        mention_index = self._mention_index(arguments.get('stats_path'))
+        self._scorer(mention_index).score_into(batch, len(batch) or 1)
+        limit = int(arguments.get('limit', 100))
+        return {
+            'num_comments': len(batch),
+            'sentiment': batch.label_counts(),
+            'comments': [
+                {'text': c.text, 'sentiment': c.sentiment, 'score': c.score, 'mentions': list(c.mentions)}
+                for c in batch[:max(limit, 0)]
+            ],
+        }
+
+    def _run_pipeline(self, inputs: MatchInputs, **options: Any) -> Dict[str, Any]:
+        with self._pipeline_lock:
+            return run_match_pipeline(
+                inputs,
+                self.logger,
+                self.metrics,
+                self.memory_bank,
+                lexicon=self.lexicon,
+                cache=self.cache,
+                backend=self.backend,
+                mention_index=self._mention_index(inputs.stats_path),
+                score_memo=self.score_memo,
+                **options,
+            )
+
+    def player_impact(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        # Only the impact stage is recomputed; fetch and sentiment come from the stage cache.
+        result = self._run_pipeline(
+            self._inputs(arguments), stages=['impact'], impact_formula=arguments.get('impact_formula')
+        )
+        ranking = PlayerRanking(result['player_impacts'])
+        players = ranking.ranked(arguments.get('rank_by', 'impact'))
+        if 'top' in arguments:
+            players = players[:int(arguments['top'])]
+        return {'match_id': result['match_id'], 'players': [asdict(p) for p in players]}
+
+    def generate_report(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        result = self._run_pipeline(
+            self._inputs(arguments, arguments.get('output_path')),
+            rank_by=arguments.get('rank_by'),
+            report_formats=arguments.get('formats'),
+        )
+        return {
+            'match_id': result['match_id'],
+            'report_path': result['report_path'],
+            'match_summary': result['match_summary'],
+        }
+
+    def server_stats(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        with self._pending_lock:
+            pending = self._pending
+        return {
+            'uptime_s': round(time.monotonic() - self.started, 3),
+            'pending': pending,
+            'rejected': self.rejected,
+            'max_concurrency': self.max_concurrency,
+            'max_pending': self.max_pending,
+            'tools': self.stats.snapshot(),
+        }
+
+    def call_tool(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        # MCP tools/call result: tool failures are results with isError, not protocol errors.
+        start = time.perf_counter()
+        ok = True
+        try:
+            payload = json.dumps(self._tools[name](arguments), default=str)
+        except Exception as exc:
+            ok = False
+            self.logger.error(f'ToolServer: {name} failed: {exc}')
+            payload = f'{type(exc).__name__}: {exc}'
+        seconds = time.perf_counter() - start
+        self.stats.record(name, seconds, ok)
+        self.metrics.increment(f'tool_calls.{name}')
+        self.metrics.observe(f'latency.tool.{name}', seconds)
+        return {'content': [{'type': 'text', 'text': payload}], 'isError': not ok}
+
+    # JSON-RPC
+
+    def handle(self, message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Answers one request; returns None for notifications."""
+        method = message.get('method')
+        params = message.get('params') or {}
+        if 'id' not in message:
+            return None  # notifications (e.g. notifications/initialized) need no reply
+        if not isinstance(params, dict):
+            return _error(message['id'], INVALID_PARAMS, 'params must be an object')
+        if method == 'initialize':
+            result: Any = {
+                'protocolVersion': PROTOCOL_VERSION,
+                'capabilities': {'tools': {}},
+                'serverInfo': {'name': SERVER_NAME, 'version': '1.0'},
+            }
+        elif method == 'ping':
+            result = {}
+        elif method == 'tools/list':
+            result = {
+                'tools': [
+                    {'name': t['name'], 'description': t['description'], 'inputSchema': t['input_schema']}
+                    for t in get_mcp_tools()
+                ]
+            }
+        elif method == 'tools/call':
+            name = params.get('name')
+            arguments = params.get('arguments') or {}
+            if not isinstance(name, str) or name not in self._tools:
+                return _error(message['id'], INVALID_PARAMS, f'Unknown tool: {name}')
+            if not isinstance(arguments, dict):
+                return _error(message['id'], INVALID_PARAMS, 'arguments must be an object')
+            result = self.call_tool(name, arguments)
+        else:
+            return _error(message['id'], METHOD_NOT_FOUND, f'Method not found: {method}')
+        return {'jsonrpc': '2.0', 'id': message['id'], 'result': result}
+
+    def _write(self, out: IO[str], response: Dict[str, Any]) -> None:
+        line = json.dumps(response, separators=(',', ':'), default=str)
+        with self._write_lock:
+            out.write(line + '\n')
+            out.flush()
+
+    def _dispatch(self, pool: ThreadPoolExecutor, out: IO[str], message: Dict[str, Any]) -> None:
+        with self._pending_lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                busy = True
+            else:
+                self._pending += 1
+                busy = False
+        if busy:
+            self.metrics.increment('tool_calls_rejected')
+            self._write(out, _error(message.get('id'), SERVER_BUSY, 'Server busy, retry later'))
+            return
+
+        def run() -> None:
+            try:
+                response = self.handle(message)
+            except Exception as exc:
+                self.logger.exception(f'ToolServer: {message.get("method")} failed')
+                response = _error(message.get('id'), INTERNAL_ERROR, f'{type(exc).__name__}: {exc}')
+            finally:
+                with self._pending_lock:
+                    self._pending -= 1
+            if response is not None:
+                self._write(out, response)
+
+        pool.submit(run)
+
+    def serve(self, stdin: IO[str], stdout: IO[str]) -> None:
+        """Reads requests until stdin closes; replies may arrive out of order."""
+        self.logger.info(f'ToolServer: serving {len(self._tools)} tools on stdio')
+        with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='tool') as pool:
+            for line in stdin:
+                if not line.strip():
+                    continue
+                try:
+                    message = json.loads(line)
+                except json.JSONDecodeError as exc:
+                    self._write(stdout, _error(None, PARSE_ERROR, f'Parse error: {exc}'))
+                    continue
+                if not isinstance(message, dict) or message.get('jsonrpc') != '2.0' or 'method' not in message:
+                    self._write(stdout, _error(
+                        message.get('id') if isinstance(message, dict) else None, INVALID_REQUEST, 'Invalid request'
+                    ))
+                    continue
+                if message.get('method') in ('ping', 'initialize', 'tools/list'):
+                    response = self.handle(message)  # cheap, answered inline even when busy
+                    if response is not None:
+                        self._write(stdout, response)
+                    continue
+                self._dispatch(pool, stdout, message)
+        if self._memo_path is not None:
+            self.score_memo.save(self._memo_path)
+        for name, row in self.stats.snapshot().items():
+            self.logger.info(
+                f"ToolServer: {name} calls={row['calls']} errors={row['errors']} "
+                f"p50={row['p50_ms']}ms p99={row['p99_ms']}ms"
+            )
+
+
+def _required(arguments: Dict[str, Any], key: str) -> Any:
+    if key not in arguments:
+        raise ToolError(f'Missing argument: {key}')
+    return arguments[key]
+
+
+def _error(request_id: Any, code: int, message: str) -> Dict[str, Any]:
+    return {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': code, 'message': message}}
+
+
+class ToolClient:
+    """Local client that starts the tool server as a subprocess and talks JSON-RPC over its stdio.
+
+    Calls may be issued from several threads, or with call_async(); replies
+    are matched to requests by id.
+    """
+
+    def __init__(self, command: Optional[List[str]] = None, cwd: Optional[str] = None) -> None:
+        root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.process = subprocess.Popen(
+            command or [sys.executable, 'agent_main.py', '--serve'],
+            cwd=cwd or root,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+        )
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._waiting: Dict[int, Future] = {}
+        self._reader = threading.Thread(target=self._read_replies, daemon=True)
+        self._reader.start()
+        self.server_info = self.request('initialize', {'protocolVersion': PROTOCOL_VERSION, 'capabilities': {}})
+        self._send({'jsonrpc': '2.0', 'method': 'notifications/initialized'})
+
+    def _send(self, message: Dict[str, Any]) -> None:
+        assert self.process.stdin is not None
+        with self._lock:
+            self.process.stdin.write(json.dumps(message) + '\n')
+            self.process.stdin.flush()
+
+    def _read_replies(self) -> None:
+        assert self.process.stdout is not None
+        for line in self.process.stdout:
+            reply = json.loads(line)
+            future = self._waiting.pop(reply.get('id'), None)
+            if future is None:
+                continue
+            if 'error' in reply:
+                future.set_exception(ToolError(f"{reply['error']['code']}: {reply['error']['message']}"))
+            else:
+                future.set_result(reply['result'])
+        for future in list(self._waiting.values()):  # server exited
+            future.set_exception(ToolError('Tool server exited'))
+
+    def request_async(self, method: str, params: Optional[Dict[str, Any]] = None) -> 'Future[Any]':
+        future: 'Future[Any]' = Future()
+        with self._lock:
+            self._next_id += 1
+            request_id = self._next_id
+            self._waiting[request_id] = future
+        self._send({'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params or {}})
+        return future
+
+    def request(self, method: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        return self.request_async(method, params).result()
+
+    def list_tools(self) -> List[Dict[str, Any]]:
+        return self.request('tools/list')['tools']
+
+    def call_async(self, name: str, **arguments: Any) -> 'Future[Any]':
+        return self.request_async('tools/call', {'name': name, 'arguments': arguments})
+
+    def call(self, name: str, **arguments: Any) -> Any:
+        """Calls a tool and returns its decoded result; raises ToolError if the tool failed."""
+        return decode_result(self.call_async(name, **arguments).result())
+
+    def close(self) -> None:
+        if self.process.stdin is not None:
+            self.process.stdin.close()
+        self.process.wait()
+        self._reader.join()
+
+    def __enter__(self) -> 'ToolClient':
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def decode_result(result: Dict[str, Any]) -> Any:
+    text = ''.join(part.get('text', '') for part in result.get('content', []))
+    if result.get('isError'):
+        raise ToolError(text)
+    return json.loads(text)
@@ -0,0 +1,250 @@
+import asyncio
+import json
+import random
+import ssl
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+MAX_REDIRECTS = 5
+
+HostKey = Tuple[str, str, int]
+
+
+class FetchError(Exception):
+    def __init__(self, url: str, message: str, status: Optional[int] = None) -> None:
+        super().__init__(f'{url}: {message}')
+        self.url = url
+        self.status = status
+
+
+class _StaleConnection(ConnectionResetError):
+    pass
+
+
+class _Connection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.requests_served = 0
+
+    async def close(self) -> None:
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except (OSError, ssl.SSLError):
+            pass
+
+
+class _ConnectionPool:
+    def __init__(self, max_per_host: int, timeout: float) -> None:
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self._idle: Dict[HostKey, List[_Connection]] = {}
+        self._limits: Dict[HostKey, asyncio.Semaphore] = {}
+        self._ssl_context: Optional[ssl.SSLContext] = None
+        self.connections_opened = 0
+
+    def _limit(self, key: HostKey) -> asyncio.Semaphore:
+        if key not in self._limits:
+            self._limits[key] = asyncio.Semaphore(self.max_per_host)
+        return self._limits[key]
+
+    async def acquire(self, key: HostKey) -> _Connection:
+        await self._limit(key).acquire()
+        idle = self._idle.get(key)
+        if idle:
+            return idle.pop()
+        scheme, host, port = key
+        if scheme == 'https' and self._ssl_context is None:
+            self._ssl_context = ssl.create_default_context()
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port, ssl=self._ssl_context if scheme == 'https' else None),
+                self.timeout,
+            )
+        except BaseException:
+            self._limit(key).release()
+            raise
+        self.connections_opened += 1
+        return _Connection(reader, writer)
+
+    async def release(self, key: HostKey, conn: _Connection, reusable: bool) -> None:
+        if reusable:
+            self._idle.setdefault(key, []).append(conn)
+        else:
+            await conn.close()
+        self._limit(key).release()
+
+    async def close(self) -> None:
+        for conns in self._idle.values():
+            for conn in conns:
+                await conn.close()
+        self._idle = {}
+
+
+class AsyncRedditFetcher:
+    def __init__(
+        self,
+        max_concurrency: int = 16,
+        max_connections_per_host: int = 8,
+        max_retries: int = 3,
+        backoff_base: float = 0.2,
+        timeout: float = 15.0,
+        max_pages: Optional[int] = None,
+        user_agent: str = 'footypulse/1.0',
+    ) -> None:
+        self.max_concurrency = max_concurrency
+        self.max_connections_per_host = max_connections_per_host
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.timeout = timeout
+        self.max_pages = max_pages
+        self.user_agent = user_agent
+        self.stats: Dict[str, int] = {'requests': 0, 'retries': 0, 'pages': 0, 'connections_opened': 0}
+        self._pool: Optional[_ConnectionPool] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def _read_body(
+        self, reader: asyncio.StreamReader, status: int, headers: Dict[str, str]
+    ) -> Tuple[bytes, bool]:
+        if status in (204, 304):  # never have a body, whatever the headers say
+            return b'', True
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            parts: List[bytes] = []
+            while True:
+                size = int((await reader.readline()).split(b';', 1)[0].strip(), 16)
+                if size == 0:
+                    while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                        pass
+                    return b''.join(parts), True
+                parts.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+        if 'content-length' in headers:
+            return await reader.readexactly(int(headers['content-length'])), True
+        return await reader.read(), False
+
+    async def _read_head(self, reader: asyncio.StreamReader) -> Tuple[int, Dict[str, str]]:
+        status_line = await asyncio.wait_for(reader.readline(), self.timeout)
+        if not status_line:
+            raise ConnectionResetError('Connection closed before response')
+        status = int(status_line.split()[1])
+        headers: Dict[str, str] = {}
+        while True:
+            line = await asyncio.wait_for(reader.readline(), self.timeout)
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        return status, headers
+
+    async def _request_once(self, url: str) -> Tuple[int, Dict[str, str], bytes]:
+        parts = urlsplit(url)
+        scheme = parts.scheme or 'http'
+        port = parts.port or (443 if scheme == 'https' else 80)
+        key: HostKey = (scheme, parts.hostname or 'localhost', port)
+        target = parts.path or '/'
+        if parts.query:
+            target += '?' + parts.query
+
+        assert self._pool is not None
+        conn = await self._pool.acquire(key)
+        reusable = False
+        try:
+            request = (
+                f'GET {target} HTTP/1.1\r\n'
+                f'Host: {parts.netloc}\r\n'
+                f'User-Agent: {self.user_agent}\r\n'
+                'Accept: application/json\r\n'
+                'Connection: keep-alive\r\n\r\n'
+            )
+            conn.writer.write(request.encode('ascii'))
+            await conn.writer.drain()
+
+            try:
+                status, headers = await self._read_head(conn.reader)
+            except ConnectionResetError:
+                if conn.requests_served:
+                    raise _StaleConnection('Idle keep-alive connection was closed by the server')
+                raise
+            while 100 <= status < 200:  # interim responses (100 Continue) have no body
+                status, headers = await self._read_head(conn.reader)
+            body, framed = await asyncio.wait_for(self._read_body(conn.reader, status, headers), self.timeout)
+            conn.requests_served += 1
+            reusable = framed and headers.get('connection', '').lower() != 'close'
+            return status, headers, body
+        finally:
+            await self._pool.release(key, conn, reusable)
+
+    async def fetch_json(self, url: str) -> Dict[str, Any]:
+        assert self._semaphore is not None
+        async with self._semaphore:
+            attempt = 0
+            redirects = 0
+            while True:
+                self.stats['requests'] += 1
+                try:
+                    status, headers, body = await self._request_once(url)
+                except _StaleConnection:
+                    continue
+                except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError, IndexError) as exc:
+                    error: Exception = FetchError(url, f'{type(exc).__name__}: {exc}')
+                else:
+                    if status == 200:
+                        return json.loads(body.decode('utf-8'))
+                    if status in REDIRECT_STATUSES and headers.get('location'):
+                        redirects += 1
+                        if redirects > MAX_REDIRECTS:
+                            raise FetchError(url, f'More than {MAX_REDIRECTS} redirects', status)
+                        url = urljoin(url, headers['location'])
+                        continue
+                    error = FetchError(url, f'HTTP {status}', status)
+                    if status not in RETRY_STATUSES:
+                        raise error
+
+                if attempt >= self.max_retries:
+                    raise error
+                attempt += 1
+                self.stats['retries'] += 1
+                delay = self.backoff_base * (2 ** (attempt - 1))
+                await asyncio.sleep(delay + random.uniform(0, delay / 2))
+
+    @staticmethod
+    def _page_url(url: str, after: str) -> str:
+        parts = urlsplit(url)
+        query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != 'after']
+        query.append(('after', after))
+        return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), parts.fragment))
+
+    async def fetch_thread(self, url: str) -> List[Dict[str, Any]]:
+        comments: List[Dict[str, Any]] = []
+        page_url: Optional[str] = url
+        pages = 0
+        seen = set()
+        while page_url is not None:
+            data = await self.fetch_json(page_url)
+            pages += 1
+            self.stats['pages'] += 1
+            comments.extend(data.get('comments', []))
+            after = data.get('after')
+            # A cursor that comes round again would page forever.
+            if not after or after in seen or (self.max_pages is not None and pages >= self.max_pages):
+                break
+            seen.add(after)
+            page_url = self._page_url(url, str(after))
+        return comments
+
+    async def fetch_many(self, urls: List[str]) -> List[List[Dict[str, Any]]]:
+        self._pool = _ConnectionPool(self.max_connections_per_host, self.timeout)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        try:
+            return list(await asyncio.gather(*(self.fetch_thread(u) for u in urls)))
+        finally:
+            self.stats['connections_opened'] += self._pool.connections_opened
+            await self._pool.close()
+            self._pool = None
+
+    def fetch_all(self, urls: List[str]) -> List[Dict[str, Any]]:
+        threads = asyncio.run(self.fetch_many(urls))
+        return [comment for thread in threads for comment in thread]
@@ -1,15 +1,393 @@
 import contextlib
+import hashlib
 import io
-from typing import Tuple
+import multiprocessing
+import queue
+import signal
+import time
+from collections import OrderedDict
+from dataclasses import fields, is_dataclass
+from multiprocessing.connection import Connection, wait
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from src.observability.metrics import Metrics
 
+try:
+    import resource
+except ImportError:  # not available on Windows; only the wall-clock timeout applies
+    resource = None  # type: ignore[assignment]
+
+SAFE_BUILTINS: Dict[str, Any] = {'print': print, 'len': len, 'range': range}
+# Formulas evaluated over rows (e.g. custom impact scores) also get numeric helpers.
+FORMULA_BUILTINS: Dict[str, Any] = {
+    **SAFE_BUILTINS,
+    'abs': abs, 'min': min, 'max': max, 'round': round, 'sum': sum, 'float': float, 'int': int, 'bool': bool,
+}
+DEFAULT_SNIPPET_TIMEOUT = 5.0
+DEFAULT_SNIPPET_MEMORY_MB = 256
+DEFAULT_SNIPPET_BATCH = 1024
+
+
+class SnippetError(Exception):
+    pass
+
+
+class SnippetTimeout(SnippetError):
+    pass
 
-def run_safe_python_snippet(code: str) -> Tuple[bool, str]:
-    safe_globals = {'__builtins__': {'print': print, 'len': len, 'range': range}}
-    buffer = io.StringIO()
 
+def _run_captured(code: Any) -> Tuple[bool, str]:
+    buffer = io.StringIO()
     try:
         with contextlib.redirect_stdout(buffer):
-            exec(code, safe_globals, {})
+            exec(code, {'__builtins__': SAFE_BUILTINS}, {})
         return True, buffer.getvalue()
     except Exception as exc:
-        return False, str(exc)
+        return False, str(exc) or type(exc).__name__
+
+
+def run_safe_python_snippet(code: str, pool: Optional['SnippetPool'] = None) -> Tuple[bool, str]:
+    # In-process by default; with a pool the snippet runs in a resource-limited
+    # subprocess. Neither is a sandbox: the builtins are trimmed, not secured.
+    if pool is not None:
+        return pool.run(code)
+    return _run_captured(code)
+
+
+def source_digest(source: str) -> str:
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+
+def _compile(source: str, mode: str) -> Tuple[str, Any]:
+    # Row formulas may be a bare expression or statements that assign `result`.
+    if mode == 'formula':
+        try:
+            return 'eval', compile(source, '<snippet>', 'eval')
+        except SyntaxError:
+            pass
+    return 'exec', compile(source, '<snippet>', 'exec')
+
+
+def _evaluate_row(kind: str, code: Any, names: Sequence[str], values: Sequence[Any]) -> Any:
+    scope = dict(zip(names, values))
+    scope['__builtins__'] = FORMULA_BUILTINS
+    if kind == 'eval':
+        return eval(code, scope)
+    exec(code, scope)
+    if 'result' not in scope:
+        raise NameError('formula must be an expression or assign result')
+    return scope['result']
+
+
+def _address_space() -> int:
+    # Current virtual size, so the memory cap applies to what the snippet adds.
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[0]) * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _on_cpu_limit(signum: int, frame: Any) -> None:
+    raise SnippetTimeout('CPU time limit exceeded')
+
+
+def _limit_cpu(cpu_seconds: Optional[float]) -> None:
+    # RLIMIT_CPU counts the worker's lifetime, so each call gets a fresh
+    # allowance on top of what the worker has already used.
+    if resource is None or cpu_seconds is None:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = int(usage.ru_utime + usage.ru_stime + cpu_seconds) + 1
+    hard = resource.getrlimit(resource.RLIMIT_CPU)[1]
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _serve(conn: Connection, memory_bytes: Optional[int], cpu_seconds: Optional[float], cache_size: int) -> None:
+    # Worker loop: one request in, one reply out, until the pipe closes.
+    # Replies are ('ok', value), ('error', (row, message)) or ('missing', None)
+    # when the parent sent only the digest of a source this worker has not seen.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent handles Ctrl-C
+    if resource is not None:
+        if memory_bytes is not None:
+            limit = _address_space() + memory_bytes
+            resource.setrlimit(resource.RLIMIT_AS, (limit, resource.getrlimit(resource.RLIMIT_AS)[1]))
+        if hasattr(signal, 'SIGXCPU'):
+            signal.signal(signal.SIGXCPU, _on_cpu_limit)
+    compiled: 'OrderedDict[Tuple[str, str], Tuple[str, Any]]' = OrderedDict()
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, OSError):
+            return
+        if request is None:
+            return
+        op, digest, source, payload = request
+        mode = 'formula' if op == 'evaluate' else 'exec'
+        row = -1
+        try:
+            entry = compiled.get((digest, mode))
+            if entry is None:
+                if source is None:
+                    conn.send(('missing', None))
+                    continue
+                entry = _compile(source, mode)
+                compiled[(digest, mode)] = entry
+                if len(compiled) > cache_size:
+                    compiled.popitem(last=False)
+            else:
+                compiled.move_to_end((digest, mode))
+            _limit_cpu(cpu_seconds)
+            if op == 'run':
+                reply: Tuple[str, Any] = ('ok', _run_captured(entry[1]))
+            else:
+                kind, code = entry
+                names, rows = payload
+                results = []
+                for row, values in enumerate(rows):
+                    results.append(_evaluate_row(kind, code, names, values))
+                reply = ('ok', results)
+        except Exception as exc:
+            reply = ('error', (row, f'{type(exc).__name__}: {exc}'))
+        try:
+            conn.send(reply)
+        except MemoryError:
+            conn.send(('error', (-1, 'MemoryError: result too large')))
+
+
+class _Worker:
+    def __init__(self, context: Any, limits: Tuple[Optional[int], Optional[float], int]) -> None:
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child, *limits), daemon=True)
+        self.process.start()
+        child.close()
+        self.broken = False
+
+    def kill(self) -> None:
+        # Killed as soon as it misbehaves so a runaway snippet stops using CPU;
+        # the pool replaces it when the worker is checked back in.
+        self.broken = True
+        self.process.kill()
+
+    def stop(self, kill: bool = False) -> None:
+        if not kill:
+            with contextlib.suppress(OSError):
+                self.conn.send(None)
+            self.process.join(1.0)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class SnippetPool:
+    """Runs snippets in a pool of pre-started, resource-limited worker processes.
+
+    Each call is bounded by a wall-clock timeout (the worker is killed and
+    replaced), and on POSIX by a per-call CPU limit and a cap on the memory a
+    worker may add (RLIMIT_CPU / RLIMIT_AS). Workers keep compiled code keyed by
+    the source's SHA-256, so after the first call only the digest crosses the
+    pipe. evaluate() applies one formula to many rows, split into batches that
+    are spread over the workers, so a round trip costs per batch, not per row.
+
+    The limits bound what a snippet costs, not what it can reach: restricted
+    builtins are not a sandbox, so only trusted code should run here.
+    """
+
+    def __init__(
+        self,
+        workers: int = 1,
+        timeout: float = DEFAULT_SNIPPET_TIMEOUT,
+        memory_mb: Optional[int] = DEFAULT_SNIPPET_MEMORY_MB,
+        cpu_seconds: Optional[float] = None,
+        batch_size: int = DEFAULT_SNIPPET_BATCH,
+        cache_size: int = 256,
+        metrics: Optional[Metrics] = None,
+    ) -> None:
+        if workers < 1:
+            raise ValueError('workers must be at least 1')
+        if batch_size < 1:
+            raise ValueError('batch_size must be at least 1')
+        self.workers = workers
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.metrics = metrics
+        # forkserver workers start from a clean process, not a copy of a parent
+        # that may hold threads, sockets or numpy buffers.
+        methods = multiprocessing.get_all_start_methods()
+        self._context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        memory_bytes = memory_mb * 1024 * 1024 if memory_mb is not None else None
+        self._limits = (memory_bytes, cpu_seconds if cpu_seconds is not None else timeout, cache_size)
+        self._idle: 'queue.Queue[_Worker]' = queue.Queue()
+        self._all: List[_Worker] = []
+        for _ in range(workers):
+            self._add_worker()
+        self._closed = False
+
+    def _add_worker(self) -> _Worker:
+        worker = _Worker(self._context, self._limits)
+        self._all.append(worker)
+        return self._release(worker)
+
+    def _release(self, worker: _Worker) -> _Worker:
+        self._idle.put(worker)
+        return worker
+
+    def _replace(self, worker: _Worker) -> None:
+        worker.stop(kill=True)
+        self._all.remove(worker)
+        self._add_worker()
+        self._count('snippet_worker_restarts')
+
+    def _count(self, key: str, amount: int = 1) -> None:
+        if self.metrics is not None:
+            self.metrics.increment(key, amount)
+
+    @contextlib.contextmanager
+    def _checkout(self, wanted: int) -> Iterator[List[_Worker]]:
+        # Blocks for one worker, then takes whichever others are idle.
+        if self._closed:
+            raise SnippetError('SnippetPool is closed')
+        taken = [self._idle.get()]
+        while len(taken) < wanted:
+            try:
+                taken.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        healthy = set(taken)
+        try:
+            yield taken
+        except BaseException:
+            healthy.clear()
+            raise
+        finally:
+            for worker in taken:
+                if worker in healthy and not worker.broken and worker.process.is_alive():
+                    self._release(worker)
+                elif worker in self._all:
+                    self._replace(worker)
+
+    def _exchange(
+        self, workers: List[_Worker], op: str, source: str, payloads: Sequence[Any]
+    ) -> List[Any]:
+        # Scatter payloads over the workers and gather replies in order. A
+        # worker that errors or times out is replaced; on the first failure the
+        # others finish their current payload and the error is raised.
+        digest = source_digest(source)
+        results: List[Any] = [None] * len(payloads)
+        pending: Dict[Connection, Tuple[_Worker, int, float]] = {}
+        failure: Optional[SnippetError] = None
+        next_payload = 0
+
+        def submit(worker: _Worker, index: int, with_source: bool) -> None:
+            nonlocal failure
+            try:
+                worker.conn.send((op, digest, source if with_source else None, payloads[index]))
+            except OSError:  # the worker died between calls
+                worker.kill()
+                failure = failure or SnippetError('Snippet worker exited unexpectedly')
+                return
+            pending[worker.conn] = (worker, index, time.monotonic() + self.timeout)
+
+        for worker in workers:
+            if next_payload < len(payloads):
+                submit(worker, next_payload, with_source=False)
+                next_payload += 1
+        while pending:
+            deadline = min(entry[2] for entry in pending.values())
+            ready = wait(list(pending), timeout=max(deadline - time.monotonic(), 0))
+            if not ready:
+                now = time.monotonic()
+                for conn, (worker, index, expires) in list(pending.items()):
+                    if expires <= now:
+                        del pending[conn]
+                        self._count('snippet_timeouts')
+                        worker.kill()
+                        failure = failure or SnippetTimeout(f'Snippet timed out after {self.timeout:g}s')
+                continue
+            for conn in ready:
+                worker, index, _ = pending.pop(conn)
+                try:
+                    status, value = worker.conn.recv()
+                except (EOFError, OSError):
+                    worker.kill()
+                    failure = failure or SnippetError('Snippet worker exited (memory or CPU limit exceeded)')
+                    continue
+                if status == 'missing':
+                    submit(worker, index, with_source=True)
+                    continue
+                if status == 'error':
+                    row, message = value
+                    self._count('snippet_errors')
+                    if failure is None:
+                        where = f'row {index * self.batch_size + row}: ' if op == 'evaluate' and row >= 0 else ''
+                        failure = (SnippetTimeout if message.startswith('SnippetTimeout') else SnippetError)(
+                            where + message
+                        )
+                else:
+                    results[index] = value
+                if failure is None and next_payload < len(payloads):
+                    submit(worker, next_payload, with_source=False)
+                    next_payload += 1
+        if failure is not None:
+            raise failure
+        return results
+
+    def run(self, code: str) -> Tuple[bool, str]:
+        """Same contract as run_safe_python_snippet: (ok, captured output or error)."""
+        start = time.perf_counter()
+        try:
+            with self._checkout(1) as workers:
+                (result,) = self._exchange(workers, 'run', code, [None])
+        except SnippetError as exc:
+            return False, str(exc)
+        finally:
+            self._observe('snippet_runs', 1, start)
+        return result
+
+    def evaluate(self, code: str, rows: Sequence[Any]) -> List[Any]:
+        """Evaluates one formula against every row; returns one value per row.
+
+        Rows are dicts or dataclasses (e.g. PlayerImpact) whose fields become
+        the formula's variables. The formula is an expression such as
+        `goals * 4 + sentiment_score`, or statements that assign `result`.
+        Raises SnippetTimeout or SnippetError, naming the failing row.
+        """
+        if not rows:
+            return []
+        start = time.perf_counter()
+        first = rows[0]
+        if is_dataclass(first):
+            names = tuple(f.name for f in fields(first))
+            values = [tuple(getattr(row, name) for name in names) for row in rows]
+        else:
+            names = tuple(first)
+            values = [tuple(row[name] for name in names) for row in rows]
+        size = self.batch_size
+        payloads = [(names, values[lo:lo + size]) for lo in range(0, len(values), size)]
+        try:
+            with self._checkout(min(len(payloads), self.workers)) as workers:
+                chunks = self._exchange(workers, 'evaluate', code, payloads)
+        finally:
+            self._observe('snippet_rows', len(rows), start)
+        return [value for chunk in chunks for value in chunk]
+
+    def _observe(self, key: str, amount: int, start: float) -> None:
+        if self.metrics is not None:
+            self.metrics.increment(key, amount)
+            self.metrics.observe('latency.snippet', time.perf_counter() - start)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        for worker in self._all:
+            worker.stop()
+        self._all = []
+
+    def __enter__(self) -> 'SnippetPool':
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
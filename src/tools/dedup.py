@@ -0,0 +1,340 @@
+import os
+import pickle
+import time
+from array import array
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+from src.models.domain_models import LABEL_CODES, CommentBatch, StringTable
+from src.observability.metrics import Metrics
+from src.tools.file_utils import atomic_write_bytes, file_lock
+from src.tools.sentiment_lexicon import Weight
+from src.tools.vector_scoring import _require_numpy
+
+DEFAULT_MEMO_ENTRIES = 100_000
+DEFAULT_NUM_PERM = 64
+MEMO_FORMAT_VERSION = 1
+MIN_RATE_SAMPLE = 1000  # texts a scoring pass needs before its per-text cost is trusted
+_SHINGLE_CHUNK = 1 << 16  # shingles hashed per numpy pass in MinHash signatures
+_UNIGRAM = 1 << 63  # tags one-word shingles so they never equal a word pair
+_BAND_MIX = 0x9E3779B97F4A7C15
+
+MemoEntry = Tuple[Weight, Tuple[str, ...]]
+
+
+def normalize_text(text: str) -> str:
+    # Scoring and mention lookup lowercase the text and split it on anything that
+    # is not a letter, digit or apostrophe, so texts equal after this get the same
+    # score and mentions. Inner runs of whitespace are left alone: collapsing them
+    # costs more than scoring saves on threads with few duplicates.
+    return text.lower().strip()
+
+
+class ScoreMemo:
+    """Bounded LRU of normalized comment text -> (score, mentioned players).
+
+    Entries are only valid for the lexicon and player index they were scored
+    with; the fingerprint names that pair and a mismatch empties the memo.
+    It also keeps the average cost of scoring one text, so a run served from
+    the memo can still estimate the time it saved. load() and save() keep it
+    in a pickle between runs; save() merges in what other processes (e.g.
+    batch workers sharing the cache) saved since this memo was loaded.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MEMO_ENTRIES, fingerprint: str = '') -> None:
+        self.max_entries = max_entries
+        self.fingerprint = fingerprint
+        self.seconds_per_text: Optional[float] = None
+        self.dirty = False
+        self._entries: 'OrderedDict[str, MemoEntry]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def reset(self, fingerprint: str) -> None:
+        if fingerprint != self.fingerprint:
+            self.fingerprint = fingerprint
+            self.seconds_per_text = None
+            self.dirty = bool(self._entries)
+            self._entries.clear()
+
+    def record_cost(self, texts: int, seconds: float) -> None:
+        if texts < MIN_RATE_SAMPLE:
+            return
+        rate = seconds / texts
+        previous = self.seconds_per_text
+        self.seconds_per_text = rate if previous is None else 0.8 * previous + 0.2 * rate
+        self.dirty = True
+
+    def get(self, key: str) -> Optional[MemoEntry]:
+        return self.get_many([key])[0]
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[MemoEntry]]:
+        entries = list(map(self._entries.get, keys))
+        move_to_end = self._entries.move_to_end
+        for key, entry in zip(keys, entries):
+            if entry is not None:
+                move_to_end(key)
+        return entries
+
+    def put(self, key: str, entry: MemoEntry) -> None:
+        self._entries.pop(key, None)
+        self.put_new([(key, entry)])
+
+    def put_new(self, items: Sequence[Tuple[str, MemoEntry]]) -> None:
+        """Adds keys that are not in the memo yet, evicting the least recently used."""
+        if self.max_entries <= 0 or not items:
+            return
+        if len(items) >= self.max_entries:
+            self._entries.clear()
+            items = items[-self.max_entries:]
+        self._entries.update(items)
+        for _ in range(len(self._entries) - self.max_entries):
+            self._entries.popitem(last=False)
+        self.dirty = True
+
+    @classmethod
+    def load(cls, path: str, max_entries: int = DEFAULT_MEMO_ENTRIES) -> 'ScoreMemo':
+        memo = cls(max_entries)
+        try:
+            with open(path, 'rb') as f:
+                version, fingerprint, seconds_per_text, items = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, TypeError):
+            return memo
+        if version == MEMO_FORMAT_VERSION:
+            memo.fingerprint = fingerprint
+            memo.seconds_per_text = seconds_per_text
+            # Saved least recently used first, so the newest entries survive a smaller bound.
+            for key, entry in items[-max_entries:] if max_entries > 0 else []:
+                memo._entries[key] = entry
+        return memo
+
+    def save(self, path: str) -> None:
+        if not self.dirty:
+            return
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with file_lock(path):
+            saved = ScoreMemo.load(path, self.max_entries)
+            if saved.fingerprint == self.fingerprint:
+                # Entries only the file has are older than any this process used.
+                items = [item for item in saved._entries.items() if item[0] not in self._entries]
+                items += self._entries.items()
+                self._entries = OrderedDict(items[-self.max_entries:] if self.max_entries > 0 else [])
+            payload = (MEMO_FORMAT_VERSION, self.fingerprint, self.seconds_per_text, list(self._entries.items()))
+            atomic_write_bytes(path, pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL))
+        self.dirty = False
+
+
+def lsh_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """(bands, rows) whose LSH S-curve threshold (1/b)^(1/r) is closest below `threshold`.
+
+    Candidates are verified with their exact Jaccard similarity, so erring
+    towards more candidates only costs time, never accuracy.
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        if (1 / bands) ** (1 / rows) <= threshold:
+            best = (bands, rows)
+    return best
+
+
+def _shingles(key: str, vocabulary: Dict[str, int]) -> Set[int]:
+    # Word pairs; one-word texts fall back to the word, empty texts to a single shared shingle.
+    ids = [vocabulary.setdefault(word, len(vocabulary)) for word in key.split()]
+    if len(ids) > 1:
+        return {a << 32 | b for a, b in zip(ids, ids[1:])}
+    return {_UNIGRAM | ids[0]} if ids else {_UNIGRAM}
+
+
+def near_duplicate_clusters(
+    keys: Sequence[str], threshold: float, num_perm: int = DEFAULT_NUM_PERM, seed: int = 1
+) -> List[int]:
+    """Maps each text to the first text of its near-duplicate cluster (MinHash + LSH).
+
+    Texts are sets of word pairs; two texts join a cluster when they share an
+    LSH bucket and their Jaccard similarity is at least `threshold`. Clusters
+    are transitive, so a chain of close edits ends up in one cluster.
+    """
+    np = _require_numpy('Near-duplicate clustering')
+    n = len(keys)
+    parent = list(range(n))
+    if n < 2:
+        return parent
+    bands, rows = lsh_bands(threshold, num_perm)
+    rng = np.random.default_rng(seed)
+    # Multiply-shift hashing: (a*x + b) mod 2**64, top 32 bits; odd a keeps it universal.
+    a = rng.integers(0, 2**63, size=(bands * rows, 1), dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    b = rng.integers(0, 2**63, size=(bands * rows, 1), dtype=np.uint64)
+    shift = np.uint64(32)
+
+    vocabulary: Dict[str, int] = {}
+    band_hashes: List[List[Any]] = [[] for _ in range(bands)]
+    lo = 0
+    while lo < n:
+        flat: List[int] = []
+        offsets: List[int] = []
+        hi = lo
+        while hi < n and (hi == lo or len(flat) < _SHINGLE_CHUNK):
+            offsets.append(len(flat))
+            flat.extend(_shingles(keys[hi], vocabulary))
+            hi += 1
+        values = (a * np.array(flat, dtype=np.uint64) + b) >> shift
+        signatures = np.minimum.reduceat(values, offsets, axis=1)
+        for band in range(bands):
+            mixed = np.zeros(hi - lo, dtype=np.uint64)
+            for row in signatures[band * rows:(band + 1) * rows]:
+                mixed = mixed * np.uint64(_BAND_MIX) + row
+            band_hashes[band].append(mixed)
+        lo = hi
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    shingle_sets: Dict[int, Set[int]] = {}
+
+    def shingles(i: int) -> Set[int]:
+        if i not in shingle_sets:
+            shingle_sets[i] = _shingles(keys[i], vocabulary)
+        return shingle_sets[i]
+
+    for chunks in band_hashes:
+        hashes = np.concatenate(chunks)
+        order = np.argsort(hashes, kind='stable')
+        ordered = hashes[order]
+        starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+        ends = np.r_[starts[1:], n]
+        for start, end in zip(starts[ends - starts > 1].tolist(), ends[ends - starts > 1].tolist()):
+            members = order[start:end].tolist()  # ascending, since the sort is stable
+            first = members[0]
+            for other in members[1:]:
+                if find(other) == find(first):
+                    continue
+                x, y = shingles(first), shingles(other)
+                if len(x & y) >= threshold * len(x | y):
+                    root_a, root_b = find(first), find(other)
+                    parent[max(root_a, root_b)] = min(root_a, root_b)
+    return [find(i) for i in range(n)]
+
+
+class CommentDeduper:
+    """Scores each distinct comment once and copies the result to its duplicates.
+
+    Comments are grouped by normalized text, which is exact: duplicates get
+    the score and mentions they would have got on their own. With
+    near_threshold, MinHash/LSH also merges near-duplicates (reposts with small
+    edits), which then share their first member's score and mentions. Groups
+    found in the memo skip scoring; the rest are scored as one smaller batch.
+    """
+
+    def __init__(
+        self,
+        fingerprint: str,
+        memo: Optional[ScoreMemo] = None,
+        near_threshold: Optional[float] = None,
+        metrics: Optional[Metrics] = None,
+    ) -> None:
+        if near_threshold is not None:
+            if not 0 < near_threshold <= 1:
+                raise ValueError('Near-duplicate threshold must be in (0, 1]')
+            _require_numpy('Near-duplicate clustering')
+        self.memo = memo if memo is not None else ScoreMemo()
+        self.memo.reset(fingerprint)
+        self.near_threshold = near_threshold
+        self.metrics = metrics
+        self.comments = 0
+        self.scored = 0
+        self.seconds_saved = 0.0
+
+    @property
+    def ratio(self) -> float:
+        # Share of comments that were not scored themselves.
+        return 1 - self.scored / self.comments if self.comments else 0.0
+
+    def score_batch(
+        self, batch: CommentBatch, score: Callable[[CommentBatch], CommentBatch], with_mentions: bool
+    ) -> CommentBatch:
+        start = time.perf_counter()
+        n = len(batch)
+        # Bulk C-level passes: normalize_text for every comment, then number the
+        # distinct texts in order of first appearance.
+        keys = list(map(str.strip, map(str.lower, batch.texts)))
+        unique = list(dict.fromkeys(keys))
+        if len(unique) < n:
+            cluster_of = list(map(dict(zip(unique, range(len(unique)))).__getitem__, keys))
+        else:
+            cluster_of = list(range(n))
+        clusters: Sequence[int] = range(len(unique))
+        merged = 0
+        if self.near_threshold is not None and len(unique) > 1:
+            canonical = near_duplicate_clusters(unique, self.near_threshold)
+            clusters = sorted(set(canonical))
+            merged = len(unique) - len(clusters)
+            if merged:
+                cluster_of = [canonical[c] for c in cluster_of]
+
+        cached = self.memo.get_many([unique[c] for c in clusters] if merged else unique)
+        results: Dict[int, MemoEntry] = {c: entry for c, entry in zip(clusters, cached) if entry is not None}
+        misses = [c for c, entry in zip(clusters, cached) if entry is None]
+
+        scoring = 0.0
+        if misses:
+            # Normalized texts score like the originals, so they stand in for every copy.
+            # When every comment is distinct and new, the batch itself is scored as usual.
+            distinct = len(misses) == n
+            to_score = batch if distinct else CommentBatch()
+            if not distinct:
+                to_score.texts = [unique[c] for c in misses]
+            scoring_start = time.perf_counter()
+            score(to_score)
+            scoring = time.perf_counter() - scoring_start
+            self.memo.record_cost(len(misses), scoring)
+            found: List[Tuple[str, ...]] = [()] * len(misses)
+            names = to_score.players.values
+            for row, player_id in zip(to_score.mention_rows, to_score.mention_players):
+                found[row] += (names[player_id],)
+            entries = list(zip(to_score.scores, found))
+            results.update(zip(misses, entries))
+            self.memo.put_new(list(zip(unique if distinct else to_score.texts, entries)))
+
+        if len(misses) < n:
+            # Fan the per-cluster results back out to every comment, in row order.
+            positive, negative, neutral = LABEL_CODES['positive'], LABEL_CODES['negative'], LABEL_CODES['neutral']
+            values = {c: value for c, (value, _) in results.items()}
+            codes = {c: positive if v > 0 else negative if v < 0 else neutral for c, v in values.items()}
+            batch.set_scores(list(map(values.__getitem__, cluster_of)))
+            batch.labels = bytearray(map(codes.__getitem__, cluster_of))
+            if with_mentions:
+                rows = array('I')
+                player_ids = array('I')
+                players = StringTable()
+                ids = {
+                    c: [players.intern(name) for name in mentions] for c, (_, mentions) in results.items() if mentions
+                }
+                for row, c in enumerate(cluster_of):
+                    mentioned = ids.get(c)
+                    if mentioned:
+                        rows.extend([row] * len(mentioned))
+                        player_ids.extend(mentioned)
+                batch.set_mentions(rows, player_ids, players)
+
+        overhead = time.perf_counter() - start - scoring
+        self.comments += n
+        self.scored += len(misses)
+        if self.memo.seconds_per_text is not None:
+            # Estimated cost of scoring every comment minus what scoring and dedup actually took.
+            self.seconds_saved += self.memo.seconds_per_text * (n - len(misses)) - overhead
+        if self.metrics is not None:
+            self.metrics.increment('dedup_comments', n)
+            self.metrics.increment('dedup_unique_texts', len(unique))
+            self.metrics.increment('dedup_near_merged', merged)
+            self.metrics.increment('dedup_memo_hits', len(results) - len(misses))
+            self.metrics.increment('dedup_scored', len(misses))
+            self.metrics.observe('latency.dedup', overhead)
+            self.metrics.set_gauge('dedup_ratio', round(self.ratio, 4))
+            self.metrics.set_gauge('dedup_seconds_saved', round(self.seconds_saved, 6))
+        return batch
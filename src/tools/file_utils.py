@@ -0,0 +1,86 @@
+import os
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+_TEMP_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0)
+
+
+def _open_temp(path: str) -> Tuple[int, str]:
+    # Created with mode 0o666 like a plain open(), so the process umask applies
+    # without being read (changing it, even briefly, races with other threads).
+    prefix = os.path.join(os.path.dirname(path) or '.', '.' + os.path.basename(path) + '.')
+    while True:
+        tmp_path = f'{prefix}{os.urandom(6).hex()}.tmp'
+        try:
+            return os.open(tmp_path, _TEMP_FLAGS, 0o666), tmp_path
+        except FileExistsError:
+            continue
+
+
+def _keep_mode(path: str, tmp_path: str) -> None:
+    # A replaced file keeps its mode.
+    try:
+        mode = os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        return
+    os.chmod(tmp_path, mode)
+
+
+def atomic_write_lines(path: str, lines: Iterable[str], fsync: bool = True) -> None:
+    fd, tmp_path = _open_temp(path)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.writelines(lines)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        _keep_mode(path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_write_text(path: str, text: str, fsync: bool = True) -> None:
+    atomic_write_lines(path, [text], fsync=fsync)
+
+
+def atomic_write_bytes(path: str, data: bytes, fsync: bool = False) -> None:
+    atomic_write_chunks(path, [data], fsync=fsync)
+
+
+def atomic_write_chunks(path: str, chunks: Iterable[bytes], fsync: bool = False) -> None:
+    fd, tmp_path = _open_temp(path)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        _keep_mode(path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+@contextmanager
+def file_lock(path: str, shared: bool = False) -> Iterator[None]:
+    """Advisory lock on path + '.lock' across processes (a no-op without fcntl)."""
+    if fcntl is None:
+        yield
+        return
+    with open(path + '.lock', 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -1,5 +1,11 @@
 from typing import Dict, Any, List
 
+_MATCH_PROPERTIES = {
+    'thread_path': {'type': 'string', 'description': 'Thread file (JSON with a "comments" array, or JSON Lines)'},
+    'stats_path': {'type': 'string', 'description': 'Match stats JSON file'},
+    'match_id': {'type': 'string', 'description': 'Match id recorded in long-term memory'},
+}
+
 
 def get_mcp_tools() -> List[Dict[str, Any]]:
     reddit_fetch_tool = {
@@ -10,8 +16,55 @@ def get_mcp_tools() -> List[Dict[str, Any]]:
             'properties': {
                 'source': {'type': 'string', 'description': 'Either file or url'},
                 'path': {'type': 'string', 'description': 'File path or URL'},
+                'limit': {'type': 'integer', 'description': 'Maximum comments to return (default 20)'},
             },
             'required': ['source', 'path'],
         },
     }
-    return [reddit_fetch_tool]
+    score_comments_tool = {
+        'name': 'score_comments',
+        'description': 'Score comments with the sentiment lexicon and find player mentions.',
+        'input_schema': {
+            'type': 'object',
+            'properties': {
+                'texts': {'type': 'array', 'items': {'type': 'string'}, 'description': 'Comment texts to score'},
+                'thread_path': _MATCH_PROPERTIES['thread_path'],
+                'stats_path': {'type': 'string', 'description': 'Stats file whose players are matched as mentions'},
+                'limit': {'type': 'integer', 'description': 'Maximum scored comments to return (default 100)'},
+            },
+        },
+    }
+    player_impact_tool = {
+        'name': 'player_impact',
+        'description': 'Compute player impact scores for a match, ranked by impact, goals or sentiment.',
+        'input_schema': {
+            'type': 'object',
+            'properties': {
+                **_MATCH_PROPERTIES,
+                'rank_by': {'type': 'string', 'enum': ['impact', 'goals', 'sentiment']},
+                'top': {'type': 'integer', 'description': 'Return only the top N players'},
+                'impact_formula': {'type': 'string', 'description': 'Custom impact expression, see --impact-formula'},
+            },
+            'required': ['thread_path', 'stats_path'],
+        },
+    }
+    generate_report_tool = {
+        'name': 'generate_report',
+        'description': 'Run the full match pipeline and write the report.',
+        'input_schema': {
+            'type': 'object',
+            'properties': {
+                **_MATCH_PROPERTIES,
+                'output_path': {'type': 'string', 'description': 'Report path (default outputs/reports/<match_id>.md)'},
+                'formats': {'type': 'array', 'items': {'type': 'string', 'enum': ['md', 'json', 'csv', 'html']}},
+                'rank_by': {'type': 'string', 'enum': ['impact', 'goals', 'sentiment']},
+            },
+            'required': ['thread_path', 'stats_path'],
+        },
+    }
+    server_stats_tool = {
+        'name': 'server_stats',
+        'description': 'Per-tool call counts, errors and p50/p99 latency of this tool server.',
+        'input_schema': {'type': 'object', 'properties': {}},
+    }
+    return [reddit_fetch_tool, score_comments_tool, player_impact_tool, generate_report_tool, server_stats_tool]
@@ -0,0 +1,219 @@
+import os
+import sys
+import threading
+import time
+from array import array
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, List, Optional, Sequence, Tuple
+from src.models.domain_models import LABEL_CODES, CommentBatch, StringTable
+from src.observability.metrics import Metrics
+from src.tools.player_index import PlayerMentionIndex
+from src.tools.sentiment_lexicon import SentimentLexicon
+from src.tools.tokenizer import tokenize
+from src.tools.vector_scoring import VectorScorer
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+EXECUTORS = ('auto', 'process', 'thread')
+DEFAULT_PARALLEL_CHUNK = 4096
+
+
+def gil_disabled() -> bool:
+    # True on free-threaded (PEP 703) builds running without the GIL.
+    is_enabled = getattr(sys, '_is_gil_enabled', None)
+    return is_enabled is not None and not is_enabled()
+
+
+@dataclass(slots=True)
+class ScoredChunk:
+    scores: array
+    labels: bytes
+    mention_rows: array = field(default_factory=lambda: array('I'))
+    mention_players: array = field(default_factory=lambda: array('I'))
+    players: List[str] = field(default_factory=list)
+
+
+class ChunkScorer:
+    """Scores a list of comment texts into label, score and mention columns.
+
+    The numpy backend keeps a growing vocabulary, so every worker thread or
+    process gets its own instance.
+    """
+
+    def __init__(
+        self, lexicon: SentimentLexicon, mention_index: Optional[PlayerMentionIndex] = None, backend: str = 'python'
+    ) -> None:
+        self.lexicon = lexicon
+        self.mention_index = mention_index
+        self._vector_scorer = VectorScorer(lexicon, mention_index) if backend == 'numpy' else None
+
+    def score_into(self, batch: CommentBatch, chunk_size: int) -> CommentBatch:
+        if self._vector_scorer is not None:
+            return self._vector_scorer.score_batch(batch, chunk_size, with_mentions=self.mention_index is not None)
+        lexicon = self.lexicon
+        mention_index = self.mention_index
+        positive, negative, neutral = LABEL_CODES['positive'], LABEL_CODES['negative'], LABEL_CODES['neutral']
+        scores: List[float] = []
+        labels = bytearray(len(batch))
+        rows = array('I')
+        player_ids = array('I')
+        players = StringTable()
+        for i, text in enumerate(batch.texts):
+            tokens = tokenize(text)
+            score = lexicon.score_tokens(tokens)
+            scores.append(score)
+            labels[i] = positive if score > 0 else negative if score < 0 else neutral
+            if mention_index is not None:
+                for name in mention_index.find_mentions_in_tokens(tokens):
+                    rows.append(i)
+                    player_ids.append(players.intern(name))
+        batch.set_scores(scores)
+        batch.labels = labels
+        if mention_index is not None:
+            batch.set_mentions(rows, player_ids, players)
+        return batch
+
+    def score_texts(self, texts: List[str]) -> ScoredChunk:
+        batch = CommentBatch()
+        batch.texts = texts
+        self.score_into(batch, len(texts) or 1)
+        return ScoredChunk(
+            scores=batch.scores,
+            labels=bytes(batch.labels),
+            mention_rows=batch.mention_rows,
+            mention_players=batch.mention_players,
+            players=batch.players.values,
+        )
+
+
+# Per-worker scorer, set by the pool initializer. Thread-local so the same
+# initializer serves both process workers and free-threaded thread workers.
+_worker = threading.local()
+
+
+def _init_worker(lexicon: SentimentLexicon, mention_index: Optional[PlayerMentionIndex], backend: str) -> None:
+    _worker.scorer = ChunkScorer(lexicon, mention_index, backend)
+
+
+def _score_chunk(texts: List[str]) -> Tuple[ScoredChunk, float]:
+    # CPU time rather than wall time, so oversubscribed workers do not look busy.
+    start = time.thread_time()
+    chunk = _worker.scorer.score_texts(texts)
+    return chunk, time.thread_time() - start
+
+
+def merge_chunks(batch: CommentBatch, chunks: Sequence[ScoredChunk], with_mentions: bool) -> CommentBatch:
+    # Chunks arrive in submission order, so rows are offset by the running length.
+    typecode = 'd' if any(c.scores.typecode == 'd' for c in chunks) else 'q'
+    scores = array(typecode)
+    labels = bytearray()
+    rows = array('I')
+    player_ids = array('I')
+    players = StringTable()
+    offset = 0
+    for chunk in chunks:
+        scores.extend(chunk.scores if chunk.scores.typecode == typecode else array(typecode, chunk.scores))
+        labels += chunk.labels
+        if with_mentions:
+            remap = [players.intern(name) for name in chunk.players]
+            rows.extend(row + offset for row in chunk.mention_rows)
+            player_ids.extend(remap[p] for p in chunk.mention_players)
+        offset += len(chunk.labels)
+    batch.scores = scores
+    batch.labels = labels
+    if with_mentions:
+        batch.set_mentions(rows, player_ids, players)
+    return batch
+
+
+class ParallelScorer:
+    """Splits a batch into chunks scored by a pool of workers, merged back in order.
+
+    Processes are used by default; free-threaded builds use threads, which skip
+    pickling the texts. Batches smaller than min_comments (default two chunks)
+    are scored serially, as is everything when workers is 1. The pool is
+    started on first use and kept until close(), so streamed batches reuse it.
+    """
+
+    def __init__(
+        self,
+        lexicon: SentimentLexicon,
+        mention_index: Optional[PlayerMentionIndex] = None,
+        backend: str = 'python',
+        workers: Optional[int] = None,
+        chunk_size: int = DEFAULT_PARALLEL_CHUNK,
+        min_comments: Optional[int] = None,
+        executor: str = 'auto',
+        metrics: Optional[Metrics] = None,
+    ) -> None:
+        if executor not in EXECUTORS:
+            raise ValueError(f'Unknown executor: {executor} (expected one of {", ".join(EXECUTORS)})')
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be at least 1')
+        self.lexicon = lexicon
+        self.mention_index = mention_index
+        self.backend = backend
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.min_comments = 2 * chunk_size if min_comments is None else min_comments
+        if executor == 'auto':
+            executor = 'thread' if gil_disabled() else 'process'
+        self.executor = executor
+        self.metrics = metrics
+        self.serial = ChunkScorer(lexicon, mention_index, backend)
+        self._pool: Optional['Executor'] = None
+
+    def _get_pool(self) -> 'Executor':
+        if self._pool is None:
+            # Imported here: multiprocessing is only loaded by runs that use the pool.
+            from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+            initargs = (self.lexicon, self.mention_index, self.backend)
+            if self.executor == 'thread':
+                self._pool = ThreadPoolExecutor(self.workers, initializer=_init_worker, initargs=initargs)
+            else:
+                import multiprocessing
+
+                # The pool is started from a stage-graph thread; forking while other
+                # threads hold locks can deadlock the child, so workers start clean.
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+                self._pool = ProcessPoolExecutor(
+                    self.workers, mp_context=context, initializer=_init_worker, initargs=initargs
+                )
+        return self._pool
+
+    def score_batch(self, batch: CommentBatch) -> CommentBatch:
+        n = len(batch)
+        if self.workers <= 1 or n < max(self.min_comments, 2):
+            if self.metrics is not None:
+                self.metrics.increment('sentiment_serial_batches')
+            return self.serial.score_into(batch, self.chunk_size)
+
+        start = time.perf_counter()
+        texts = batch.texts
+        parts = [texts[lo:lo + self.chunk_size] for lo in range(0, n, self.chunk_size)]
+        results = list(self._get_pool().map(_score_chunk, parts))
+        merge_chunks(batch, [chunk for chunk, _ in results], self.mention_index is not None)
+        wall = time.perf_counter() - start
+
+        if self.metrics is not None:
+            # speedup = CPU time spent scoring chunks / wall time including
+            # dispatch and merge; efficiency divides that by the worker count.
+            busy = sum(seconds for _, seconds in results)
+            speedup = busy / wall if wall else 0.0
+            self.metrics.increment('sentiment_parallel_batches')
+            self.metrics.increment('sentiment_parallel_chunks', len(parts))
+            for _, seconds in results:
+                self.metrics.observe('latency.sentiment_chunk', seconds)
+            self.metrics.set_gauge('sentiment_parallel_workers', self.workers)
+            self.metrics.set_gauge('sentiment_parallel_speedup', round(speedup, 3))
+            self.metrics.set_gauge('sentiment_parallel_efficiency', round(speedup / self.workers, 3))
+            self.metrics.set_gauge('sentiment_parallel_comments_per_sec', round(n / wall, 1) if wall else 0.0)
+        return batch
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
@@ -0,0 +1,92 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, List, Tuple
+from src.tools.tokenizer import CLAUSE_BREAKS, tokenize
+
+
+class PlayerMentionIndex:
+    def __init__(self, players: Iterable[Dict[str, Any]]) -> None:
+        self.player_names: List[str] = []
+        explicit: Dict[Tuple[str, ...], List[str]] = {}
+        surnames: Dict[Tuple[str, ...], List[str]] = {}
+
+        for player in players:
+            name = player.get('name', 'unknown')
+            self.player_names.append(name)
+            full = tuple(t for t in tokenize(name) if t not in CLAUSE_BREAKS)
+            for alias in [name] + list(player.get('nicknames', [])) + list(player.get('aliases', [])):
+                # "J. Smith" matches as written and as "J Smith".
+                spelled = tuple(tokenize(alias))
+                for tokens in dict.fromkeys((spelled, tuple(t for t in spelled if t not in CLAUSE_BREAKS))):
+                    if tokens and name not in explicit.setdefault(tokens, []):
+                        explicit[tokens].append(name)
+            if len(full) > 1:
+                surnames.setdefault(full[-1:], []).append(name)
+
+        # A bare surname only counts when it identifies exactly one player and
+        # is not already somebody's explicit name or alias.
+        aliases = dict(explicit)
+        for tokens, names in surnames.items():
+            if len(names) == 1 and tokens not in explicit:
+                aliases[tokens] = names
+
+        # The tokenizer keeps "smith's" as one token; possessives match like the
+        # alias itself ("jones'" already tokenizes to "jones").
+        for tokens, names in list(aliases.items()):
+            if tokens[-1] not in CLAUSE_BREAKS:
+                aliases.setdefault(tokens[:-1] + (tokens[-1] + "'s",), names)
+
+        self._by_first: Dict[str, List[Tuple[Tuple[str, ...], List[str]]]] = {}
+        for tokens, names in aliases.items():
+            self._by_first.setdefault(tokens[0], []).append((tokens, names))
+        for candidates in self._by_first.values():
+            candidates.sort(key=lambda item: len(item[0]), reverse=True)
+
+    @classmethod
+    def from_stats(cls, stats: Dict[str, Any]) -> 'PlayerMentionIndex':
+        return cls(stats.get('players', []))
+
+    @classmethod
+    def from_stats_file(cls, path: str) -> 'PlayerMentionIndex':
+        if not os.path.exists(path):
+            raise FileNotFoundError(f'Stats file not found: {path}')
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_stats(json.load(f))
+
+    def __len__(self) -> int:
+        return len(self.player_names)
+
+    def fingerprint(self) -> str:
+        aliases = sorted((list(a), n) for c in self._by_first.values() for a, n in c)
+        return hashlib.sha256(json.dumps(aliases).encode('utf-8')).hexdigest()
+
+    def starts_alias(self, token: str) -> bool:
+        return token in self._by_first
+
+    def match_at(self, tokens: List[str], i: int) -> Tuple[List[str], int]:
+        # Longest alias starting at tokens[i]: (player names, tokens consumed).
+        for alias, names in self._by_first.get(tokens[i], ()):
+            if tuple(tokens[i:i + len(alias)]) == alias:
+                return names, len(alias)
+        return [], 1
+
+    def find_mentions_in_tokens(self, tokens: List[str]) -> List[str]:
+        found: List[str] = []
+        by_first = self._by_first
+        i = 0
+        n = len(tokens)
+        while i < n:
+            span = 1
+            for alias, names in by_first.get(tokens[i], ()):
+                if tuple(tokens[i:i + len(alias)]) == alias:
+                    for name in names:
+                        if name not in found:
+                            found.append(name)
+                    span = len(alias)
+                    break
+            i += span
+        return found
+
+    def find_mentions(self, text: str) -> List[str]:
+        return self.find_mentions_in_tokens(tokenize(text))
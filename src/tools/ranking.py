@@ -0,0 +1,66 @@
+import heapq
+from typing import Callable, Dict, List, Optional, Sequence
+from src.models.domain_models import PlayerImpact
+
+RANK_KEYS: Dict[str, Callable[[PlayerImpact], float]] = {
+    'impact': lambda p: p.impact_score,
+    'goals': lambda p: p.goals,
+    'sentiment': lambda p: p.sentiment_score,
+}
+
+
+def _rank_key(by: str) -> Callable[[PlayerImpact], float]:
+    try:
+        return RANK_KEYS[by]
+    except KeyError:
+        raise ValueError(f'Unknown ranking key: {by} (expected one of {", ".join(RANK_KEYS)})') from None
+
+
+class PlayerRanking:
+    """Shared, memoized orderings of one match's player impacts.
+
+    Top-K uses heap selection (O(n log k)); ties keep the input order, exactly
+    like a stable descending sort. A larger K computed once also answers every
+    smaller K, so the summary's leader and the impact agent's top 3 cost one pass.
+    """
+
+    def __init__(self, player_impacts: Sequence[PlayerImpact]) -> None:
+        self.players = player_impacts
+        self._top: Dict[str, List[PlayerImpact]] = {}
+        self._ranked: Dict[str, List[PlayerImpact]] = {}
+        self._team_leaders: Dict[str, Dict[str, PlayerImpact]] = {}
+
+    def __len__(self) -> int:
+        return len(self.players)
+
+    def top(self, k: int, by: str = 'impact') -> List[PlayerImpact]:
+        if by in self._ranked:
+            return self._ranked[by][:k]
+        cached = self._top.get(by)
+        if cached is None or (len(cached) < k and len(cached) < len(self.players)):
+            cached = self._top[by] = heapq.nlargest(k, self.players, key=_rank_key(by))
+        return cached[:k]
+
+    def leader(self, by: str = 'impact') -> Optional[PlayerImpact]:
+        top = self.top(1, by)
+        return top[0] if top else None
+
+    def team_leaders(self, by: str = 'impact') -> Dict[str, PlayerImpact]:
+        # One linear pass; the first player wins ties, as in top().
+        leaders = self._team_leaders.get(by)
+        if leaders is None:
+            key = _rank_key(by)
+            leaders = {}
+            for p in self.players:
+                best = leaders.get(p.team)
+                if best is None or key(p) > key(best):
+                    leaders[p.team] = p
+            self._team_leaders[by] = leaders
+        return leaders
+
+    def ranked(self, by: str = 'impact') -> List[PlayerImpact]:
+        # Full ordering for views that list every player; built at most once per key.
+        view = self._ranked.get(by)
+        if view is None:
+            view = self._ranked[by] = sorted(self.players, key=_rank_key(by), reverse=True)
+        return view
@@ -1,18 +1,86 @@
 import json
-from typing import List, Dict, Any
+import re
+from typing import List, Dict, Any, Iterator, Tuple
 import os
-import urllib.request
+
+COMMENTS_ARRAY_START = re.compile(r'"comments"\s*:\s*\[')
 
 
 class RedditFetcher:
     def load_from_file(self, path: str) -> List[Dict[str, Any]]:
         if not os.path.exists(path):
             raise FileNotFoundError(f'Sample file not found: {path}')
+        if path.endswith('.jsonl'):
+            return list(self.iter_from_file(path))
         with open(path, 'r', encoding='utf-8') as f:
             data = json.load(f)
         return data.get('comments', [])
 
+    def iter_from_file(self, path: str, chunk_size: int = 1 << 16) -> Iterator[Dict[str, Any]]:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f'Sample file not found: {path}')
+        if path.endswith('.jsonl'):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        yield json.loads(line)
+            return
+
+        decoder = json.JSONDecoder()
+        with open(path, 'r', encoding='utf-8') as f:
+            buffer = ''
+            while True:
+                match = COMMENTS_ARRAY_START.search(buffer)
+                if match:
+                    buffer = buffer[match.end():]
+                    break
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                # Keep a short tail so a key split across two chunks is still found.
+                buffer = buffer[-64:] + chunk
+
+            pos = 0
+            while True:
+                while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                    pos += 1
+                if pos < len(buffer) and buffer[pos] == ']':
+                    return
+                try:
+                    if pos >= len(buffer):
+                        raise json.JSONDecodeError('Need more data', buffer, pos)
+                    item, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    chunk = f.read(chunk_size)
+                    if not chunk:
+                        raise ValueError(f'Truncated comments array in {path}')
+                    buffer = buffer[pos:] + chunk
+                    pos = 0
+                    continue
+                yield item
+                pos = end
+                if pos >= chunk_size:
+                    buffer = buffer[pos:]
+                    pos = 0
+
+    def read_new_lines(self, path: str, offset: int) -> Tuple[List[Dict[str, Any]], int]:
+        if not os.path.exists(path):
+            return [], offset
+        if os.path.getsize(path) < offset:
+            # The file was truncated or replaced; start again from the beginning.
+            offset = 0
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+        # Only consume complete lines; a half-written last line is picked up next time.
+        end = data.rfind(b'\n') + 1
+        comments = [json.loads(line) for line in data[:end].splitlines() if line.strip()]
+        return comments, offset + end
+
     def fetch_from_url(self, url: str) -> List[Dict[str, Any]]:
+        import urllib.request  # only network runs pay for http.client / ssl
+
         with urllib.request.urlopen(url) as response:
             text = response.read().decode('utf-8')
         data = json.loads(text)
@@ -0,0 +1,257 @@
+import csv
+import html
+import io
+import itertools
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+from src.models.domain_models import Comment, PlayerImpact, SentimentSummary
+from src.tools.file_utils import atomic_write_lines
+
+REPORT_TITLE = 'FootyPulse Match Intelligence Report'
+PLAYER_COLUMNS = ('Player', 'Team', 'Goals', 'Assists', 'Cards', 'Sentiment', 'Impact')
+
+
+@dataclass
+class ReportContent:
+    match_summary: str
+    sentiment_summary: SentimentSummary
+    players: Iterable[PlayerImpact]
+    sample_comments: List[Comment]
+    rank_by: Optional[str] = None
+    team_leaders: Dict[str, PlayerImpact] = field(default_factory=dict)
+    # Called once per rendered format, so the appendix can be re-streamed from its source.
+    all_comments: Optional[Callable[[], Iterable[Comment]]] = None
+    page_size: int = 500
+
+
+def _peek(items: Iterable[Any]) -> Tuple[bool, Iterator[Any]]:
+    iterator = iter(items)
+    for first in iterator:
+        return True, itertools.chain([first], iterator)
+    return False, iterator
+
+
+def _player_cells(p: PlayerImpact) -> Tuple[Any, ...]:
+    return (p.player_name, p.team, p.goals, p.assists, p.cards, p.sentiment_score, p.impact_score)
+
+
+def _comment_dict(c: Comment) -> Dict[str, Any]:
+    return {
+        'author': c.author,
+        'team': c.team,
+        'sentiment': c.sentiment,
+        'score': c.score,
+        'mentions': list(c.mentions),
+        'text': c.text,
+    }
+
+
+def _appendix(content: ReportContent) -> Iterable[Comment]:
+    return content.all_comments() if content.all_comments is not None else ()
+
+
+def _markdown_comment(c: Comment) -> str:
+    text = c.text.replace('\n', ' ')
+    mention_note = f" _(mentions: {', '.join(c.mentions)})_" if c.mentions else ''
+    return f'- **{c.author}** ({c.sentiment}): {text}{mention_note}\n'
+
+
+def render_markdown(content: ReportContent) -> Iterator[str]:
+    s = content.sentiment_summary
+    yield f'# {REPORT_TITLE}\n'
+    yield '## 1. High-level Summary\n'
+    yield content.match_summary + '\n'
+    yield '## 2. Crowd Sentiment Overview\n'
+    yield f'- Positive: {s.positive}\n- Negative: {s.negative}\n- Neutral: {s.neutral}\n'
+
+    yield '## 3. Player Impact Scores\n'
+    has_players, players = _peek(content.players)
+    if has_players:
+        yield '| ' + ' | '.join(PLAYER_COLUMNS) + ' |\n'
+        yield '|' + '|'.join('-' * (len(c) + 2) for c in PLAYER_COLUMNS) + '|\n'
+        for p in players:
+            yield '| ' + ' | '.join(str(cell) for cell in _player_cells(p)) + ' |\n'
+        if content.rank_by is not None:
+            yield f'\nTeam leaders by {content.rank_by}:\n'
+            for team, p in content.team_leaders.items():
+                yield f'- {team}: {p.player_name}\n'
+    else:
+        yield 'Player impact data not available.\n'
+
+    yield '## 4. Sample Fan Comments\n'
+    for c in content.sample_comments:
+        yield _markdown_comment(c)
+
+    if content.all_comments is not None:
+        yield '## 5. All Comments\n'
+        for i, c in enumerate(_appendix(content)):
+            if i % content.page_size == 0:
+                yield f'### Page {i // content.page_size + 1}\n'
+            yield _markdown_comment(c)
+
+
+def render_json(content: ReportContent) -> Iterator[str]:
+    # Written piecewise so arbitrarily long player lists and appendices never
+    # become one in-memory document.
+    dumps = json.dumps
+    yield '{\n'
+    yield f'"title": {dumps(REPORT_TITLE)},\n'
+    yield f'"match_summary": {dumps(content.match_summary)},\n'
+    yield f'"sentiment": {dumps(asdict(content.sentiment_summary))},\n'
+    yield f'"rank_by": {dumps(content.rank_by)},\n'
+    yield '"players": ['
+    for i, p in enumerate(content.players):
+        yield (',\n' if i else '\n') + dumps(asdict(p))
+    yield '\n],\n'
+    leaders = {team: p.player_name for team, p in content.team_leaders.items()}
+    yield f'"team_leaders": {dumps(leaders)},\n'
+    yield f'"sample_comments": {dumps([_comment_dict(c) for c in content.sample_comments])}'
+    if content.all_comments is not None:
+        yield f',\n"appendix": {{"page_size": {content.page_size}, "pages": ['
+        i = -1
+        for i, c in enumerate(_appendix(content)):
+            if i % content.page_size == 0:
+                yield ('\n],\n[' if i else '\n[') + '\n'
+            else:
+                yield ',\n'
+            yield dumps(_comment_dict(c))
+        yield '\n]]}' if i >= 0 else ']}'
+    yield '\n}\n'
+
+
+CSV_COLUMNS = (
+    'record', 'page', 'player', 'team', 'goals', 'assists', 'cards', 'sentiment_score', 'impact_score',
+    'author', 'sentiment', 'score', 'mentions', 'text',
+)
+
+
+def render_csv(content: ReportContent) -> Iterator[str]:
+    # One tidy table: the "record" column says which report section a row belongs to.
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS, lineterminator='\n')
+
+    def row(**values: Any) -> str:
+        writer.writerow(values)
+        line = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return line
+
+    yield ','.join(CSV_COLUMNS) + '\n'
+    yield row(record='summary', text=content.match_summary)
+    for label, count in asdict(content.sentiment_summary).items():
+        yield row(record='sentiment', sentiment=label, score=count)
+    for p in content.players:
+        yield row(
+            record='player', player=p.player_name, team=p.team, goals=p.goals, assists=p.assists,
+            cards=p.cards, sentiment_score=p.sentiment_score, impact_score=p.impact_score,
+        )
+    for team, p in content.team_leaders.items():
+        yield row(record='team_leader', player=p.player_name, team=team)
+
+    def comment_row(record: str, c: Comment, page: Any = '') -> str:
+        return row(
+            record=record, page=page, team=c.team, author=c.author, sentiment=c.sentiment, score=c.score,
+            mentions=';'.join(c.mentions), text=c.text,
+        )
+
+    for c in content.sample_comments:
+        yield comment_row('sample_comment', c)
+    for i, c in enumerate(_appendix(content)):
+        yield comment_row('comment', c, i // content.page_size + 1)
+
+
+_HTML_STYLE = (
+    'body{font-family:system-ui,sans-serif;max-width:960px;margin:2em auto;padding:0 1em;color:#222}'
+    'table{border-collapse:collapse;width:100%}th,td{border:1px solid #ccc;padding:4px 8px;text-align:left}'
+    'th{background:#f3f3f3}.positive{color:#1a7f37}.negative{color:#cf222e}.neutral{color:#57606a}'
+    'details{margin:.5em 0}summary{cursor:pointer;font-weight:600}'
+)
+
+
+def _html_comment(c: Comment) -> str:
+    e = html.escape
+    mentions = f' <em>(mentions: {e(", ".join(c.mentions))})</em>' if c.mentions else ''
+    label = f'<span class="{e(c.sentiment)}">{e(c.sentiment)}</span>'
+    return f'<li><strong>{e(c.author)}</strong> ({label}): {e(c.text)}{mentions}</li>\n'
+
+
+def render_html(content: ReportContent) -> Iterator[str]:
+    e = html.escape
+    s = content.sentiment_summary
+    yield '<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="utf-8">\n'
+    yield f'<title>{e(REPORT_TITLE)}</title>\n<style>{_HTML_STYLE}</style>\n</head>\n<body>\n'
+    yield f'<h1>{e(REPORT_TITLE)}</h1>\n'
+    yield f'<h2>1. High-level Summary</h2>\n<p>{e(content.match_summary)}</p>\n'
+    yield '<h2>2. Crowd Sentiment Overview</h2>\n<ul>\n'
+    yield f'<li>Positive: {s.positive}</li>\n<li>Negative: {s.negative}</li>\n<li>Neutral: {s.neutral}</li>\n</ul>\n'
+
+    yield '<h2>3. Player Impact Scores</h2>\n'
+    has_players, players = _peek(content.players)
+    if has_players:
+        yield '<table>\n<thead><tr>' + ''.join(f'<th>{c}</th>' for c in PLAYER_COLUMNS) + '</tr></thead>\n<tbody>\n'
+        for p in players:
+            yield '<tr>' + ''.join(f'<td>{e(str(cell))}</td>' for cell in _player_cells(p)) + '</tr>\n'
+        yield '</tbody>\n</table>\n'
+        if content.rank_by is not None:
+            yield f'<p>Team leaders by {e(content.rank_by)}:</p>\n<ul>\n'
+            for team, p in content.team_leaders.items():
+                yield f'<li>{e(team)}: {e(p.player_name)}</li>\n'
+            yield '</ul>\n'
+    else:
+        yield '<p>Player impact data not available.</p>\n'
+
+    yield '<h2>4. Sample Fan Comments</h2>\n<ul>\n'
+    for c in content.sample_comments:
+        yield _html_comment(c)
+    yield '</ul>\n'
+
+    if content.all_comments is not None:
+        yield '<h2>5. All Comments</h2>\n'
+        size = content.page_size
+        i = -1
+        for i, c in enumerate(_appendix(content)):
+            if i % size == 0:
+                if i:
+                    yield '</ol>\n</details>\n'
+                yield f'<details><summary>Page {i // size + 1}</summary>\n<ol start="{i + 1}">\n'
+            yield _html_comment(c)
+        if i >= 0:
+            yield '</ol>\n</details>\n'
+    yield '</body>\n</html>\n'
+
+
+RENDERERS: Dict[str, Callable[[ReportContent], Iterator[str]]] = {
+    'md': render_markdown,
+    'json': render_json,
+    'csv': render_csv,
+    'html': render_html,
+}
+
+
+def format_for_path(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower().lstrip('.')
+    return {'markdown': 'md', 'htm': 'html'}.get(ext, ext) if ext else 'md'
+
+
+def renderer(fmt: str) -> Callable[[ReportContent], Iterator[str]]:
+    try:
+        return RENDERERS[fmt]
+    except KeyError:
+        raise ValueError(f'Unknown report format: {fmt} (expected one of {", ".join(RENDERERS)})') from None
+
+
+def write_report_stream(out: TextIO, content: ReportContent, fmt: str = 'md') -> None:
+    out.writelines(renderer(fmt)(content))
+
+
+def write_report(path: str, content: ReportContent, fmt: Optional[str] = None) -> str:
+    # Chunks go straight to a temp file that replaces the report at the end, so
+    # readers (e.g. a live dashboard) never see a half-written report.
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    atomic_write_lines(path, renderer(fmt or format_for_path(path))(content), fsync=False)
+    return path
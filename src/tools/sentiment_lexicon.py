@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple, Union
+from src.tools.tokenizer import CLAUSE_BREAKS, tokenize
+
+Weight = Union[int, float]
+
+DEFAULT_NEGATORS = frozenset(
+    {'not', 'no', 'never', 'none', 'nobody', 'nothing', 'neither', 'nor', 'without', 'hardly', 'barely'}
+)
+
+
+def _coerce_weight(value: Union[str, int, float]) -> Weight:
+    weight = float(value)
+    return int(weight) if weight.is_integer() else weight
+
+
+class SentimentLexicon:
+    def __init__(
+        self,
+        terms: Dict[str, Weight],
+        negators: Iterable[str] = DEFAULT_NEGATORS,
+        negation_window: int = 3,
+    ) -> None:
+        self.negators: FrozenSet[str] = frozenset(n.lower() for n in negators)
+        self.negation_window = negation_window
+        self._unigrams: Dict[str, Weight] = {}
+        self._phrases: Dict[str, List[Tuple[Tuple[str, ...], Weight]]] = {}
+        for term, weight in terms.items():
+            tokens = tuple(tokenize(term))
+            if not tokens:
+                continue
+            if len(tokens) == 1:
+                self._unigrams[tokens[0]] = weight
+            else:
+                self._phrases.setdefault(tokens[0], []).append((tokens, weight))
+        for candidates in self._phrases.values():
+            candidates.sort(key=lambda item: len(item[0]), reverse=True)
+
+    def __len__(self) -> int:
+        return len(self._unigrams) + sum(len(c) for c in self._phrases.values())
+
+    def fingerprint(self) -> str:
+        payload = json.dumps(
+            [
+                sorted(self._unigrams.items()),
+                sorted((list(p), w) for c in self._phrases.values() for p, w in c),
+                sorted(self.negators),
+                self.negation_window,
+                sorted(CLAUSE_BREAKS),
+            ]
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def from_word_sets(cls, positive: Iterable[str], negative: Iterable[str], **kwargs) -> 'SentimentLexicon':
+        terms: Dict[str, Weight] = {w: 1 for w in positive}
+        terms.update({w: -1 for w in negative})
+        return cls(terms, **kwargs)
+
+    @classmethod
+    def from_file(cls, path: str) -> 'SentimentLexicon':
+        if not os.path.exists(path):
+            raise FileNotFoundError(f'Lexicon file not found: {path}')
+        if path.endswith('.json'):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            terms: Dict[str, Weight] = {
+                term: _coerce_weight(weight) for term, weight in data.get('terms', {}).items()
+            }
+            terms.update({w: 1 for w in data.get('positive', [])})
+            terms.update({w: -1 for w in data.get('negative', [])})
+            return cls(
+                terms,
+                negators=data.get('negators', DEFAULT_NEGATORS),
+                negation_window=int(data.get('negation_window', 3)),
+            )
+
+        # Plain-text lexicons: one "term<TAB>weight" per line, '#' starts a comment.
+        terms = {}
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, start=1):
+                line = line.split('#', 1)[0].strip()
+                if not line:
+                    continue
+                term, sep, weight = line.rpartition('\t')
+                if not sep:
+                    raise ValueError(f'{path}:{line_no}: expected "term<TAB>weight"')
+                terms[term.strip()] = _coerce_weight(weight)
+        return cls(terms)
+
+    def is_integral(self) -> bool:
+        weights = list(self._unigrams.values()) + [w for c in self._phrases.values() for _, w in c]
+        return all(isinstance(w, int) for w in weights)
+
+    def unigram_weight(self, token: str) -> Optional[Weight]:
+        return self._unigrams.get(token)
+
+    def starts_phrase(self, token: str) -> bool:
+        return token in self._phrases
+
+    def is_negator(self, token: str) -> bool:
+        return token in self.negators or token.endswith("n't")
+
+    def score_tokens(self, tokens: List[str]) -> Weight:
+        score: Weight = 0
+        last_negator = -self.negation_window - 1
+        unigrams = self._unigrams
+        phrases = self._phrases
+        i = 0
+        n = len(tokens)
+        while i < n:
+            token = tokens[i]
+            weight: Optional[Weight] = None
+            span = 1
+            for phrase, phrase_weight in phrases.get(token, ()):
+                if tuple(tokens[i:i + len(phrase)]) == phrase:
+                    weight, span = phrase_weight, len(phrase)
+                    break
+            if weight is None:
+                if self.is_negator(token):
+                    last_negator = i
+                    i += 1
+                    continue
+                if token in CLAUSE_BREAKS:
+                    # "not good. Great" - the negation ends with its clause.
+                    last_negator = -self.negation_window - 1
+                    i += 1
+                    continue
+                weight = unigrams.get(token)
+
+            if weight is not None:
+                if i - last_negator <= self.negation_window:
+                    weight = -weight
+                score += weight
+            i += span
+        return score
+
+    def score(self, text: str) -> Weight:
+        return self.score_tokens(tokenize(text))
@@ -0,0 +1,370 @@
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+import time
+from array import array
+from itertools import accumulate
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from src.models.domain_models import LABELS, CommentBatch, StringTable
+from src.tools.file_utils import atomic_write_chunks
+from src.tools.player_index import PlayerMentionIndex
+
+# Layout (little-endian):
+#   header     MAGIC, version, column count, reserved, comment count
+#   directory  per column: name, array typecode ('s' for raw bytes), offset, length in bytes
+#   columns    each starting on a 64-byte boundary, text.data last so it can be streamed in
+# Strings are an offsets column (uint64, n + 1 entries) plus a UTF-8 data column.
+# mentions is one bitmap per player, bitmap_stride bytes each; bit i (LSB first) is comment i.
+MAGIC = b'FPSNAP\x00\x00'
+SNAPSHOT_VERSION = 1
+_HEADER = struct.Struct('<8sHHIQ')
+_ENTRY = struct.Struct('<16s1s7xQQ')
+_ALIGN = 64
+_TYPECODES = {'q': 8, 'd': 8, 'Q': 8, 'I': 4, 'B': 1, 's': 1}
+_NONZERO = re.compile(rb'[^\x00]')
+_BITS = [tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+_NUMPY_DTYPES = {'q': '<i8', 'd': '<f8', 'Q': '<u8', 'I': '<u4', 'B': 'u1', 's': 'u1'}
+
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _padding(offset: int) -> int:
+    return -offset % _ALIGN
+
+
+def _string_columns(name: str, values: List[str]) -> List[Tuple[str, str, bytes]]:
+    data = [value.encode('utf-8') for value in values]
+    offsets = array('Q', [0])
+    offsets.extend(accumulate(map(len, data)))
+    return [(f'{name}.offsets', 'Q', _little_endian(offsets)), (f'{name}.data', 's', b''.join(data))]
+
+
+class SnapshotWriter:
+    """Writes scored comment batches to a columnar snapshot file.
+
+    Batches are appended as they arrive: fixed-width columns are kept in
+    memory (about 25 bytes per comment) and comment texts are spilled to a
+    temporary file, so streamed runs never hold the thread. close() writes
+    the file atomically; abort() drops it. Batches scored without mention
+    resolution are matched against mention_index, when one is given.
+    """
+
+    def __init__(
+        self, path: str, meta: Optional[Dict[str, Any]] = None, mention_index: Optional[PlayerMentionIndex] = None
+    ) -> None:
+        self.path = path
+        self.meta = dict(meta or {})
+        self.mention_index = mention_index
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        self._scores = array('q')
+        self._labels = bytearray()
+        self._team_ids = array('I')
+        self._author_ids = array('I')
+        self._teams = StringTable()
+        self._authors = StringTable()
+        self._players = StringTable()
+        self._mention_rows = array('I')
+        self._mention_players = array('I')
+        self._text_offsets = array('Q', [0])
+        self._texts: IO[bytes] = tempfile.TemporaryFile(dir=directory)
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    def add(self, batch: CommentBatch) -> None:
+        base = len(self)
+        scores = batch.scores
+        if scores.typecode != self._scores.typecode:
+            if scores.typecode == 'd':
+                self._scores = array('d', self._scores)
+            else:
+                scores = array('d', scores)
+        self._scores.extend(scores)
+        self._labels += batch.labels
+        # Batches have their own string tables; ids are remapped onto the snapshot's.
+        teams = [self._teams.intern(team) for team in batch.teams.values]
+        self._team_ids.extend(map(teams.__getitem__, batch.team_ids))
+        authors = [self._authors.intern(author) for author in batch.authors.values]
+        self._author_ids.extend(map(authors.__getitem__, batch.author_ids))
+        if batch.has_mentions:
+            players = [self._players.intern(name) for name in batch.players.values]
+            self._mention_rows.extend(row + base for row in batch.mention_rows)
+            self._mention_players.extend(map(players.__getitem__, batch.mention_players))
+        elif self.mention_index is not None:
+            find_mentions = self.mention_index.find_mentions
+            for i, text in enumerate(batch.texts):
+                for name in find_mentions(text):
+                    self._mention_rows.append(base + i)
+                    self._mention_players.append(self._players.intern(name))
+        data = [text.encode('utf-8') for text in batch.texts]
+        offsets = accumulate(map(len, data), initial=self._text_offsets[-1])
+        next(offsets)
+        self._text_offsets.extend(offsets)
+        self._texts.write(b''.join(data))
+
+    def write_batches(self, batches: Iterable[CommentBatch]) -> Iterator[CommentBatch]:
+        for batch in batches:
+            self.add(batch)
+            yield batch
+
+    def _mention_bitmap(self) -> Tuple[List[str], int, bytearray]:
+        # Players are sorted by name, so the file does not depend on the order
+        # in which scoring happened to resolve mentions.
+        names = sorted(self._players.values)
+        position = {name: i for i, name in enumerate(names)}
+        remap = [position[name] for name in self._players.values]
+        stride = (len(self) + 63) // 64 * 8
+        bitmap = bytearray(stride * len(names))
+        for row, player in zip(self._mention_rows, self._mention_players):
+            bitmap[remap[player] * stride + (row >> 3)] |= 1 << (row & 7)
+        return names, stride, bitmap
+
+    def close(self) -> str:
+        n = len(self)
+        players, stride, bitmap = self._mention_bitmap()
+        meta = {
+            **self.meta,
+            'num_comments': n,
+            'labels': list(LABELS),
+            'bitmap_stride': stride,
+            'created': time.time(),
+        }
+        columns: List[Tuple[str, str, Any]] = [
+            ('score', self._scores.typecode, _little_endian(self._scores)),
+            ('label', 'B', bytes(self._labels)),
+            ('team_id', 'I', _little_endian(self._team_ids)),
+            ('author_id', 'I', _little_endian(self._author_ids)),
+            ('mentions', 'B', bytes(bitmap)),
+            *_string_columns('team', self._teams.values),
+            *_string_columns('author', self._authors.values),
+            *_string_columns('player', players),
+            ('meta', 's', json.dumps(meta, sort_keys=True).encode('utf-8')),
+            ('text.offsets', 'Q', _little_endian(self._text_offsets)),
+        ]
+        text_bytes = self._text_offsets[-1]
+
+        offset = _HEADER.size + _ENTRY.size * (len(columns) + 1)
+        directory = []
+        for name, typecode, data in columns + [('text.data', 's', None)]:
+            offset += _padding(offset)
+            size = text_bytes if data is None else len(data)
+            directory.append(_ENTRY.pack(name.encode('ascii'), typecode.encode('ascii'), offset, size))
+            offset += size
+
+        def chunks() -> Iterator[bytes]:
+            yield _HEADER.pack(MAGIC, SNAPSHOT_VERSION, len(directory), 0, n)
+            yield b''.join(directory)
+            position = _HEADER.size + _ENTRY.size * len(directory)
+            for _, _, data in columns:
+                yield b'\x00' * _padding(position)
+                yield data
+                position += _padding(position) + len(data)
+            yield b'\x00' * _padding(position)
+            self._texts.seek(0)
+            yield from iter(lambda: self._texts.read(1 << 20), b'')
+
+        try:
+            atomic_write_chunks(self.path, chunks())
+        finally:
+            self._texts.close()
+        return self.path
+
+    def abort(self) -> None:
+        self._texts.close()
+
+
+def write_snapshot(
+    path: str,
+    batch: CommentBatch,
+    meta: Optional[Dict[str, Any]] = None,
+    mention_index: Optional[PlayerMentionIndex] = None,
+) -> str:
+    writer = SnapshotWriter(path, meta, mention_index)
+    try:
+        writer.add(batch)
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.close()
+
+
+class Snapshot:
+    """Read-only, memory-mapped view of a snapshot file.
+
+    column() returns a memoryview cast to the column's type and array() a
+    numpy array; both point into the mapping without copying, so a scan
+    only pages in the columns it touches. Views still held at close() keep
+    the mapping alive until they are dropped.
+    """
+
+    def __init__(self, path: str) -> None:
+        if sys.byteorder != 'little':
+            raise ValueError('Snapshots are little-endian; zero-copy reads need a little-endian host')
+        self.path = path
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < _HEADER.size:
+                raise ValueError(f'Not a snapshot file: {path}')
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, _, self.num_comments = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError(f'Not a snapshot file: {path}')
+        if version != SNAPSHOT_VERSION:
+            self._mmap.close()
+            raise ValueError(f'Unsupported snapshot version {version} in {path}')
+        self._columns: Dict[str, Tuple[str, int, int]] = {}
+        for i in range(count):
+            name, typecode, offset, length = _ENTRY.unpack_from(self._mmap, _HEADER.size + i * _ENTRY.size)
+            if offset + length > size:
+                self._mmap.close()
+                raise ValueError(f'Truncated snapshot file: {path}')
+            self._columns[name.rstrip(b'\x00').decode('ascii')] = (typecode.decode('ascii'), offset, length)
+        self._view = memoryview(self._mmap)
+        self._tables: Dict[str, List[str]] = {}
+        self._player_ids: Optional[Dict[str, int]] = None
+        self.meta: Dict[str, Any] = json.loads(bytes(self.column('meta')))
+
+    def __len__(self) -> int:
+        return self.num_comments
+
+    def __enter__(self) -> 'Snapshot':
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._columns)
+
+    def column(self, name: str) -> memoryview:
+        if name not in self._columns:
+            raise KeyError(f'No column {name} in {self.path}')
+        typecode, offset, length = self._columns[name]
+        view = self._view[offset:offset + length]
+        return view if typecode == 's' else view.cast(typecode)
+
+    def array(self, name: str) -> Any:
+        from src.tools.vector_scoring import _require_numpy
+
+        np = _require_numpy('Snapshot.array')
+        typecode, offset, length = self._columns[name]
+        count = length // _TYPECODES[typecode]
+        return np.frombuffer(self._mmap, dtype=_NUMPY_DTYPES[typecode], count=count, offset=offset)
+
+    @property
+    def scores(self) -> memoryview:
+        return self.column('score')
+
+    @property
+    def labels(self) -> memoryview:
+        return self.column('label')
+
+    @property
+    def team_ids(self) -> memoryview:
+        return self.column('team_id')
+
+    def _strings(self, name: str) -> List[str]:
+        # Team, author and player tables are small and decoded once.
+        if name not in self._tables:
+            offsets = self.column(f'{name}.offsets')
+            data = self.column(f'{name}.data')
+            self._tables[name] = [
+                bytes(data[offsets[i]:offsets[i + 1]]).decode('utf-8') for i in range(len(offsets) - 1)
+            ]
+        return self._tables[name]
+
+    @property
+    def teams(self) -> List[str]:
+        return self._strings('team')
+
+    @property
+    def authors(self) -> List[str]:
+        return self._strings('author')
+
+    @property
+    def players(self) -> List[str]:
+        return self._strings('player')
+
+    def text(self, i: int) -> str:
+        offsets = self.column('text.offsets')
+        return bytes(self.column('text.data')[offsets[i]:offsets[i + 1]]).decode('utf-8')
+
+    def iter_texts(self) -> Iterator[str]:
+        offsets = self.column('text.offsets')
+        data = self.column('text.data')
+        for i in range(self.num_comments):
+            yield bytes(data[offsets[i]:offsets[i + 1]]).decode('utf-8')
+
+    def mention_bitmap(self, player: str) -> memoryview:
+        stride = self.meta['bitmap_stride']
+        if self._player_ids is None:
+            self._player_ids = {name: i for i, name in enumerate(self.players)}
+        index = self._player_ids.get(player)
+        if index is None:
+            return memoryview(bytes(stride))
+        return self.column('mentions')[index * stride:(index + 1) * stride]
+
+    def rows_mentioning(self, player: str) -> List[int]:
+        # Bitmaps are sparse: the regex skips zero bytes in C and only set bytes are decoded.
+        rows: List[int] = []
+        for match in _NONZERO.finditer(self.mention_bitmap(player)):
+            base = match.start() * 8
+            rows.extend(base + bit for bit in _BITS[match.group()[0]])
+        return rows
+
+    def player_sentiment(self, player: str) -> float:
+        # Reads only the score column and one player's bitmap.
+        scores = self.scores
+        return sum(scores[row] for row in self.rows_mentioning(player))
+
+    def player_totals(self) -> Dict[str, float]:
+        return {player: self.player_sentiment(player) for player in self.players}
+
+    def label_counts(self) -> Dict[str, int]:
+        labels = bytes(self.labels)
+        return {label: labels.count(code) for code, label in enumerate(LABELS)}
+
+    def batch(self) -> CommentBatch:
+        """Copies the snapshot back into a CommentBatch (texts, columns and mentions)."""
+        batch = CommentBatch()
+        batch.texts = list(self.iter_texts())
+        batch.teams = StringTable(self.teams)
+        batch.authors = StringTable(self.authors)
+        batch.team_ids = array('I', self.team_ids)
+        batch.author_ids = array('I', self.column('author_id'))
+        batch.scores = array(self._columns['score'][0], self.scores)
+        batch.labels = bytearray(self.labels)
+        pairs = sorted((row, player) for player, name in enumerate(self.players) for row in self.rows_mentioning(name))
+        rows = array('I', [row for row, _ in pairs])
+        batch.set_mentions(rows, array('I', [player for _, player in pairs]), StringTable(self.players))
+        return batch
+
+    def close(self) -> None:
+        self._view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # The caller still holds a column view or array; the file is
+            # unmapped when the last of them is garbage collected.
+            pass
+
+
+def read_meta(path: str) -> Optional[Dict[str, Any]]:
+    """The meta block of an existing snapshot, or None if there is no readable one."""
+    try:
+        with Snapshot(path) as snapshot:
+            return dict(snapshot.meta)
+    except (OSError, ValueError, KeyError):
+        return None
@@ -0,0 +1,125 @@
+import json
+import os
+import random
+from typing import Any, Dict, Iterator, List, Tuple
+
+FIRST_NAMES = [
+    'Alex', 'Jordan', 'Marco', 'Sam', 'Luca', 'Noah', 'Leo', 'Kai', 'Mateo', 'Theo', 'Ivan', 'Yusuf',
+    'Diego', 'Ollie', 'Rafa', 'Hugo', 'Milan', 'Enzo', 'Jonas', 'Tariq', 'Ben', 'Callum', 'Dario', 'Femi',
+]
+LAST_NAMES = [
+    'Smith', 'Lee', 'Silva', 'Okafor', 'Rossi', 'Muller', 'Garcia', 'Novak', 'Dubois', 'Jensen', 'Costa',
+    'Kowalski', 'Haaland', 'Nakamura', 'Mensah', 'Petrov', 'Larsen', 'Moreno', 'Fischer', 'Adeyemi',
+    'Walker', 'Ibrahim', 'Santos', 'Keller', 'Bianchi', 'Horvat', 'Ward', 'Quinn', 'Barros', 'Lindqvist',
+]
+TEAM_NAMES = ['Red FC', 'Blue FC', 'Green Rovers', 'City Athletic', 'United', 'Harbour Town', 'Wanderers', 'Albion']
+POSITIVE_WORDS = ['great', 'amazing', 'good', 'love', 'fantastic', 'brilliant', 'excellent', 'win']
+NEGATIVE_WORDS = ['bad', 'terrible', 'awful', 'hate', 'worst', 'poor', 'lose', 'loss']
+FILLER_WORDS = [
+    'the', 'team', 'was', 'today', 'striker', 'keeper', 'referee', 'midfield', 'winger', 'really', 'that',
+    'pass', 'press', 'shape', 'second', 'half', 'first', 'corner', 'chance', 'bench', 'manager', 'crowd',
+    'again', 'just', 'so', 'what', 'a', 'game', 'honestly', 'tactics', 'finish', 'cross', 'tackle', 'not',
+]
+
+
+def generate_squad(num_players: int, num_teams: int = 2, seed: int = 0, match_id: str = 'SYNTH') -> Dict[str, Any]:
+    rng = random.Random(seed)
+    teams = [TEAM_NAMES[i % len(TEAM_NAMES)] + ('' if i < len(TEAM_NAMES) else f' {i // len(TEAM_NAMES) + 1}')
+             for i in range(num_teams)]
+    combos = [f'{first} {last}' for last in LAST_NAMES for first in FIRST_NAMES]
+    rng.shuffle(combos)
+
+    players: List[Dict[str, Any]] = []
+    for i in range(num_players):
+        base = combos[i % len(combos)]
+        name = base if i < len(combos) else f'{base} {i // len(combos) + 1}'
+        player: Dict[str, Any] = {
+            'name': name,
+            'team': teams[i % num_teams],
+            'goals': rng.choices([0, 1, 2, 3], weights=[80, 14, 5, 1])[0],
+            'assists': rng.choices([0, 1, 2], weights=[82, 15, 3])[0],
+            'cards': rng.choices([0, 1, 2], weights=[85, 13, 2])[0],
+        }
+        if rng.random() < 0.1:
+            player['nicknames'] = [f'{name.split()[0][:3].lower()}{name.split()[1][:2].lower()}']
+        players.append(player)
+    return {'match_id': match_id, 'teams': teams, 'players': players}
+
+
+def _player_reference(rng: random.Random, player: Dict[str, Any]) -> str:
+    choices = [player['name'], player['name'].split()[1]]
+    choices.extend(player.get('nicknames', []))
+    return rng.choice(choices)
+
+
+def iter_comments(
+    num_comments: int,
+    squad: Dict[str, Any],
+    seed: int = 0,
+    mention_rate: float = 0.2,
+    sentiment_rate: float = 0.6,
+    min_words: int = 6,
+    max_words: int = 24,
+    duplicate_rate: float = 0.0,
+) -> Iterator[Dict[str, Any]]:
+    rng = random.Random(seed)
+    players = squad.get('players', [])
+    teams = squad.get('teams', ['unknown'])
+    recent: List[str] = []
+    for n in range(num_comments):
+        if recent and rng.random() < duplicate_rate:
+            text = rng.choice(recent)
+        else:
+            words = [rng.choice(FILLER_WORDS) for _ in range(rng.randint(min_words, max_words))]
+            if rng.random() < sentiment_rate:
+                pool = POSITIVE_WORDS if rng.random() < 0.55 else NEGATIVE_WORDS
+                words.insert(rng.randrange(len(words) + 1), rng.choice(pool))
+            if players and rng.random() < mention_rate:
+                words.insert(rng.randrange(len(words) + 1), _player_reference(rng, rng.choice(players)))
+            text = ' '.join(words)
+            if len(recent) < 64:
+                recent.append(text)
+            else:
+                recent[rng.randrange(64)] = text
+        yield {'author': f'user{rng.randrange(max(1, num_comments // 3))}', 'text': text, 'team': rng.choice(teams)}
+
+
+def write_thread(path: str, comments: Iterator[Dict[str, Any]]) -> int:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        if path.endswith('.jsonl'):
+            for comment in comments:
+                f.write(json.dumps(comment) + '\n')
+                count += 1
+        else:
+            f.write('{"comments": [\n')
+            for comment in comments:
+                f.write((',\n' if count else '') + json.dumps(comment))
+                count += 1
+            f.write('\n]}\n')
+    return count
+
+
+def write_match(
+    match_dir: str,
+    num_comments: int,
+    num_players: int,
+    seed: int = 0,
+    mention_rate: float = 0.2,
+    duplicate_rate: float = 0.0,
+    jsonl: bool = True,
+) -> Tuple[str, str]:
+    os.makedirs(match_dir, exist_ok=True)
+    squad = generate_squad(num_players, seed=seed, match_id=os.path.basename(os.path.normpath(match_dir)))
+    stats_path = os.path.join(match_dir, 'stats.json')
+    with open(stats_path, 'w', encoding='utf-8') as f:
+        json.dump(squad, f, indent=2)
+    thread_path = os.path.join(match_dir, 'thread.jsonl' if jsonl else 'thread.json')
+    write_thread(
+        thread_path,
+        iter_comments(num_comments, squad, seed=seed, mention_rate=mention_rate, duplicate_rate=duplicate_rate),
+    )
+    return thread_path, stats_path
@@ -0,0 +1,10 @@
+import re
+from typing import List
+
+# Clause punctuation is kept as one-character tokens, so negation can stop at it.
+CLAUSE_BREAKS = frozenset('.,;:!?')
+TOKEN_PATTERN = re.compile(r"[^\W_]+(?:'[^\W_]+)*|[" + re.escape(''.join(sorted(CLAUSE_BREAKS))) + ']')
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower().replace('’', "'"))
@@ -0,0 +1,246 @@
+import importlib.util
+import re
+from array import array
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from src.models.domain_models import DEFAULT_BATCH_SIZE, LABEL_CODES, CommentBatch, StringTable
+from src.tools.player_index import PlayerMentionIndex
+from src.tools.sentiment_lexicon import SentimentLexicon, Weight
+from src.tools.tokenizer import CLAUSE_BREAKS, TOKEN_PATTERN
+
+# numpy is optional (agents fall back to the pure-Python scorers) and is only
+# imported once a vectorized scorer is actually built, which keeps CLI startup fast.
+np: Any = None
+HAVE_NUMPY = importlib.util.find_spec('numpy') is not None
+BACKENDS = ('auto', 'python', 'numpy')
+IMPACT_WEIGHTS = (3, 2, -1)  # goals, assists, cards; must match compute_impact_score
+
+# Comments are joined with a NUL token, which the token pattern never matches, so
+# one pass over the whole batch yields every token plus a separator per boundary.
+_SEPARATOR = '\x00'
+_JOINER = f' {_SEPARATOR} '
+_BATCH_PATTERN = re.compile(TOKEN_PATTERN.pattern + '|' + _SEPARATOR)
+# ASCII fast path: every byte the token pattern cannot match becomes a space and
+# clause punctuation is spaced out, so bytes.translate, a few str.replace calls and
+# str.split() find the same tokens without the regex engine.
+_ASCII_BOUNDARIES = bytes(
+    b if chr(b).isalnum() or chr(b) in "'" + _SEPARATOR or chr(b) in CLAUSE_BREAKS or b > 127 else ord(' ')
+    for b in range(256)
+)
+
+
+def _tokenize_joined(joined: str) -> List[str]:
+    text = joined.lower().replace('’', "'")
+    if not text.isascii():
+        return _BATCH_PATTERN.findall(text)
+    text = text.encode('ascii').translate(_ASCII_BOUNDARIES).decode('ascii')
+    for mark in CLAUSE_BREAKS:
+        if mark in text:
+            text = text.replace(mark, f' {mark} ')
+    tokens = text.split()
+    if "'" in text and any(t[0] == "'" or t[-1] == "'" or "''" in t for t in tokens if "'" in t):
+        # Apostrophes only join letters; strip leading, trailing and doubled ones.
+        tokens = [part for t in tokens for part in (TOKEN_PATTERN.findall(t) if "'" in t else (t,))]
+    return tokens
+
+
+def _require_numpy(what: str) -> Any:
+    global np
+    if np is None:
+        if not HAVE_NUMPY:
+            raise ImportError(f'{what} requires numpy (pip install numpy)')
+        import numpy
+
+        np = numpy
+    return np
+
+
+def resolve_backend(backend: str) -> str:
+    if backend not in BACKENDS:
+        raise ValueError(f'Unknown scoring backend: {backend} (expected one of {", ".join(BACKENDS)})')
+    if backend == 'auto':
+        return 'numpy' if HAVE_NUMPY else 'python'
+    if backend == 'numpy' and not HAVE_NUMPY:
+        raise ImportError('The numpy scoring backend requires numpy (pip install numpy)')
+    return backend
+
+
+@dataclass
+class ScoredBatch:
+    scores: Any  # per-comment lexicon score (int64 for integral lexicons, else float64)
+    mention_rows: Any  # comment index of each (comment, player) mention
+    mention_cols: Any  # player column of each mention, see VectorScorer.player_names
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def label_codes(self) -> bytes:
+        # CommentBatch label codes indexed by sign(score) + 1.
+        codes = np.array(
+            [LABEL_CODES['negative'], LABEL_CODES['neutral'], LABEL_CODES['positive']], dtype=np.uint8
+        )
+        return codes[(np.sign(self.scores) + 1).astype(np.intp)].tobytes()
+
+
+class VectorScorer:
+    """Columnar lexicon and mention scoring for batches of comments.
+
+    Tokens are mapped to ids in a vocabulary that grows with the distinct tokens
+    seen, so per-token work is array lookups. Lexicon phrases and player aliases
+    start at a small number of positions; only those are resolved in Python, which
+    keeps results identical to SentimentLexicon.score_tokens and
+    PlayerMentionIndex.find_mentions_in_tokens.
+    """
+
+    def __init__(self, lexicon: SentimentLexicon, mention_index: Optional[PlayerMentionIndex] = None) -> None:
+        _require_numpy('VectorScorer')
+        self.lexicon = lexicon
+        self.mention_index = mention_index or PlayerMentionIndex([])
+        self.player_names: List[str] = list(dict.fromkeys(self.mention_index.player_names))
+        self.player_columns: Dict[str, int] = {name: i for i, name in enumerate(self.player_names)}
+        self.player_table = StringTable(self.player_names)
+        self._integral = lexicon.is_integral()
+
+        self._vocab: Dict[str, int] = {}
+        self._weights: List[Weight] = []
+        self._negators: List[bool] = []
+        self._clause_breaks: List[bool] = []
+        self._phrase_starts: List[bool] = []
+        self._alias_starts: List[bool] = []
+        self._grow_vocabulary([_SEPARATOR])  # id 0
+
+    def __len__(self) -> int:
+        return len(self._vocab)
+
+    def _grow_vocabulary(self, tokens: Iterable[str]) -> None:
+        new = set(tokens).difference(self._vocab)
+        if not new:
+            return
+        lexicon = self.lexicon
+        index = self.mention_index
+        for token in new:
+            self._vocab[token] = len(self._weights)
+            negator = token != _SEPARATOR and lexicon.is_negator(token)
+            # Negators are never scored themselves, matching score_tokens.
+            self._weights.append(0 if negator else (lexicon.unigram_weight(token) or 0))
+            self._negators.append(negator)
+            self._clause_breaks.append(token in CLAUSE_BREAKS)
+            self._phrase_starts.append(lexicon.starts_phrase(token))
+            self._alias_starts.append(index.starts_alias(token))
+        self._weight_array = np.asarray(self._weights, dtype=np.float64)
+        self._negator_array = np.asarray(self._negators, dtype=bool)
+        self._clause_break_array = np.asarray(self._clause_breaks, dtype=bool)
+        self._phrase_start_array = np.asarray(self._phrase_starts, dtype=bool)
+        self._alias_start_array = np.asarray(self._alias_starts, dtype=bool)
+
+    def score_texts(self, texts: Sequence[str]) -> ScoredBatch:
+        n = len(texts)
+        joined = _JOINER.join(texts)
+        if joined.count(_SEPARATOR) != max(n - 1, 0):
+            joined = _JOINER.join(t.replace(_SEPARATOR, ' ') for t in texts)
+        tokens = _tokenize_joined(joined)
+        self._grow_vocabulary(tokens)
+
+        ids = np.fromiter(map(self._vocab.__getitem__, tokens), dtype=np.int32, count=len(tokens))
+        positions = np.arange(len(tokens))
+        is_separator = ids == 0
+        comment_of = np.cumsum(is_separator)
+        clause_start = np.maximum.accumulate(
+            np.where(is_separator | self._clause_break_array[ids], positions + 1, 0)
+        )
+
+        # A term is flipped when the most recent negator in the same clause is
+        # at most negation_window tokens before it.
+        last_negator = np.maximum.accumulate(np.where(self._negator_array[ids], positions, -1))
+        negated = (last_negator >= clause_start) & (positions - last_negator <= self.lexicon.negation_window)
+        weights = self._weight_array[ids]
+        scores = np.bincount(comment_of, weights=np.where(negated, -weights, weights), minlength=n)
+
+        phrase_starts = np.flatnonzero(self._phrase_start_array[ids])
+        if phrase_starts.size:
+            # Phrases change how following tokens are consumed, so comments that
+            # might contain one are rescored exactly.
+            boundaries = np.flatnonzero(is_separator).tolist()
+            for c in np.unique(comment_of[phrase_starts]).tolist():
+                lo = boundaries[c - 1] + 1 if c else 0
+                hi = boundaries[c] if c < len(boundaries) else len(tokens)
+                scores[c] = self.lexicon.score_tokens(tokens[lo:hi])
+        if self._integral:
+            scores = np.rint(scores).astype(np.int64)
+
+        rows, cols = self._resolve_mentions(tokens, ids, comment_of)
+        return ScoredBatch(
+            scores=scores,
+            mention_rows=np.asarray(rows, dtype=np.int64),
+            mention_cols=np.asarray(cols, dtype=np.int64),
+        )
+
+    def score_batch(
+        self, batch: CommentBatch, chunk_size: int = DEFAULT_BATCH_SIZE, with_mentions: bool = True
+    ) -> CommentBatch:
+        scores: List[Weight] = []
+        labels = bytearray()
+        rows = array('I')
+        cols = array('I')
+        for lo in range(0, len(batch), chunk_size):
+            scored = self.score_texts(batch.texts[lo:lo + chunk_size])
+            scores.extend(scored.scores.tolist())
+            labels += scored.label_codes()
+            rows.extend((scored.mention_rows + lo).tolist())
+            cols.extend(scored.mention_cols.tolist())
+        batch.scores = array('q' if self._integral else 'd', scores)
+        batch.labels = labels
+        if with_mentions:
+            batch.set_mentions(rows, cols, self.player_table)
+        return batch
+
+    def _resolve_mentions(self, tokens: List[str], ids: Any, comment_of: Any) -> Tuple[List[int], List[int]]:
+        rows: List[int] = []
+        cols: List[int] = []
+        candidates = np.flatnonzero(self._alias_start_array[ids])
+        if not candidates.size:
+            return rows, cols
+
+        match_at = self.mention_index.match_at
+        columns = self.player_columns
+        consumed = -1
+        found: List[str] = []
+        current = -1
+        # Aliases never span a separator, so one left-to-right pass over the
+        # candidate positions reproduces the per-comment longest-match scan.
+        for i, c in zip(candidates.tolist(), comment_of[candidates].tolist()):
+            if i < consumed:
+                continue
+            names, span = match_at(tokens, i)
+            if not names:
+                continue
+            consumed = i + span
+            if c != current:
+                current = c
+                found = []
+            for name in names:
+                if name not in found:
+                    found.append(name)
+                    rows.append(c)
+                    cols.append(columns[name])
+        return rows, cols
+
+    def player_sentiment(self, batch: ScoredBatch) -> Any:
+        # Column sums of the sparse comment x player mention matrix weighted by score.
+        totals = np.bincount(
+            batch.mention_cols, weights=batch.scores[batch.mention_rows], minlength=len(self.player_names)
+        )
+        return np.rint(totals).astype(np.int64) if self._integral else totals
+
+
+def stats_matrix(players: Sequence[Dict[str, Any]]) -> Any:
+    _require_numpy('stats_matrix')
+    matrix = np.zeros((len(players), len(IMPACT_WEIGHTS)), dtype=np.int64)
+    for row, player in enumerate(players):
+        matrix[row] = (int(player.get('goals', 0)), int(player.get('assists', 0)), int(player.get('cards', 0)))
+    return matrix
+
+
+def impact_scores(stats: Any, sentiment: Sequence[Weight]) -> List[Weight]:
+    _require_numpy('impact_scores')
+    return (stats @ np.asarray(IMPACT_WEIGHTS, dtype=np.int64) + np.asarray(sentiment)).tolist()
@@ -0,0 +1,79 @@
+import time
+import pytest
+from benchmarks.stub_reddit_server import StubRedditServer
+from src.tools.async_reddit_fetcher import AsyncRedditFetcher, FetchError
+
+
+def _fetcher(**kwargs):
+    kwargs.setdefault('backoff_base', 0.001)
+    kwargs.setdefault('timeout', 5.0)
+    return AsyncRedditFetcher(**kwargs)
+
+
+def test_follows_pagination_to_the_last_page():
+    with StubRedditServer(pages_per_thread=4, comments_per_page=3, latency=0) as stub:
+        fetcher = _fetcher()
+        comments = fetcher.fetch_all(stub.thread_urls(2))
+    assert len(comments) == 2 * 4 * 3
+    assert fetcher.stats['pages'] == 8
+    assert [c['author'] for c in comments[:12]] == [f'user{n}' for n in range(12)]
+
+
+def test_max_pages_caps_each_thread():
+    with StubRedditServer(pages_per_thread=4, comments_per_page=3, latency=0) as stub:
+        comments = _fetcher(max_pages=2).fetch_all(stub.thread_urls(1))
+    assert len(comments) == 2 * 3
+
+
+def test_repeated_cursor_ends_the_thread():
+    with StubRedditServer(pages_per_thread=3, comments_per_page=2, latency=0, repeat_cursor=True) as stub:
+        fetcher = _fetcher()
+        comments = fetcher.fetch_all(stub.thread_urls(1))
+    # Pages 0, 1, 2, then page 2 points back at cursor 1, which was already followed.
+    assert fetcher.stats['pages'] == 3
+    assert len(comments) == 3 * 2
+
+
+@pytest.mark.parametrize('status', [429, 500, 503])
+def test_retries_throttled_and_failed_requests(status):
+    with StubRedditServer(pages_per_thread=3, comments_per_page=2, latency=0, fail_every=2, fail_status=status) as stub:
+        fetcher = _fetcher(max_retries=3)
+        comments = fetcher.fetch_all(stub.thread_urls(1))
+    assert len(comments) == 3 * 2
+    assert fetcher.stats['retries'] >= 1
+
+
+def test_gives_up_after_max_retries():
+    with StubRedditServer(latency=0, fail_every=1, fail_status=429) as stub:
+        fetcher = _fetcher(max_retries=2)
+        with pytest.raises(FetchError) as info:
+            fetcher.fetch_all(stub.thread_urls(1))
+    assert info.value.status == 429
+    assert fetcher.stats['requests'] == 3
+
+
+def test_reuses_keep_alive_connections():
+    with StubRedditServer(pages_per_thread=5, comments_per_page=1, latency=0) as stub:
+        fetcher = _fetcher(max_concurrency=1, max_connections_per_host=1)
+        fetcher.fetch_all(stub.thread_urls(4))
+        assert stub.requests == 20
+        assert stub.connections == 1
+    assert fetcher.stats['connections_opened'] == 1
+
+
+def test_follows_redirects():
+    with StubRedditServer(pages_per_thread=2, comments_per_page=2, latency=0) as stub:
+        fetcher = _fetcher()
+        comments = fetcher.fetch_all([f'{stub.base_url}/moved/7.json'])
+    assert len(comments) == 2 * 2
+    assert comments[0]['text'].startswith('Thread 7 ')
+
+
+def test_no_content_response_does_not_wait_for_a_body():
+    with StubRedditServer(latency=0) as stub:
+        fetcher = _fetcher(timeout=2.0, max_connections_per_host=1)
+        start = time.perf_counter()
+        with pytest.raises(FetchError) as info:
+            fetcher.fetch_all([f'{stub.base_url}/empty/0.json'])
+        assert time.perf_counter() - start < 1.0
+    assert info.value.status == 204
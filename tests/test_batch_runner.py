@@ -0,0 +1,59 @@
+import logging
+import os
+import shutil
+from src.memory.memory_bank import MemoryBank
+from src.observability.metrics import Metrics
+from src.pipeline.batch_runner import discover_matches, run_batch
+from src.pipeline.match_pipeline import SCORE_MEMO_FILE, run_match_pipeline
+from src.pipeline.stage_cache import StageCache
+from src.tools.dedup import ScoreMemo, normalize_text
+from src.tools.reddit_fetcher import RedditFetcher
+from src.tools.synthetic_data import write_match
+
+LOGGER = logging.getLogger('footypulse.test')
+
+
+def _stores(path):
+    os.makedirs(path)
+    metrics = Metrics(os.path.join(path, 'counters.json'), flush_interval=float('inf'))
+    return metrics, MemoryBank(os.path.join(path, 'memory.jsonl'))
+
+
+def _entries(memory_bank):
+    return sorted(
+        (repr(sorted((k, v) for k, v in entry.items() if k != 'ts')) for entry in memory_bank.get_all())
+    )
+
+
+def _matches(tmp_path):
+    # Both matches share one squad, so they also share the score memo's fingerprint.
+    write_match(str(tmp_path / 'matches' / 'match001'), 400, 8, seed=1)
+    write_match(str(tmp_path / 'matches' / 'match002'), 300, 8, seed=2)
+    shutil.copy(tmp_path / 'matches' / 'match001' / 'stats.json', tmp_path / 'matches' / 'match002' / 'stats.json')
+    return discover_matches(str(tmp_path / 'matches'), str(tmp_path / 'reports'))
+
+
+def test_batch_matches_serial_runs(tmp_path):
+    matches = _matches(tmp_path)
+    assert [m.match_id for m in matches] == ['match001', 'match002']
+
+    metrics, memory_bank = _stores(str(tmp_path / 'batch'))
+    result = run_batch(
+        matches, LOGGER, metrics, memory_bank, workers=2, cache_dir=str(tmp_path / 'batch' / 'cache')
+    )
+    assert result.failures == []
+    assert result.total_comments == 700
+
+    serial_metrics, serial_memory = _stores(str(tmp_path / 'serial'))
+    cache = StageCache(str(tmp_path / 'serial' / 'cache'), metrics=serial_metrics)
+    serial = [run_match_pipeline(m, LOGGER, serial_metrics, serial_memory, cache=cache) for m in matches]
+
+    assert [m['match_summary'] for m in result.matches] == [m['match_summary'] for m in serial]
+    counters = {k: v for k, v in metrics.get_all().items() if not k.startswith('batch_')}
+    assert counters == serial_metrics.get_all()
+    assert _entries(memory_bank) == _entries(serial_memory)
+
+    # Each worker's new memo entries survive the other's save.
+    memo = ScoreMemo.load(str(tmp_path / 'batch' / 'cache' / SCORE_MEMO_FILE))
+    texts = {normalize_text(c['text']) for m in matches for c in RedditFetcher().iter_from_file(m.thread_path)}
+    assert memo.get_many(sorted(texts)).count(None) == 0
@@ -0,0 +1,64 @@
+import pytest
+from src.observability.metrics import Metrics
+from src.tools import code_execution_helper
+from src.tools.code_execution_helper import SnippetError, SnippetPool, SnippetTimeout, run_safe_python_snippet
+
+ROWS = [{'goals': n, 'assists': n % 3} for n in range(2500)]
+
+
+@pytest.fixture
+def metrics(tmp_path):
+    return Metrics(str(tmp_path / 'counters.json'), flush_interval=float('inf'))
+
+
+def test_evaluates_formulas_in_row_order(metrics):
+    with SnippetPool(workers=2, batch_size=300, metrics=metrics) as pool:
+        assert pool.evaluate('goals * 2 + assists', ROWS) == [r['goals'] * 2 + r['assists'] for r in ROWS]
+        assert pool.evaluate('result = max(goals, 10)', ROWS[:3]) == [10, 10, 10]
+        assert pool.run("print(len('abc'))") == (True, '3\n')
+    assert metrics.get_all()['snippet_rows'] == 2503
+
+
+def test_timeout_kills_and_replaces_the_worker(metrics):
+    with SnippetPool(workers=1, timeout=0.5, metrics=metrics) as pool:
+        (worker,) = pool._all
+        with pytest.raises(SnippetTimeout):
+            pool.evaluate('while True:\n    pass', ROWS[:1])
+        assert not worker.process.is_alive()
+        (replacement,) = pool._all
+        assert replacement is not worker and replacement.process.is_alive()
+        assert pool.evaluate('goals + 1', ROWS[:2]) == [1, 2]
+    counters = metrics.get_all()
+    assert counters['snippet_timeouts'] == counters['snippet_worker_restarts'] == 1
+
+
+@pytest.mark.skipif(code_execution_helper.resource is None, reason='memory caps need the resource module')
+def test_memory_cap_raises_memory_error():
+    with SnippetPool(workers=1, memory_mb=64) as pool:
+        with pytest.raises(SnippetError, match=r'^row 1: MemoryError'):
+            pool.evaluate("len('x' * goals)", [{'goals': 10}, {'goals': 512 * 1024 * 1024}])
+        assert pool.evaluate("len('x' * goals)", [{'goals': 10}]) == [10]
+        # A result that fits under the cap but not twice over cannot be sent back.
+        with pytest.raises(SnippetError, match='MemoryError: result too large'):
+            pool.evaluate("'x' * goals", [{'goals': 40 * 1024 * 1024}])
+        assert pool.evaluate('goals', [{'goals': 1}]) == [1]
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_errors_name_the_failing_row(workers):
+    with SnippetPool(workers=workers, batch_size=1000) as pool:
+        with pytest.raises(SnippetError, match=r'^row 2100: ZeroDivisionError'):
+            pool.evaluate('goals / (goals - 2100)', ROWS)
+        with pytest.raises(SnippetError, match=r"^row 0: NameError: name 'open' is not defined"):
+            pool.evaluate("open('/etc/passwd')", ROWS)
+        with pytest.raises(SnippetError, match='row 0: NameError: formula must be an expression or assign result'):
+            pool.evaluate('x = goals', ROWS[:1])
+        assert pool.evaluate('goals', ROWS[2099:2101]) == [2099, 2100]
+
+
+def test_run_reports_errors_like_the_in_process_runner():
+    with SnippetPool(workers=1, timeout=0.5) as pool:
+        assert pool.run('1 / 0') == run_safe_python_snippet('1 / 0') == (False, 'division by zero')
+        assert pool.run('while True:\n    pass')[0] is False
+        assert pool.run("print('ok')") == (True, 'ok\n')
+    assert pool.run('1') == (False, 'SnippetPool is closed')
@@ -0,0 +1,55 @@
+import pickle
+import pytest
+from src.models.domain_models import Comment, CommentBatch, iter_batches, map_comments_from_raw
+
+COMMENTS = [
+    Comment('fan1', 'Smith, what a finish!', 'Red FC', 'positive', 1, ['Alex Smith']),
+    Comment('fan2', 'Jones and Smith off the pace', 'Blue FC', 'negative', -1, ['Jo Jones', 'Alex Smith']),
+    Comment('fan1', 'half time', 'Red FC', 'neutral', 0),
+    Comment('fan3', '', 'Blue FC'),
+]
+
+
+def test_comments_round_trip():
+    batch = CommentBatch.from_comments(COMMENTS)
+    assert len(batch) == 4
+    assert list(batch) == COMMENTS
+    assert [batch[i] for i in range(-4, 0)] == COMMENTS
+    assert batch.authors.values == ['fan1', 'fan2', 'fan3']  # repeated strings are interned
+    assert batch.label_counts() == {'unknown': 1, 'positive': 1, 'negative': 1, 'neutral': 1}
+    with pytest.raises(IndexError):
+        batch[4]
+
+
+def test_pickle_and_slices_round_trip():
+    batch = CommentBatch.from_comments(COMMENTS)
+    restored = pickle.loads(pickle.dumps(batch, protocol=pickle.HIGHEST_PROTOCOL))
+    assert list(restored) == COMMENTS
+    restored.append('fan4', 'late winner', 'Red FC', 2, 'positive')  # interning still works after unpickling
+    assert restored.author_ids[-1] == 3 and restored.team_ids[-1] == 0
+
+    tail = batch[1:]
+    assert list(tail) == COMMENTS[1:]
+    assert tail.authors.values == ['fan2', 'fan1', 'fan3']
+    assert list(batch[::2]) == COMMENTS[::2]
+    assert len(batch[4:]) == 0
+
+
+def test_fractional_scores_switch_to_doubles():
+    batch = CommentBatch.from_comments(COMMENTS[:2])
+    assert batch.scores.typecode == 'q'
+    batch.append('fan5', 'decent', 'Red FC', 0.5, 'positive')
+    assert batch.scores.typecode == 'd'
+    assert list(batch.scores) == [1.0, -1.0, 0.5]
+    batch.set_scores([1, 2, 3])
+    assert batch.scores.typecode == 'q'
+
+
+def test_raw_dicts_round_trip():
+    raw = [{'author': c.author, 'text': c.text, 'team': c.team} for c in COMMENTS] + [{}]
+    expected = [Comment(c.author, c.text, c.team) for c in COMMENTS] + [Comment('unknown', '', 'unknown')]
+    assert map_comments_from_raw(raw) == expected
+    assert list(CommentBatch.from_dicts(raw)) == expected
+    batches = list(iter_batches(iter(raw), 2))
+    assert [len(b) for b in batches] == [2, 2, 1]
+    assert [c for b in batches for c in b] == expected
@@ -0,0 +1,22 @@
+import os
+import stat
+from src.tools.file_utils import atomic_write_bytes, atomic_write_text
+
+
+def _mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_new_file_gets_umask_mode_and_replaced_file_keeps_its_mode(tmp_path):
+    umask = os.umask(0o027)
+    try:
+        path = str(tmp_path / 'out.txt')
+        atomic_write_text(path, 'one')
+        assert _mode(path) == 0o640
+        os.chmod(path, 0o604)
+        atomic_write_bytes(path, b'two')
+        assert _mode(path) == 0o604
+        assert open(path, 'rb').read() == b'two'
+    finally:
+        os.umask(umask)
+    assert os.listdir(tmp_path) == ['out.txt']
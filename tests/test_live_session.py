@@ -0,0 +1,86 @@
+import json
+import logging
+import os
+from src.memory.memory_bank import MemoryBank
+from src.observability.metrics import Metrics
+from src.pipeline.live_session import LiveMatchSession
+from src.pipeline.match_pipeline import MatchInputs
+
+PLAYERS = [
+    {'name': 'Alex Smith', 'team': 'Red FC', 'goals': 2, 'assists': 1, 'cards': 0},
+    {'name': 'Marco Silva', 'team': 'Blue FC', 'goals': 1, 'assists': 0, 'cards': 0},
+]
+
+
+def _write_stats(path, players, mtime=None):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'match_id': 'm1', 'players': players}, f)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def _append(path, *texts):
+    with open(path, 'a', encoding='utf-8') as f:
+        for text in texts:
+            f.write(json.dumps({'author': 'fan', 'text': text, 'team': 'Red FC'}) + '\n')
+
+
+def _session(tmp_path):
+    thread_path = str(tmp_path / 'thread.jsonl')
+    stats_path = str(tmp_path / 'stats.json')
+    open(thread_path, 'w').close()
+    _write_stats(stats_path, PLAYERS, mtime=1_000_000)
+    metrics = Metrics(str(tmp_path / 'counters.json'), flush_interval=float('inf'))
+    inputs = MatchInputs('m1', thread_path, stats_path, str(tmp_path / 'report.md'))
+    session = LiveMatchSession(
+        inputs, logging.getLogger('footypulse.test'), metrics, MemoryBank(str(tmp_path / 'memory.jsonl'))
+    )
+    return session, thread_path, stats_path
+
+
+def _impacts(session):
+    return {impact.player_name: impact for impact in session.player_impact_agent._live_impacts.values()}
+
+
+def test_stats_update_keeps_sentiment_from_same_tick(tmp_path):
+    session, thread_path, stats_path = _session(tmp_path)
+    _append(thread_path, 'Alex Smith was brilliant, what a fantastic goal')
+    session.tick()
+    sentiment = _impacts(session)['Alex Smith'].sentiment_score
+    assert sentiment > 0
+
+    _append(thread_path, 'Alex Smith was brilliant, what a fantastic goal')
+    players = [dict(PLAYERS[0], goals=3), PLAYERS[1]]
+    _write_stats(stats_path, players, mtime=1_000_100)
+    session.tick()
+    alex = _impacts(session)['Alex Smith']
+    assert alex.goals == 3
+    assert alex.sentiment_score == 2 * sentiment
+    assert alex.impact_score == 3 * 3 + 1 * 2 + 2 * sentiment
+    session.close()
+
+
+def test_players_added_to_stats_are_matched(tmp_path):
+    session, thread_path, stats_path = _session(tmp_path)
+    _write_stats(stats_path, PLAYERS + [{'name': 'Jordan Lee', 'team': 'Red FC'}], mtime=1_000_100)
+    _append(thread_path, 'Jordan Lee was brilliant today')
+    session.tick()
+    assert _impacts(session)['Jordan Lee'].sentiment_score > 0
+    session.close()
+
+
+def test_truncated_thread_restarts_totals(tmp_path):
+    session, thread_path, stats_path = _session(tmp_path)
+    _append(thread_path, *['Alex Smith was brilliant'] * 5)
+    session.tick()
+    sentiment = _impacts(session)['Alex Smith'].sentiment_score / 5
+
+    open(thread_path, 'w').close()
+    _append(thread_path, 'Alex Smith was brilliant', 'Marco Silva scored')
+    result = session.tick()
+    assert result['total_comments'] == 2
+    assert len(session.recent_comments) == 2
+    assert _impacts(session)['Alex Smith'].sentiment_score == sentiment
+    summary = session.sentiment_agent.live_summary
+    assert summary.positive + summary.negative + summary.neutral == 2
+    session.close()
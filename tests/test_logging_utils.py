@@ -0,0 +1,69 @@
+import logging
+import multiprocessing
+import pytest
+from src.observability import logging_utils
+
+
+def _log_in_child(name):
+    logging.getLogger(name).info('from the forked child')
+
+
+def test_async_logging_reaches_the_file_from_forked_children(tmp_path):
+    name = 'footypulse.test_async_fork'
+    log_path = tmp_path / 'app.log'
+    logger = logging_utils.init_logging(str(log_path), async_mode=True, name=name)
+    logger.propagate = False
+    try:
+        child = multiprocessing.get_context('fork').Process(target=_log_in_child, args=(name,))
+        child.start()
+        child.join()
+        assert child.exitcode == 0
+        logger.info('from the parent')
+    finally:
+        logging_utils.shutdown_logging()
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+            handler.close()
+
+    lines = log_path.read_text(encoding='utf-8').splitlines()
+    assert len(lines) == 3
+    assert sum('from the forked child' in line for line in lines) == 1
+
+
+def _records(logger, record_filter):
+    kept = []
+    handler = logging.Handler()
+    handler.emit = kept.append
+    handler.addFilter(record_filter)
+    logger.addHandler(handler)
+    logger.propagate = False
+    return kept
+
+
+def test_rate_limit_is_per_call_site():
+    logger = logging.getLogger('footypulse.test_rate_limit')
+    logger.setLevel(logging.INFO)
+    kept = _records(logger, logging_utils.RateLimitFilter(rate=1e-9, burst=2))
+    for n in range(5):
+        logger.info(f'chatty {n}')
+    logger.info('other call site')
+    logger.warning('warnings always pass')
+
+    assert [r.getMessage() for r in kept] == ['chatty 0', 'chatty 1', 'other call site', 'warnings always pass']
+
+
+def test_sampling_keeps_an_even_fraction():
+    logger = logging.getLogger('footypulse.test_sampling')
+    logger.setLevel(logging.INFO)
+    kept = _records(logger, logging_utils.SamplingFilter(0.25))
+    for n in range(8):
+        logger.info(f'record {n}')
+    assert [r.getMessage() for r in kept] == ['record 0', 'record 4']
+
+
+def test_per_record_filters_must_implement_keep():
+    class Incomplete(logging_utils._PerRecordFilter):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,77 @@
+import logging
+import os
+from src.agents.player_impact_agent import PlayerImpactAgent
+from src.memory.memory_bank import MemoryBank
+from src.observability.metrics import Metrics
+from src.observability.tracing import Tracer
+from src.pipeline.match_pipeline import SCORE_MEMO_FILE, MatchInputs, run_match_pipeline, select_stages
+from src.pipeline.stage_cache import StageCache
+from src.tools.dedup import ScoreMemo
+from src.tools.synthetic_data import write_match
+
+
+def _run(tmp_path, thread_path, stats_path, **kwargs):
+    metrics = Metrics(str(tmp_path / 'counters.json'), flush_interval=float('inf'))
+    inputs = MatchInputs('m1', thread_path, stats_path, str(tmp_path / 'report.md'))
+    kwargs.setdefault('cache', StageCache(str(tmp_path / 'cache'), metrics=metrics))
+    return run_match_pipeline(
+        inputs, logging.getLogger('footypulse.test'), metrics, MemoryBank(str(tmp_path / 'memory.jsonl')), **kwargs
+    )
+
+
+def test_cached_run_reports_comment_count_and_same_report(tmp_path):
+    thread_path, stats_path = write_match(str(tmp_path / 'm1'), 500, 10, seed=3)
+    first = _run(tmp_path, thread_path, stats_path)
+    with open(first['report_path'], encoding='utf-8') as f:
+        report = f.read()
+    second = _run(tmp_path, thread_path, stats_path)
+
+    assert first['num_comments'] == second['num_comments'] == 500
+    with open(second['report_path'], encoding='utf-8') as f:
+        assert f.read() == report
+    # Impact reads the full scored thread from the cache, not the report sample.
+    third = _run(tmp_path, thread_path, stats_path, stages=['impact'])
+    assert third['player_impacts'] == first['player_impacts']
+
+
+def test_profiled_run_does_not_overlap_spans(tmp_path):
+    thread_path, stats_path = write_match(str(tmp_path / 'm1'), 20000, 10, seed=3)
+    tracer = Tracer(trace_memory=True)
+    # The snapshot and impact stages both wait only on the scored thread.
+    _run(tmp_path, thread_path, stats_path, cache=None, tracer=tracer, snapshot_dir=str(tmp_path / 'snapshots'))
+
+    spans = sorted(tracer.spans, key=lambda s: s.start)
+    assert len(spans) > 1
+    for before, after in zip(spans, spans[1:]):
+        assert before.start + before.wall <= after.start
+        assert before.peak_memory is not None
+
+
+def test_cached_impacts_skip_loading_stats(tmp_path, monkeypatch):
+    thread_path, stats_path = write_match(str(tmp_path / 'm1'), 500, 10, seed=3)
+    first = _run(tmp_path, thread_path, stats_path)
+
+    def prepare(self):
+        raise AssertionError('stats loaded for cached impacts')
+
+    monkeypatch.setattr(PlayerImpactAgent, 'prepare', prepare)
+    assert _run(tmp_path, thread_path, stats_path)['player_impacts'] == first['player_impacts']
+
+
+def test_cached_scores_skip_loading_score_memo(tmp_path, monkeypatch):
+    thread_path, stats_path = write_match(str(tmp_path / 'm1'), 500, 10, seed=3)
+    _run(tmp_path, thread_path, stats_path)
+    assert os.path.exists(tmp_path / 'cache' / SCORE_MEMO_FILE)
+
+    def load(path):
+        raise AssertionError('score memo loaded without scoring')
+
+    monkeypatch.setattr(ScoreMemo, 'load', staticmethod(load))
+    assert _run(tmp_path, thread_path, stats_path)['num_comments'] == 500
+
+
+def test_selected_stages_skip_later_ones(tmp_path):
+    thread_path, stats_path = write_match(str(tmp_path / 'm1'), 200, 5, seed=3)
+    result = _run(tmp_path, thread_path, stats_path, stages=select_stages(only=['sentiment']))
+    assert result['stages'] == ('fetch', 'sentiment')
+    assert result['report_path'] is None and result['player_impacts'] == []
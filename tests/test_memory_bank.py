@@ -0,0 +1,42 @@
+import json
+from src.memory.memory_bank import MemoryBank
+
+
+def _journal(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_compact_keeps_entries_appended_by_another_process(tmp_path):
+    path = str(tmp_path / 'memory.jsonl')
+    ours = MemoryBank(path)
+    ours.append_entry({'type': 'a', 'n': 1})
+    assert len(ours.get_all()) == 1  # loaded: the in-memory copy is now stale for other writers
+
+    theirs = MemoryBank(path)
+    theirs.append_entries({'type': 'b', 'n': n} for n in range(3))
+
+    ours.compact()
+    assert [(e['type'], e['n']) for e in _journal(path)] == [('a', 1), ('b', 0), ('b', 1), ('b', 2)]
+    assert len(ours.get_all()) == 4
+
+
+def test_journal_is_only_rewritten_for_a_retention_limit(tmp_path):
+    path = str(tmp_path / 'memory.jsonl')
+    unbounded = MemoryBank(path, compact_every=2)
+    for n in range(5):
+        unbounded.append_entry({'type': 'a', 'n': n})
+    assert not unbounded._loaded  # appends never parsed or rewrote the journal
+
+    bounded = MemoryBank(path, compact_every=2, max_entries=3)
+    for n in range(5, 7):
+        bounded.append_entry({'type': 'a', 'n': n})
+    assert [e['n'] for e in _journal(path)] == [4, 5, 6]
+
+
+def test_torn_last_line_is_repaired_before_appending(tmp_path):
+    path = tmp_path / 'memory.jsonl'
+    path.write_text('{"type":"a","n":1}\n{"type":"a","n"', encoding='utf-8')
+    bank = MemoryBank(str(path))
+    bank.append_entry({'type': 'a', 'n': 2})
+    assert [e['n'] for e in _journal(path)] == [1, 2]
@@ -0,0 +1,35 @@
+from src.observability.metrics import Histogram, Metrics
+
+
+def _histogram(bounds, values):
+    hist = Histogram(bounds)
+    for value in values:
+        hist.observe(value)
+    return hist
+
+
+def test_custom_bounds_survive_a_round_trip():
+    hist = _histogram([10, 1, 5], [0.5, 1, 3, 7, 7, 20])
+    loaded = Histogram.from_dict(hist.to_dict())
+    assert loaded.bounds == [1.0, 5.0, 10.0]
+    assert loaded.bucket_counts == [2, 1, 2, 1]
+    assert loaded.to_dict() == hist.to_dict()
+
+
+def test_loads_integer_bucket_keys():
+    # Written before bounds were stored as floats.
+    data = {'count': 3, 'sum': 6.0, 'min': 1, 'max': 3, 'buckets': {'1': 1, '2': 1, '+Inf': 1}}
+    assert Histogram.from_dict(data).bucket_counts == [1, 1, 1]
+
+
+def test_flushed_histograms_keep_their_counts(tmp_path):
+    path = str(tmp_path / 'counters.json')
+    metrics = Metrics(path, flush_interval=float('inf'))
+    metrics.merge_histogram('latency.custom', _histogram([1, 2], [0.5, 1.5]))
+    metrics.close()
+
+    reopened = Metrics(path, flush_interval=float('inf'))
+    reopened.merge_histogram('latency.custom', _histogram([1, 2], [3]))
+    assert reopened.get_histograms()['latency.custom']['buckets'] == {'1.0': 1, '2.0': 1, '+Inf': 1}
+    reopened.close()
+    assert Metrics(path).get_histograms()['latency.custom']['count'] == 3
@@ -0,0 +1,33 @@
+import pytest
+from src.agents.sentiment_agent import default_lexicon
+from src.models.domain_models import CommentBatch
+from src.tools.parallel_scoring import ChunkScorer, ParallelScorer
+from src.tools.player_index import PlayerMentionIndex
+from src.tools.synthetic_data import generate_squad, iter_comments
+
+
+def _columns(batch):
+    return list(batch.scores), bytes(batch.labels), [batch.mentions(i) for i in range(len(batch))]
+
+
+@pytest.fixture(scope='module')
+def thread():
+    squad = generate_squad(12, seed=5)
+    return PlayerMentionIndex(squad['players']), list(iter_comments(3000, squad, seed=5, mention_rate=0.5))
+
+
+@pytest.mark.parametrize('executor', ['thread', 'process'])
+def test_pool_matches_serial_scoring(thread, executor):
+    index, comments = thread
+    lexicon = default_lexicon()
+    expected = _columns(ChunkScorer(lexicon, index).score_into(CommentBatch.from_dicts(comments), 4096))
+    assert any(expected[2]) and len(set(expected[1])) == 3
+
+    scorer = ParallelScorer(lexicon, index, workers=2, chunk_size=700, executor=executor)
+    try:
+        assert _columns(scorer.score_batch(CommentBatch.from_dicts(comments))) == expected
+        # The pool is kept for the next batch.
+        head = scorer.score_batch(CommentBatch.from_dicts(comments[:1500]))
+        assert _columns(head) == tuple(column[:1500] for column in expected)
+    finally:
+        scorer.close()
@@ -0,0 +1,61 @@
+import pytest
+from src.agents.sentiment_agent import default_lexicon
+from src.models.domain_models import CommentBatch
+from src.tools.parallel_scoring import ChunkScorer
+from src.tools.player_index import PlayerMentionIndex
+
+PLAYERS = [
+    {'name': 'Alex Smith', 'nicknames': ['Smudge']},
+    {'name': 'Marco Silva'},
+    {'name': 'Chris Jones'},
+    {'name': 'Sam Jones'},
+]
+
+
+@pytest.fixture
+def index():
+    return PlayerMentionIndex(PLAYERS)
+
+
+@pytest.mark.parametrize(
+    'text, expected',
+    [
+        ("Alex Smith's finish was great", ['Alex Smith']),
+        ("Smith's brace", ['Alex Smith']),
+        ('Smith’s brace', ['Alex Smith']),
+        ("Silva's pass to Smith", ['Marco Silva', 'Alex Smith']),
+        ("Chris Jones' header", ['Chris Jones']),
+    ],
+)
+def test_possessives(index, text, expected):
+    assert index.find_mentions(text) == expected
+
+
+def test_multi_word_names_and_nicknames(index):
+    assert index.find_mentions('ALEX SMITH, then Marco Silva') == ['Alex Smith', 'Marco Silva']
+    assert index.find_mentions("Smudge's goal") == ['Alex Smith']
+    assert index.find_mentions('Smith scored twice, Smith again') == ['Alex Smith']
+
+
+def test_partial_words_and_shared_surnames(index):
+    assert index.find_mentions('Smithson and Silvan scored') == []
+    assert index.find_mentions("Smiths' day out") == []
+    # Two players share the surname, so it names neither on its own.
+    assert index.find_mentions('Jones was everywhere') == []
+
+
+@pytest.mark.parametrize('backend', ['python', 'numpy'])
+def test_scorers_resolve_possessives(index, backend):
+    if backend == 'numpy':
+        pytest.importorskip('numpy')
+    batch = CommentBatch()
+    batch.texts = ["Smith's finish", 'Smithson again', "Marco Silva's pass"]
+    ChunkScorer(default_lexicon(), index, backend).score_into(batch, 2)
+    assert [batch.mentions(i) for i in range(3)] == [['Alex Smith'], [], ['Marco Silva']]
+
+
+def test_names_with_punctuation():
+    index = PlayerMentionIndex([{'name': 'J. Smith Jr.'}, {'name': 'Marco Silva'}])
+    assert index.find_mentions('J. Smith Jr. again') == ['J. Smith Jr.']
+    assert index.find_mentions('j smith jr was everywhere') == ['J. Smith Jr.']
+    assert index.find_mentions("Jr's run, then Silva") == ['J. Smith Jr.', 'Marco Silva']
@@ -0,0 +1,38 @@
+import random
+import pytest
+from src.models.domain_models import PlayerImpact
+from src.tools.ranking import RANK_KEYS, PlayerRanking
+
+
+def _players(count, seed=0):
+    rng = random.Random(seed)
+    # Narrow value ranges so ties are common.
+    return [
+        PlayerImpact(f'P{i}', f'T{rng.randrange(4)}', rng.randrange(3), 0, 0, rng.randrange(-2, 3), rng.randrange(6))
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize('by', sorted(RANK_KEYS))
+def test_matches_a_stable_descending_sort(by):
+    players = _players(300)
+    expected = sorted(players, key=RANK_KEYS[by], reverse=True)
+    ranking = PlayerRanking(players)
+    for k in (1, 3, 2, 50, 10, 300, 400):  # a smaller K after a larger one reuses it
+        assert ranking.top(k, by) == expected[:k]
+    assert ranking.leader(by) is expected[0]
+    assert ranking.ranked(by) == expected
+    assert ranking.top(5, by) == expected[:5]
+
+    leaders = {}
+    for p in expected:
+        leaders.setdefault(p.team, p)
+    assert ranking.team_leaders(by) == leaders
+
+
+def test_empty_and_unknown_keys():
+    ranking = PlayerRanking([])
+    assert ranking.top(3) == [] and ranking.leader() is None
+    assert ranking.team_leaders() == {} and ranking.ranked('goals') == []
+    with pytest.raises(ValueError, match='Unknown ranking key'):
+        PlayerRanking(_players(3)).top(1, 'assists')
@@ -0,0 +1,87 @@
+import csv
+import io
+import json
+import os
+import pytest
+from src.models.domain_models import Comment, PlayerImpact, SentimentSummary
+from src.tools.report_writers import RENDERERS, ReportContent, format_for_path, write_report, write_report_stream
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'golden')
+PLAYERS = [
+    PlayerImpact('Alex Smith', 'Red FC', 2, 1, 0, 3, 11),
+    PlayerImpact('Jo "JJ" Jones', 'Blue <United>', 0, 0, 2, -1, -3),
+]
+SAMPLE = [
+    Comment('fan1', 'Smith, what a finish!', 'Red FC', 'positive', 1, ['Alex Smith']),
+    Comment('fan2', 'Two cards &\nno clue', 'Blue <United>', 'negative', -1, ['Jo "JJ" Jones']),
+]
+APPENDIX = SAMPLE + [
+    Comment('fan3', 'half time', 'Red FC', 'neutral', 0),
+    Comment('fan4', 'great save', 'Blue <United>', 'positive', 1),
+    Comment('fan5', 'awful, awful', 'Red FC', 'negative', -2),
+]
+
+
+def _content(**kwargs):
+    values = dict(
+        match_summary='Red FC edge it; Smith stars.',
+        sentiment_summary=SentimentSummary(positive=2, negative=2, neutral=1),
+        players=PLAYERS,
+        sample_comments=SAMPLE,
+        rank_by='impact',
+        team_leaders={'Red FC': PLAYERS[0], 'Blue <United>': PLAYERS[1]},
+        all_comments=lambda: iter(APPENDIX),
+        page_size=2,
+    )
+    values.update(kwargs)
+    return ReportContent(**values)
+
+
+CASES = {
+    'report': _content,
+    # No players, no ranking and an appendix whose source turns out empty.
+    'report_empty': lambda: _content(
+        sentiment_summary=SentimentSummary(0, 0, 0), players=iter(()), sample_comments=[], rank_by=None,
+        team_leaders={}, all_comments=lambda: iter(()),
+    ),
+    'report_no_appendix': lambda: _content(all_comments=None),
+}
+
+
+def _render(case, fmt):
+    out = io.StringIO()
+    write_report_stream(out, CASES[case](), fmt)
+    return out.getvalue()
+
+
+@pytest.mark.parametrize('fmt', sorted(RENDERERS))
+@pytest.mark.parametrize('case', sorted(CASES))
+def test_matches_golden_output(case, fmt):
+    with open(os.path.join(GOLDEN_DIR, f'{case}.{fmt}'), encoding='utf-8', newline='') as f:
+        assert _render(case, fmt) == f.read()
+
+
+@pytest.mark.parametrize('case', sorted(CASES))
+def test_json_and_csv_parse(case):
+    report = json.loads(_render(case, 'json'))
+    rows = list(csv.DictReader(io.StringIO(_render(case, 'csv'))))
+    content = CASES[case]()
+    appendix = list(content.all_comments()) if content.all_comments else []
+    assert len(report['players']) == sum(r['record'] == 'player' for r in rows)
+    assert [c['text'] for page in report.get('appendix', {}).get('pages', []) for c in page] == [
+        c.text for c in appendix
+    ]
+    assert [(r['page'], r['text']) for r in rows if r['record'] == 'comment'] == [
+        (str(i // content.page_size + 1), c.text) for i, c in enumerate(appendix)
+    ]
+
+
+def test_write_report_picks_the_format_from_the_extension(tmp_path):
+    assert [format_for_path(p) for p in ('a.md', 'a.MARKDOWN', 'a.htm', 'a.json', 'a')] == [
+        'md', 'md', 'html', 'json', 'md'
+    ]
+    path = write_report(str(tmp_path / 'out' / 'report.htm'), _content())
+    with open(path, encoding='utf-8', newline='') as f:
+        assert f.read() == _render('report', 'html')
+    with pytest.raises(ValueError, match='Unknown report format'):
+        write_report(str(tmp_path / 'report.pdf'), _content())
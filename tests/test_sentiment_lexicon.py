@@ -0,0 +1,116 @@
+import json
+import pytest
+from src.agents.sentiment_agent import default_lexicon
+from src.models.domain_models import CommentBatch
+from src.tools.parallel_scoring import ChunkScorer
+from src.tools.sentiment_lexicon import SentimentLexicon
+
+
+@pytest.mark.parametrize(
+    'text, expected',
+    [
+        ('not bad', 1),
+        ("didn't win", -1),
+        ('Didn’t win', -1),
+        ('winger', 0),
+        ('never good never bad', 0),
+        ('not good, not bad', 0),
+    ],
+)
+def test_default_lexicon(text, expected):
+    assert default_lexicon().score(text) == expected
+
+
+@pytest.mark.parametrize(
+    'text, expected',
+    [
+        ('not good', -1),
+        ('not a very good', -1),  # three tokens after the negator: still inside the window
+        ('not a very bad good', 2),  # bad is negated, good is four tokens out
+        ('not a very big good', 1),
+    ],
+)
+def test_negation_window_edges(text, expected):
+    assert default_lexicon().score(text) == expected
+
+
+@pytest.mark.parametrize(
+    'text, expected',
+    [
+        ('not bad. Great', 2),
+        ('no, great', 1),
+        ('not! good', 1),
+        ('never; awful', -1),
+        ('not great... awful', -2),
+        ("not great isn't it", -1),
+    ],
+)
+def test_punctuation_ends_negation(text, expected):
+    assert default_lexicon().score(text) == expected
+
+
+@pytest.mark.parametrize('backend', ['python', 'numpy'])
+def test_scorers_agree_on_negation(backend):
+    if backend == 'numpy':
+        pytest.importorskip('numpy')
+    texts = ['not bad. Great', 'not a very good', 'not a very big good', "didn't win", 'winger', '']
+    batch = CommentBatch()
+    batch.texts = texts
+    ChunkScorer(default_lexicon(), backend=backend).score_into(batch, 4)
+    assert list(batch.scores) == [default_lexicon().score(t) for t in texts]
+
+
+def test_empty_lexicon_scores_everything_neutral():
+    lexicon = SentimentLexicon({})
+    assert len(lexicon) == 0
+    assert lexicon.score('not bad, great win') == 0
+    batch = CommentBatch()
+    batch.texts = ['great', 'not awful']
+    ChunkScorer(lexicon).score_into(batch, 2)
+    assert [batch.sentiment(i) for i in range(2)] == ['neutral', 'neutral']
+
+
+def test_weighted_terms_and_phrases():
+    lexicon = SentimentLexicon({'top': 1, 'top class': 3, 'own goal': -2.5, 'goal': 0.5})
+    assert lexicon.score('Top class finish') == 3  # the longest phrase wins
+    assert lexicon.score('top, class') == 1  # phrases do not span punctuation
+    assert lexicon.score('not an own goal') == 2.5
+    assert lexicon.score('goal goal') == 1.0
+    assert not lexicon.is_integral()
+
+
+def test_loads_json_lexicon(tmp_path):
+    path = tmp_path / 'lexicon.json'
+    data = {
+        'terms': {'worldie': '3', 'shocker': -2, 'bit slow': -0.5},
+        'positive': ['class'],
+        'negative': ['rubbish'],
+        'negators': ['hardly'],
+        'negation_window': 1,
+    }
+    path.write_text(json.dumps(data), encoding='utf-8')
+    lexicon = SentimentLexicon.from_file(str(path))
+    assert len(lexicon) == 5
+    assert lexicon.score('WORLDIE, class') == 4
+    assert lexicon.score('hardly rubbish') == 1
+    assert lexicon.score('hardly a rubbish shocker') == -3  # outside a window of 1
+    assert lexicon.score('not rubbish') == -1  # only the listed negators (and n't) negate
+    assert lexicon.score('a bit slow') == -0.5
+
+
+def test_loads_tab_separated_lexicon(tmp_path):
+    path = tmp_path / 'lexicon.tsv'
+    path.write_text('# term<TAB>weight\nworldie\t3\n\ndead ball\t-1.5  # set pieces\nclass\t1\n', encoding='utf-8')
+    lexicon = SentimentLexicon.from_file(str(path))
+    assert lexicon.score('class worldie from a dead ball') == 2.5
+    assert lexicon.fingerprint() == SentimentLexicon.from_file(str(path)).fingerprint()
+    assert lexicon.fingerprint() != default_lexicon().fingerprint()
+
+
+def test_rejects_bad_lexicon_files(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        SentimentLexicon.from_file(str(tmp_path / 'missing.tsv'))
+    path = tmp_path / 'lexicon.tsv'
+    path.write_text('worldie 3\n', encoding='utf-8')
+    with pytest.raises(ValueError, match='lexicon.tsv:1'):
+        SentimentLexicon.from_file(str(path))
@@ -0,0 +1,50 @@
+from src.models.domain_models import Comment, CommentBatch
+from src.tools.player_index import PlayerMentionIndex
+from src.tools.snapshot import Snapshot, SnapshotWriter
+
+PLAYERS = [{'name': 'Alex Smith', 'team': 'Red FC'}, {'name': 'Marco Silva', 'team': 'Blue FC'}]
+
+
+def _comments():
+    return [
+        Comment(author='fan1', text='Alex Smith was brilliant', team='Red FC', sentiment='positive', score=2,
+                mentions=['Alex Smith']),
+        Comment(author='fan2', text='Poor from Marco Silva, héhé', team='Blue FC', sentiment='negative', score=-1,
+                mentions=['Marco Silva']),
+        Comment(author='fan1', text='Alex Smith and Marco Silva both scored', team='Red FC', sentiment='neutral',
+                score=0, mentions=['Alex Smith', 'Marco Silva']),
+        Comment(author='fan3', text='', team='Red FC', sentiment='unknown', score=0),
+    ]
+
+
+def _write(path):
+    comments = _comments()
+    writer = SnapshotWriter(str(path), {'match_id': 'm1'}, PlayerMentionIndex(PLAYERS))
+    # The first batch carries resolved mentions, the second is matched by the writer.
+    writer.add(CommentBatch.from_comments(comments[:2]))
+    unresolved = CommentBatch()
+    for c in comments[2:]:
+        unresolved.append(c.author, c.text, c.team, c.score, c.sentiment)
+    writer.add(unresolved)
+    writer.close()
+    return comments
+
+
+def test_writer_round_trips_through_batch(tmp_path):
+    path = tmp_path / 'm1.snap'
+    comments = _write(path)
+
+    with Snapshot(str(path)) as snapshot:
+        assert len(snapshot) == len(comments)
+        assert snapshot.meta['match_id'] == 'm1'
+        assert list(snapshot.batch()) == comments
+        assert snapshot.player_totals() == {'Alex Smith': 2, 'Marco Silva': -1}
+
+
+def test_close_leaves_held_columns_readable(tmp_path):
+    path = tmp_path / 'm1.snap'
+    _write(path)
+
+    with Snapshot(str(path)) as snapshot:
+        scores = snapshot.scores
+    assert list(scores) == [2, -1, 0, 0]
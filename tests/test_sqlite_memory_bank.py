@@ -0,0 +1,49 @@
+import json
+from src.memory.sqlite_memory_bank import SQLiteMemoryBank
+
+LEGACY = [{'type': 'match_summary', 'match_id': 'm1', 'summary': 'Red win', 'ts': 100.5}, {'type': 'note', 'n': 1}]
+
+
+def _write_journal(path, entries):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.writelines(json.dumps(entry) + '\n' for entry in entries)
+
+
+def test_concurrent_first_opens_import_the_journal_once(tmp_path, monkeypatch):
+    db_path = str(tmp_path / 'memory.sqlite3')
+    _write_journal(str(tmp_path / 'memory.jsonl'), LEGACY)
+    read_legacy = SQLiteMemoryBank._read_legacy
+    others = []
+
+    def racing_read(self, path):
+        # Another process opens the fresh database while this one reads the journal.
+        if not others:
+            others.append(None)
+            others[0] = SQLiteMemoryBank(db_path)
+        return read_legacy(self, path)
+
+    monkeypatch.setattr(SQLiteMemoryBank, '_read_legacy', racing_read)
+    bank = SQLiteMemoryBank(db_path)
+    assert bank.get_all() == LEGACY
+    assert others[0].get_all() == LEGACY
+    others[0].close()
+    bank.close()
+
+    reopened = SQLiteMemoryBank(db_path)
+    assert len(reopened.get_all()) == 2
+    reopened.close()
+
+
+def test_imported_entries_keep_their_timestamps(tmp_path):
+    db_path = str(tmp_path / 'memory.sqlite3')
+    with open(tmp_path / 'memory.json', 'w', encoding='utf-8') as f:
+        json.dump(LEGACY, f)
+    bank = SQLiteMemoryBank(db_path)
+    bank.append_entry({'type': 'note', 'n': 2})
+
+    entries = bank.get_all()
+    assert entries[:2] == LEGACY  # the untimed legacy entry is not stamped with the import time
+    assert entries[2]['ts'] > 100.5
+    assert bank.match_summaries('m1') == [{'match_id': 'm1', 'ts': 100.5, 'summary': 'Red win'}]
+    assert [e.get('n') for e in bank.query('note', since=50)] == [2]
+    bank.close()
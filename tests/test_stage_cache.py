@@ -0,0 +1,48 @@
+import os
+import pytest
+from src.observability.metrics import Metrics
+from src.pipeline.stage_cache import StageCache, stage_key
+
+
+def _cache(tmp_path, **kwargs):
+    metrics = Metrics(str(tmp_path / 'counters.json'), flush_interval=float('inf'))
+    return StageCache(str(tmp_path / 'cache'), metrics=metrics, **kwargs), metrics
+
+
+# Protocol-0 pickles of a class whose module was removed and of a class that
+# is gone from a module that still exists, then a corrupt and an empty entry.
+STALE = [b'csrc.agents.old_agent\nOldResult\n.', b'cos\nNoSuchThing\n.', b'garbage', b'']
+
+
+@pytest.mark.parametrize('payload', STALE)
+def test_unreadable_entries_are_misses_and_removed(tmp_path, payload):
+    cache, metrics = _cache(tmp_path)
+    key = stage_key('fetch', 'thread')
+    cache.put('fetch', key, ['old'])
+    with open(cache._entry_path(key), 'wb') as f:
+        f.write(payload)
+
+    assert cache.get('fetch', key) == (False, None)
+    assert not cache.has(key)
+    assert metrics.get_all()['cache_misses.fetch'] == 1
+    assert cache.cached('fetch', key, lambda: ['new']) == ['new']
+    assert cache.get('fetch', key) == (True, ['new'])
+
+
+def test_puts_only_walk_the_directory_over_budget(tmp_path, monkeypatch):
+    cache, metrics = _cache(tmp_path, max_bytes=2000)
+    walks = []
+    walk = os.walk
+    monkeypatch.setattr(os, 'walk', lambda top: walks.append(top) or walk(top))
+
+    blob = b'x' * 600
+    for n in range(3):
+        cache.put('sentiment', stage_key('sentiment', n), blob)
+    assert len(walks) == 1  # the first put counts what is already there
+    cache.put('sentiment', stage_key('sentiment', 0), blob)  # overwriting does not grow the total
+    assert len(walks) == 1
+
+    cache.put('sentiment', stage_key('sentiment', 3), blob)
+    assert len(walks) == 2
+    assert metrics.get_all()['cache_evictions'] == 1
+    assert [cache.has(stage_key('sentiment', n)) for n in range(4)] == [True, False, True, True]
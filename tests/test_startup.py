@@ -0,0 +1,35 @@
+import pytest
+from benchmarks.bench_startup import COMMANDS, FORBIDDEN, import_times
+from src.pipeline.match_pipeline import STAGES, select_stages
+
+
+@pytest.mark.parametrize('command', sorted(COMMANDS))
+def test_cli_startup_skips_heavy_modules(command):
+    own, _ = import_times(COMMANDS[command])
+    assert 'argparse' in own  # the run was really traced
+    assert [module for module in FORBIDDEN if module in own] == []
+
+
+def test_cli_stage_flags_do_not_import_agents():
+    own, _ = import_times(['agent_main.py', '--only', 'impact', '--help'])
+    assert [module for module in FORBIDDEN if module in own] == []
+
+
+@pytest.mark.parametrize(
+    'only, from_stage, expected',
+    [
+        (None, None, STAGES),
+        (['impact'], None, ('impact',)),
+        (['report', 'fetch'], None, ('fetch', 'report')),  # pipeline order, not argument order
+        (None, 'sentiment', ('sentiment', 'impact', 'summary', 'report')),
+        (None, 'report', ('report',)),
+    ],
+)
+def test_select_stages(only, from_stage, expected):
+    assert select_stages(only=only, from_stage=from_stage) == expected
+
+
+@pytest.mark.parametrize('only, from_stage', [(['impact'], 'fetch'), (['scoring'], None), (None, 'nope')])
+def test_select_stages_rejects_bad_choices(only, from_stage):
+    with pytest.raises(ValueError):
+        select_stages(only=only, from_stage=from_stage)
@@ -0,0 +1,73 @@
+import itertools
+import json
+import logging
+import pytest
+from src.memory.memory_bank import MemoryBank
+from src.observability.metrics import Metrics
+from src.pipeline.match_pipeline import MatchInputs, run_match_pipeline
+from src.tools.reddit_fetcher import RedditFetcher
+from src.tools.synthetic_data import write_match
+
+COMMENTS = [
+    {'author': 'fan1', 'text': 'what a goal ] } {', 'team': 'Red FC'},
+    {'author': 'fän2', 'text': 'Ödegaard "magic" \\o/', 'team': 'Blue FC', 'extra': {'nested': [1, [2]]}},
+    {'author': 'fan3', 'text': '', 'team': 'Red FC'},
+]
+
+
+def _write(path, text):
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 5, 64, 1 << 16])
+def test_iterates_the_comments_array_incrementally(tmp_path, chunk_size):
+    # Other keys, including arrays, may come before "comments".
+    document = {'title': 'x' * 100, 'tags': ['comments', []], 'comments': COMMENTS, 'after': [1]}
+    path = _write(tmp_path / 'thread.json', json.dumps(document, indent=1))
+    fetcher = RedditFetcher()
+    assert list(fetcher.iter_from_file(path, chunk_size)) == fetcher.load_from_file(path) == COMMENTS
+
+
+def test_stops_reading_once_the_caller_does(tmp_path):
+    # Everything after the first two comments is unreadable.
+    path = _write(tmp_path / 'thread.json', '{"comments": [' + ','.join(map(json.dumps, COMMENTS[:2])) + ', {"au')
+    fetcher = RedditFetcher()
+    assert list(itertools.islice(fetcher.iter_from_file(path, 8), 2)) == COMMENTS[:2]
+    with pytest.raises(ValueError, match='Truncated comments array'):
+        list(fetcher.iter_from_file(path, 8))
+
+
+def test_empty_and_line_delimited_threads(tmp_path):
+    fetcher = RedditFetcher()
+    assert list(fetcher.iter_from_file(_write(tmp_path / 'empty.json', '{"comments": [ ]}'))) == []
+    assert list(fetcher.iter_from_file(_write(tmp_path / 'none.json', '{"title": "no comments"}'))) == []
+    lines = '\n'.join(map(json.dumps, COMMENTS[:2])) + '\n\n' + json.dumps(COMMENTS[2])
+    assert list(fetcher.iter_from_file(_write(tmp_path / 'thread.jsonl', lines))) == COMMENTS
+    with pytest.raises(FileNotFoundError):
+        list(fetcher.iter_from_file(str(tmp_path / 'missing.json')))
+
+
+def _run(path, thread_path, stats_path, **kwargs):
+    path.mkdir()
+    metrics = Metrics(str(path / 'counters.json'), flush_interval=float('inf'))
+    inputs = MatchInputs('m1', thread_path, stats_path, str(path / 'report.md'))
+    result = run_match_pipeline(
+        inputs, logging.getLogger('footypulse.test'), metrics, MemoryBank(str(path / 'memory.jsonl')), **kwargs
+    )
+    with open(result['report_path'], encoding='utf-8') as f:
+        return result, f.read()
+
+
+@pytest.mark.parametrize('jsonl', [True, False])
+def test_streamed_run_matches_the_in_memory_run(tmp_path, jsonl):
+    thread_path, stats_path = write_match(str(tmp_path / 'm1'), 5000, 12, seed=8, jsonl=jsonl)
+    options = dict(appendix_page_size=1000, rank_by='impact')
+    loaded, loaded_report = _run(tmp_path / 'loaded', thread_path, stats_path, **options)
+    streamed, streamed_report = _run(tmp_path / 'streamed', thread_path, stats_path, stream=True, **options)
+
+    assert streamed['num_comments'] == loaded['num_comments'] == 5000
+    assert streamed['player_impacts'] == loaded['player_impacts']
+    assert streamed['match_summary'] == loaded['match_summary']
+    assert streamed_report == loaded_report
+    assert '### Page 5' in streamed_report
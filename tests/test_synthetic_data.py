@@ -0,0 +1,76 @@
+import json
+import os
+import pytest
+from benchmarks.run_benchmarks import CASES, _compare, _run_case
+from src.tools.player_index import PlayerMentionIndex
+from src.tools.reddit_fetcher import RedditFetcher
+from src.tools.synthetic_data import generate_squad, iter_comments, write_match
+
+
+def _read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_same_seed_writes_the_same_match(tmp_path):
+    first = write_match(str(tmp_path / 'a' / 'm1'), 2000, 30, seed=4, duplicate_rate=0.1)
+    again = write_match(str(tmp_path / 'b' / 'm1'), 2000, 30, seed=4, duplicate_rate=0.1)
+    other = write_match(str(tmp_path / 'c' / 'm1'), 2000, 30, seed=5, duplicate_rate=0.1)
+    assert [_read(p) for p in first] == [_read(p) for p in again]
+    assert _read(first[0]) != _read(other[0])
+
+    as_json, _ = write_match(str(tmp_path / 'd' / 'm1'), 2000, 30, seed=4, duplicate_rate=0.1, jsonl=False)
+    fetcher = RedditFetcher()
+    assert list(fetcher.iter_from_file(as_json)) == list(fetcher.iter_from_file(first[0]))
+    with open(first[1], encoding='utf-8') as f:
+        assert json.load(f)['match_id'] == 'm1'
+
+
+def test_squads_of_any_size_have_unique_names():
+    squad = generate_squad(1000, num_teams=10, seed=1)
+    names = [p['name'] for p in squad['players']]
+    assert len(set(names)) == 1000  # more players than first x last name pairs
+    assert len(set(squad['teams'])) == 10
+    assert {p['team'] for p in squad['players']} == set(squad['teams'])
+
+
+@pytest.mark.parametrize('rate', [0.0, 0.3, 1.0])
+def test_mention_rate(rate):
+    squad = generate_squad(12, seed=2)
+    index = PlayerMentionIndex(squad['players'])
+    comments = list(iter_comments(4000, squad, seed=2, mention_rate=rate))
+    mentioned = sum(bool(index.find_mentions(c['text'])) for c in comments) / len(comments)
+    # Surnames shared by two players are ambiguous, so a few mentions go unresolved.
+    assert rate * 0.85 <= mentioned <= rate
+
+
+def test_duplicate_rate():
+    squad = generate_squad(12, seed=2)
+    unique = len({c['text'] for c in iter_comments(4000, squad, seed=2, duplicate_rate=0.25)})
+    assert 2800 <= unique <= 3200
+
+
+def _result(case, seconds, rss, scale=1000):
+    return {'case': case, 'scale': scale, 'seconds': seconds, 'items_per_sec': scale / seconds, 'peak_rss_kb': rss}
+
+
+def test_compare_flags_regressions_beyond_tolerance():
+    baseline = {'results': [_result('sentiment_agent', 1.0, 100_000), _result('metrics', 0.01, 50_000)]}
+    assert _compare([_result('sentiment_agent', 1.15, 115_000)], baseline, 0.2, 0.05) == []
+    slower = _compare([_result('sentiment_agent', 1.5, 100_000)], baseline, 0.2, 0.05)
+    assert len(slower) == 1 and 'throughput' in slower[0]
+    bigger = _compare([_result('sentiment_agent', 1.0, 130_000)], baseline, 0.2, 0.05)
+    assert len(bigger) == 1 and 'peak RSS' in bigger[0]
+    # Timings under min_seconds are noise; cases missing from the baseline are skipped.
+    assert _compare([_result('metrics', 0.03, 50_000), _result('pipeline', 9.0, 1)], baseline, 0.2, 0.05) == []
+
+
+@pytest.mark.parametrize('case', CASES)
+def test_benchmark_cases_run(tmp_path, case):
+    thread_path, stats_path = write_match(str(tmp_path / 'm1'), 300, 12, seed=1)
+    work_dir = tmp_path / 'work'
+    work_dir.mkdir()
+    seconds, rss, gauges = _run_case(case, thread_path, stats_path, 300, str(work_dir), 'python')
+    assert seconds > 0 and rss > 0 and isinstance(gauges, dict)
+    if case in ('report_generator_agent', 'pipeline'):
+        assert any(name.endswith('.md') for name in os.listdir(work_dir))
@@ -0,0 +1,90 @@
+import io
+import json
+import logging
+import os
+import sys
+import time
+import pytest
+from src.memory.memory_bank import MemoryBank
+from src.observability.metrics import Metrics
+from src.pipeline import tool_server
+from src.pipeline.tool_server import ToolClient, ToolError, ToolServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATS_PATH = os.path.join(ROOT, 'data', 'sample_match_stats.json')
+
+
+@pytest.fixture(scope='module')
+def client(tmp_path_factory):
+    # The server keeps its logs, metrics and memory in a scratch working directory.
+    cwd = tmp_path_factory.mktemp('serve')
+    with ToolClient([sys.executable, os.path.join(ROOT, 'agent_main.py'), '--serve', '--no-cache'], cwd=str(cwd)) as c:
+        yield c
+
+
+def test_lists_tools(client):
+    assert client.server_info['serverInfo']['name'] == tool_server.SERVER_NAME
+    names = {tool['name'] for tool in client.list_tools()}
+    assert {'reddit_fetch', 'score_comments', 'player_impact', 'generate_report', 'server_stats'} <= names
+
+
+def test_scores_comments(client):
+    result = client.call('score_comments', texts=["Smith's finish was brilliant", 'awful'], stats_path=STATS_PATH)
+    assert result['num_comments'] == 2
+    assert [c['sentiment'] for c in result['comments']] == ['positive', 'negative']
+    assert result['comments'][0]['mentions'] == ['Alex Smith']
+
+
+def test_unknown_tool_and_bad_params(client):
+    with pytest.raises(ToolError, match=str(tool_server.INVALID_PARAMS)):
+        client.request('tools/call', {'name': 'no_such_tool'})
+    with pytest.raises(ToolError, match=str(tool_server.INVALID_PARAMS)):
+        client.request('tools/call', {'name': 'score_comments', 'arguments': ['not', 'an', 'object']})
+    # A tool that rejects its arguments is a failed result, not a protocol error.
+    with pytest.raises(ToolError, match='needs texts or thread_path'):
+        client.call('score_comments')
+
+
+def _serve(server, *messages):
+    stdin = io.StringIO(''.join(json.dumps(m) + '\n' for m in messages))
+    stdout = io.StringIO()
+    server.serve(stdin, stdout)
+    return {reply['id']: reply for reply in map(json.loads, stdout.getvalue().splitlines())}
+
+
+def _server(tmp_path, **kwargs):
+    metrics = Metrics(str(tmp_path / 'counters.json'), flush_interval=float('inf'))
+    memory_bank = MemoryBank(str(tmp_path / 'memory.jsonl'))
+    return ToolServer(logging.getLogger('footypulse.test'), metrics, memory_bank, output_dir=str(tmp_path), **kwargs)
+
+
+def _call(request_id, name):
+    return {'jsonrpc': '2.0', 'id': request_id, 'method': 'tools/call', 'params': {'name': name, 'arguments': {}}}
+
+
+def test_rejects_calls_beyond_max_pending(tmp_path):
+    server = _server(tmp_path, max_concurrency=1, max_pending=1)
+
+    def slow(arguments):
+        # Holds the only slot until the second call has been turned away.
+        deadline = time.monotonic() + 5
+        while not server.rejected and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return {'done': True}
+
+    server._tools['slow'] = slow
+    replies = _serve(server, _call(1, 'slow'), _call(2, 'slow'))
+    assert replies[1]['result']['isError'] is False
+    assert replies[2]['error']['code'] == tool_server.SERVER_BUSY
+    assert server.rejected == 1
+
+
+def test_internal_failures_use_the_internal_error_code(tmp_path, monkeypatch):
+    server = _server(tmp_path)
+
+    def broken(name, arguments):
+        raise RuntimeError('boom')
+
+    monkeypatch.setattr(server, 'call_tool', broken)
+    replies = _serve(server, _call(1, 'server_stats'))
+    assert replies[1]['error'] == {'code': tool_server.INTERNAL_ERROR, 'message': 'RuntimeError: boom'}
@@ -0,0 +1,28 @@
+import threading
+import time
+from src.observability.tracing import Tracer
+
+
+def test_span_cpu_excludes_other_threads():
+    tracer = Tracer()
+    started = threading.Event()
+    stop = threading.Event()
+
+    def busy():
+        with tracer.span('busy'):
+            started.set()
+            while not stop.is_set():
+                pass
+
+    worker = threading.Thread(target=busy)
+    worker.start()
+    started.wait()
+    with tracer.span('idle'):
+        time.sleep(0.2)
+    stop.set()
+    worker.join()
+
+    spans = {span.name: span for span in tracer.spans}
+    assert spans['idle'].wall >= 0.2
+    assert spans['idle'].cpu < 0.05
+    assert spans['busy'].cpu > 0.05
@@ -0,0 +1,116 @@
+import logging
+import random
+import pytest
+from src.agents.player_impact_agent import compute_impact_score
+from src.memory.memory_bank import MemoryBank
+from src.models.domain_models import CommentBatch
+from src.observability.metrics import Metrics
+from src.pipeline.match_pipeline import MatchInputs, run_match_pipeline
+from src.tools import vector_scoring
+from src.tools.parallel_scoring import ChunkScorer
+from src.tools.player_index import PlayerMentionIndex
+from src.tools.sentiment_lexicon import SentimentLexicon
+from src.tools.synthetic_data import write_match
+
+WORDS = [
+    'not', "didn't", 'never', 'good', 'bad', 'great', 'win', 'winger', 'top', 'class', 'own', 'goal', 'very',
+    'Smith', "Smith's", "Jones'", 'Alex', 'Jo', 'Silva', 'Smudge', 'J.', 'Jr', 'naïve', 'Ödegaard', 'x\x00y',
+    '.', ',', '!?', '...', "'", '’', '-', '_', '  ', '\t', '\n', '123',
+]
+PLAYERS = [
+    {'name': 'Alex Smith', 'nicknames': ['Smudge'], 'goals': 2, 'assists': 1, 'cards': 0},
+    {'name': 'Jo Jones', 'goals': 0, 'assists': 0, 'cards': 2},
+    {'name': 'Marco Silva', 'goals': 1, 'assists': 0, 'cards': 1},
+    {'name': 'Martin Ödegaard', 'goals': 0, 'assists': 2, 'cards': 0},
+]
+
+
+def _random_texts(seed, count):
+    rng = random.Random(seed)
+    return [
+        ''.join(rng.choice(WORDS) + rng.choice(['', ' ', ' ', ' ', ', ']) for _ in range(rng.randint(0, 20)))
+        for _ in range(count)
+    ]
+
+
+def _score(backend, lexicon, index, texts):
+    batch = CommentBatch()
+    batch.texts = list(texts)
+    ChunkScorer(lexicon, index, backend).score_into(batch, 700)
+    return list(batch.scores), bytes(batch.labels), [batch.mentions(i) for i in range(len(batch))]
+
+
+@pytest.mark.parametrize(
+    'terms',
+    [
+        {'good': 1, 'great': 2, 'bad': -1, 'win': 1},
+        {'good': 1, 'top class': 3, 'own goal': -2.5, 'goal': 0.5, 'very good': 2, 'naïve': -1},
+    ],
+)
+def test_numpy_backend_matches_python(terms):
+    pytest.importorskip('numpy')
+    lexicon = SentimentLexicon(terms)
+    index = PlayerMentionIndex(PLAYERS)
+    texts = _random_texts(7, 5000)
+    expected = _score('python', lexicon, index, texts)
+    assert any(expected[2]) and len(set(expected[1])) == 3
+    assert _score('numpy', lexicon, index, texts) == expected
+
+
+def test_player_sentiment_and_impact_match_python():
+    pytest.importorskip('numpy')
+    lexicon = SentimentLexicon({'good': 1, 'bad': -1, 'own goal': -2})
+    index = PlayerMentionIndex(PLAYERS)
+    texts = _random_texts(11, 2000)
+    scorer = vector_scoring.VectorScorer(lexicon, index)
+    sentiment = scorer.player_sentiment(scorer.score_texts(texts)).tolist()
+
+    totals = dict.fromkeys(index.player_names, 0)
+    for text in texts:
+        for name in index.find_mentions(text):
+            totals[name] += lexicon.score(text)
+    assert dict(zip(scorer.player_names, sentiment)) == totals
+
+    impacts = vector_scoring.impact_scores(vector_scoring.stats_matrix(PLAYERS), sentiment)
+    assert impacts == [
+        compute_impact_score(p['goals'], p['assists'], p['cards'], s) for p, s in zip(PLAYERS, sentiment)
+    ]
+
+
+def _hide_numpy(monkeypatch):
+    monkeypatch.setattr(vector_scoring, 'HAVE_NUMPY', False)
+    monkeypatch.setattr(vector_scoring, 'np', None)
+
+
+def test_backends_without_numpy(monkeypatch):
+    _hide_numpy(monkeypatch)
+    assert vector_scoring.resolve_backend('auto') == 'python'
+    assert vector_scoring.resolve_backend('python') == 'python'
+    with pytest.raises(ImportError, match='requires numpy'):
+        vector_scoring.resolve_backend('numpy')
+    with pytest.raises(ImportError, match='requires numpy'):
+        vector_scoring.VectorScorer(SentimentLexicon({'good': 1}))
+    with pytest.raises(ValueError):
+        vector_scoring.resolve_backend('gpu')
+
+
+def _run(path, thread_path, stats_path, backend):
+    path.mkdir()
+    metrics = Metrics(str(path / 'counters.json'), flush_interval=float('inf'))
+    inputs = MatchInputs('m1', thread_path, stats_path, str(path / 'report.md'))
+    return run_match_pipeline(
+        inputs, logging.getLogger('footypulse.test'), metrics, MemoryBank(str(path / 'memory.jsonl')), backend=backend
+    )
+
+
+def test_pipeline_falls_back_to_python_without_numpy(tmp_path, monkeypatch):
+    pytest.importorskip('numpy')
+    thread_path, stats_path = write_match(str(tmp_path / 'm1'), 3000, 12, seed=4)
+    with_numpy = _run(tmp_path / 'numpy', thread_path, stats_path, 'numpy')
+
+    _hide_numpy(monkeypatch)
+    fallback = _run(tmp_path / 'python', thread_path, stats_path, 'auto')
+    assert vector_scoring.np is None  # nothing reached for numpy
+    assert fallback['player_impacts'] == with_numpy['player_impacts']
+    with open(fallback['report_path'], encoding='utf-8') as a, open(with_numpy['report_path'], encoding='utf-8') as b:
+        assert a.read() == b.read()